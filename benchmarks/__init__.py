@@ -0,0 +1,6 @@
+"""Micro benchmarks for the parser and formatters.
+
+Every module runs standalone from the directory containing this package, e.g.
+
+    python -m DocblockrPython.benchmarks.bench_analyzer
+"""
@@ -0,0 +1,116 @@
+"""Per keystroke cost of analyzing large function bodies and modules.
+
+Compares the single pass `analyze_body` with the previous approach of one
+regular expression scan per section.
+"""
+import re
+
+from ..parsers.analyzer import analyze_body
+from ..parsers.parser import PythonParser
+from .utils import measure, report
+
+
+def legacy_function_sections(line, contents):
+    """Scan a function body the way the parser did before `analyze_body`."""
+    decorators = []
+    for current in contents.split("\n"):
+        if current == line:
+            break
+        match = re.findall(r"^\s*@([a-zA-Z0-9_\.]*)(\(.*\)|$)", current)
+        if match:
+            decorators.append(match[0][0])
+
+    returns = re.findall(
+        re.compile(r"^\s*(return|yield) (\S+)", re.MULTILINE), contents
+    )
+    hint = re.search(
+        r"^\s*def\s+\w+\(.*\)\s*->\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*:",
+        contents,
+        flags=re.DOTALL,
+    )
+    raises = re.findall(re.compile(r"^\s*(raise) (\w+)", re.MULTILINE), contents)
+
+    return decorators, returns, hint, raises
+
+
+def legacy_module_variables(contents):
+    """Scan module contents the way the parser did before `analyze_body`."""
+    regex = re.compile(
+        r"^\s*((?:(?!from |import |async |def |class |@).)+$)", re.MULTILINE
+    )
+    return re.findall(regex, contents)
+
+
+def function_body(lines):
+    """Build a function of roughly `lines` lines."""
+    body = ["def handler(self, request: Request, retries: int = 3) -> Response:"]
+    for index in range(lines // 8):
+        body.extend(
+            [
+                "        value_{0} = compute(request, {0})".format(index),
+                "        if value_{} is None:".format(index),
+                "            raise ValueError('missing {}')".format(index),
+                "        for item in value_{}:".format(index),
+                "            total = total + item",
+                '            message = """',
+                "            return inside a string",
+                '            """',
+            ]
+        )
+    body.append("        return total")
+    return "\n".join(body) + "\n"
+
+
+def module_body(lines):
+    """Build module level contents of roughly `lines` lines."""
+    body = []
+    for index in range(lines // 4):
+        body.extend(
+            [
+                "import module_{}".format(index),
+                "CONSTANT_{} = {}".format(index, index),
+                "name_{}: str = 'value'".format(index),
+                "print(CONSTANT_{})".format(index),
+            ]
+        )
+    return "\n".join(body) + "\n"
+
+
+def main():
+    """Run the benchmark."""
+    parser = PythonParser()
+
+    for size in (200, 2000, 20000):
+        contents = function_body(size)
+        # `get_definition` joins the definition lines with a trailing space
+        line = contents.split("\n", 1)[0] + " "
+        report(
+            "function body, {} lines".format(size),
+            {
+                "per-section regexes": measure(
+                    lambda: legacy_function_sections(line, contents)
+                ),
+                "analyze_body": measure(
+                    lambda: analyze_body(contents, assignments=False)
+                ),
+                "process_function": measure(
+                    lambda: parser.process_function(line, contents)
+                ),
+            },
+        )
+
+    for size in (2000, 20000):
+        contents = module_body(size)
+        report(
+            "module contents, {} lines".format(size),
+            {
+                "per-section regexes": measure(
+                    lambda: legacy_module_variables(contents)
+                ),
+                "analyze_body": measure(lambda: analyze_body(contents, strings=False)),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
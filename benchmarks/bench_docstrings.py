@@ -0,0 +1,148 @@
+"""Throughput of the docstring parsers, and round trips through each formatter.
+
+Every undocumented definition of the corpus is rendered by each formatter, and
+read back by the parser of its style. The sections read back must be those
+of the definition, less what the style does not write down. A run fails, with
+a non-zero exit code, on the first docstring that does not round trip, and if
+a formatter has no parser or a style reads back no arguments at all. The
+parsers are then timed over all of the rendered docstrings.
+"""
+import argparse
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from ..formatters.utils import (
+    FORMATTER_DICT,
+    build_snippet,
+    get_formatter,
+    snippet_to_text,
+)
+from ..parsers.docstrings import DOCSTRING_PARSER_DICT, written_sections
+from ..parsers.scanner import parse_undocumented
+from .bench_pipeline import stdlib_corpus, synthetic_corpus
+from .utils import measure, report
+
+
+def identifiers(sections: List[Tuple[str, Any]]) -> bool:
+    """Whether every argument and attribute of parsed sections is named."""
+    for section, attributes in sections:
+        if section == "arguments":
+            items = attributes.arguments + attributes.keyword_arguments
+        elif section == "attributes":
+            items = attributes
+        else:
+            continue
+        if not all(item.name.lstrip("*").isidentifier() for item in items):
+            return False
+
+    return True
+
+
+def render(formatter, sections, summary=None) -> str:
+    """Render sections as the text of a docstring, without its quotes."""
+    return snippet_to_text(build_snippet(formatter, sections, summary, ""))
+
+
+def rendered_corpus() -> Dict[str, List[Tuple[str, str, list]]]:
+    """Render every undocumented definition of the corpus with each formatter.
+
+    Returns:
+        dict -- `(kind, text, expected sections)` of each docstring, by style
+    """
+    parsed = []
+    skipped = 0
+    for _, source in stdlib_corpus() + synthetic_corpus():
+        for definition, sections in parse_undocumented(source):
+            # such as comments inside of a signature, read as arguments
+            if identifiers(sections):
+                parsed.append((definition, sections))
+            else:
+                skipped += 1
+    if skipped:
+        print("skipped {} definitions with unnamed arguments".format(skipped))
+
+    corpus = {}
+    for style in DOCSTRING_PARSER_DICT:
+        formatter = get_formatter(style)()
+        corpus[style] = [
+            (
+                definition.kind,
+                render(formatter, sections),
+                written_sections(style, sections),
+            )
+            for definition, sections in parsed
+        ]
+
+    return corpus
+
+
+def check_round_trips(style: str, docstrings: List[Tuple[str, str, list]]):
+    """Read rendered docstrings back, and render them again.
+
+    Arguments:
+        style {str} -- Name of the formatter and parser
+        docstrings {list} -- `(kind, text, expected sections)` of each docstring
+
+    Raises:
+        AssertionError -- On the first docstring that does not round trip, or
+            if none of them has arguments
+    """
+    formatter = get_formatter(style)()
+    parser = DOCSTRING_PARSER_DICT[style]()
+    sections = set()
+    for kind, text, expected in docstrings:
+        docstring = parser.parse(text, kind)
+        assert docstring.sections == expected, "{}: {!r}\n{!r}\n{!r}".format(
+            style, text, docstring.sections, expected
+        )
+        again = render(formatter, docstring.sections, docstring.summary)
+        assert again == render(formatter, expected, "_summary_"), (style, text)
+        sections.update(section for section, _ in expected)
+
+    assert "arguments" in sections, "{}: no arguments read back".format(style)
+
+
+def main():
+    """Run the benchmark."""
+    if not __debug__:
+        sys.exit("the checks of this benchmark are asserts: run it without -O")
+
+    argparser = argparse.ArgumentParser(description=__doc__)
+    argparser.add_argument("--repeat", type=int, default=10)
+    args = argparser.parse_args()
+
+    assert sorted(DOCSTRING_PARSER_DICT) == sorted(FORMATTER_DICT)
+    corpus = rendered_corpus()
+    results = {}
+    rates = []
+    checked = 0
+    started = time.perf_counter()
+    for style, docstrings in corpus.items():
+        check_round_trips(style, docstrings)
+        checked += len(docstrings)
+    print(
+        "round trips of {} docstrings checked in {:.0f} ms".format(
+            checked, (time.perf_counter() - started) * 1000
+        )
+    )
+
+    for style, docstrings in corpus.items():
+        parser = DOCSTRING_PARSER_DICT[style]()
+        batch = [(text, kind) for kind, text, _ in docstrings]
+
+        def parse_all():
+            for text, kind in batch:
+                parser.parse(text, kind)
+
+        results[style] = measure(parse_all, args.repeat)
+        rates.append((style, len(batch) / results[style]["p50"] * 1000))
+
+    count = len(next(iter(corpus.values())))
+    report("parse {} docstrings of each style".format(count), results)
+    for style, rate in rates:
+        print("  {:<9} {:>9.0f} docstrings/s".format(style, rate))
+
+
+if __name__ == "__main__":
+    main()
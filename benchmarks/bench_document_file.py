@@ -0,0 +1,149 @@
+"""Cost of documenting a whole file at once, against one docstring at a time.
+
+The batched command parses every undocumented definition in one pass and
+inserts all of their docstrings in a single edit. Triggering the editor command
+on each definition instead costs at least the sum of the pipeline of every
+docstring, which is what the second case measures: it does not even include
+the snippet insertions and reindexing between them.
+
+Every definition parsed in the batch must be parsed as it is on its own, and
+the docstrings written for a whole file must not drift from their functions,
+including the functions holding nested definitions, and the functions with
+comments between their parameters.
+"""
+import time
+
+from . import stubs
+
+# The plugin modules import `sublime` when they are first imported
+stubs.install()
+
+from .. import commands, listeners  # noqa: E402
+from ..cli.drift import scan_source  # noqa: E402
+from ..cli.fill import fill_source  # noqa: E402
+from ..parsers.scanner import parse_undocumented  # noqa: E402
+from ..utils.consts import SETTING_FILE  # noqa: E402
+from .bench_pipeline import (  # noqa: E402
+    open_docstrings,
+    stdlib_corpus,
+    synthetic_module,
+    trigger,
+)
+from .stubs import sublime  # noqa: E402
+from .utils import measure, report  # noqa: E402
+
+FORMATTER = "google"
+
+# The docstring of `outer` is written along with the one of `inner`
+NESTED = """def outer(a, b=1):
+    def inner(x):
+        return x
+
+    if a:
+        raise ValueError()
+    return inner(a)
+"""
+
+# As in `json.encoder._make_iterencode`, the comment is no parameter
+COMMENTED = """def encode(markers, _indent,  # (see below, for the rest)
+        ## HACK: hand-optimized bytecode; turn globals into locals
+        ValueError=ValueError,
+        dict=dict,  # the builtin, default: {}
+    ):
+    return markers
+"""
+
+
+def document_file(window: sublime.Window, source: str) -> sublime.View:
+    """Run the batched command on a new view of a source.
+
+    Arguments:
+        window {sublime.Window} -- Window to open the view in
+        source {str} -- Python source
+
+    Returns:
+        sublime.View -- The documented view
+    """
+    view = sublime.View(source, window=window)
+    commands.DocblockrPythonDocumentFileCommand(view).run(sublime.Edit())
+    return view
+
+
+def one_at_a_time(window: sublime.Window, source: str):
+    """Run the editor command's pipeline on every opened docstring of a source.
+
+    Arguments:
+        window {sublime.Window} -- Window to open the view in
+        source {str} -- Python source
+    """
+    text, rows = open_docstrings(source)
+    view = sublime.View(text, window=window)
+    listeners.build_index(view)
+    command = commands.DocblockrPythonCommand(view)
+    for row in rows:
+        trigger(command, view, view.line_region(row).end())
+
+
+def check_batched(name: str, source: str):
+    """Check the batch against definitions parsed one at a time, and drift.
+
+    Arguments:
+        name {str} -- Name of the source
+        source {str} -- Python source
+
+    Raises:
+        AssertionError -- If a definition is parsed differently in the batch,
+            or a docstring written for the file drifts from its function
+    """
+    for definition, parsed in parse_undocumented(source):
+        if definition.kind == "module":
+            continue
+        ((_, alone),) = parse_undocumented(source, None, 4, {definition.row})
+        assert parsed == alone, (name, definition.row)
+
+    filled, _ = fill_source(source, FORMATTER)
+    drift = scan_source(name, filled.encode(), FORMATTER, None, 4)
+    assert drift.checked and not drift.findings, (name, drift.findings)
+
+
+def main():
+    """Run the benchmark."""
+    settings = sublime.load_settings(SETTING_FILE)
+    settings.set("formatter", FORMATTER)
+    # Time the parser, not the parse cache
+    settings.set("parse_cache_size", 0)
+    window = sublime.Window()
+
+    sources = {"3000 line module": synthetic_module(10, 19)}
+    sources.update(stdlib_corpus()[:4])
+
+    check_batched("nested", NESTED)
+    check_batched("commented", COMMENTED)
+    for name, source in stdlib_corpus():
+        check_batched(name, source)
+    print("batch and drift checked on {} module(s)".format(len(stdlib_corpus())))
+
+    for name, source in sources.items():
+        # Same result as filling the file from the command line
+        view = document_file(window, source)
+        expected, count = fill_source(source, FORMATTER)
+        assert view.substr(sublime.Region(0, view.size())) == expected, name
+
+        started = time.perf_counter()
+        one_at_a_time(window, source)
+        single = (time.perf_counter() - started) * 1000
+
+        results = {
+            "batched command": measure(lambda: document_file(window, source), 10),
+            "one at a time": measure(lambda: one_at_a_time(window, source), 3, 0),
+        }
+        report(
+            "{} ({} lines, {} docstrings, {:.0f} ms once)".format(
+                name, source.count("\n") + 1, count, single
+            ),
+            results,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Cost of the regex and ast parser engines on function definitions.
+
+Both engines must find the yields and raises in the arms of a `match`, and
+the ast engine those in the header of a compound statement too.
+"""
+from ..parsers.ast_parser import AstPythonParser, parse_function
+from ..parsers.parser import PythonParser
+from .utils import measure, report
+
+MATCH = """def route(command):
+    match command:
+        case "go":
+            yield 1
+        case _ if command:
+            raise ValueError(command)
+"""
+HEADER = """def pull(source):
+    while (yield source):
+        pass
+"""
+
+
+def signature(parameters):
+    """Build a definition line with `parameters` annotated parameters."""
+    arguments = ", ".join(
+        "arg_{0}: Dict[str, int] = {0}".format(index) for index in range(parameters)
+    )
+    return "def handler(self, {}) -> Response: ".format(arguments)
+
+
+def function(line, lines):
+    """Build the contents of a function of roughly `lines` lines."""
+    body = [line.strip()]
+    for index in range(lines // 4):
+        body.extend(
+            [
+                "        value_{0} = compute(request, {0})".format(index),
+                "        if value_{} is None:".format(index),
+                "            raise ValueError('missing {}')".format(index),
+                "        total = total + value_{}".format(index),
+            ]
+        )
+    body.append("        return total")
+    return "\n".join(body) + "\n"
+
+
+def check_sites():
+    """Check the yields and raises found in compound statements.
+
+    Raises:
+        AssertionError -- If the engines disagree on the arms of a `match`, or
+            the ast engine misses a yield in a header
+    """
+    regex = PythonParser()
+    tree = AstPythonParser()
+
+    line = MATCH.split("\n")[0]
+    parsed = tree.parse(line, MATCH)
+    assert parsed == regex.parse(line, MATCH), parsed
+    assert parsed.yields is not None and parsed.raises == ["ValueError"], parsed
+
+    parsed = tree.parse(HEADER.split("\n")[0], HEADER)
+    assert parsed.yields is not None, parsed
+
+
+def main():
+    """Run the benchmark."""
+    check_sites()
+    print("yields and raises of compound statements checked")
+
+    regex = PythonParser()
+    tree = AstPythonParser()
+
+    for parameters, lines in ((3, 20), (20, 200), (20, 2000)):
+        line = signature(parameters)
+        contents = function(line, lines)
+
+        def uncached():
+            parse_function.cache_clear()
+            tree.parse(line, contents)
+
+        report(
+            "{} parameters, {} line body".format(parameters, lines),
+            {
+                "regex": measure(lambda: regex.parse(line, contents)),
+                "ast": measure(uncached),
+                "ast (cached)": measure(lambda: tree.parse(line, contents)),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
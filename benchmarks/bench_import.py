@@ -0,0 +1,139 @@
+"""Import time of the modules the plugin loads at startup.
+
+Each case imports modules in a fresh interpreter with `-X importtime`, and
+reports the cumulative import time of the package modules it loaded. Startup
+imports `commands.py` and `listeners.py`, as Sublime Text does, with the stub
+`sublime` module of the benchmarks.
+
+The formatter styles are only imported once selected, and the package logger
+is only set up by `plugin_loaded`. A run fails, with a non-zero exit code, if
+a style shows up in the startup imports, if selecting a style imports another
+one, or if the package logger has handlers once the plugin is imported.
+"""
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List, Tuple
+
+from ..utils.consts import LOGGER_NAME
+
+PACKAGE = __package__.split(".")[0]
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Statements loading the plugin modules the way the plugin host does
+STARTUP = [
+    "from {0}.benchmarks import stubs".format(PACKAGE),
+    "stubs.install()",
+    "import {0}.commands, {0}.listeners".format(PACKAGE),
+]
+STYLE_MODULES = [
+    "formatters.PEP0257",
+    "formatters.docblock",
+    "formatters.google",
+    "formatters.numpy",
+    "formatters.sphinx",
+]
+SELECTED = "google"
+
+# Prints the package modules loaded, and the handlers of the package logger.
+# `-X importtime` leaves out modules imported by `importlib.import_module`, the
+# way the formatter styles are.
+REPORT = (
+    "import json, logging, sys; print(json.dumps({{"
+    "'modules': sorted(sys.modules), "
+    "'handlers': len(logging.getLogger({!r}).handlers)}}))"
+).format(LOGGER_NAME)
+
+
+def import_times(
+    statements: List[str],
+) -> Tuple[Dict[str, Tuple[int, int]], Dict[str, Any]]:
+    """Run statements in a new interpreter and collect its import times.
+
+    Arguments:
+        statements {list} -- Python statements, run one after the other
+
+    Returns:
+        tuple -- Self and cumulative microseconds, by module name, and the
+            `modules` loaded and `handlers` of the package logger afterwards
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "; ".join(statements + [REPORT])],
+        cwd=ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+
+    return times, json.loads(result.stdout.splitlines()[-1])
+
+
+def summarize(times: Dict[str, Tuple[int, int]]) -> Dict[str, float]:
+    """Sum the import times of the package modules, in milliseconds.
+
+    The stubs standing in for Sublime Text are left out.
+    """
+    own = [
+        times[name][0]
+        for name in times
+        if name.startswith(PACKAGE + ".")
+        and not name.startswith(PACKAGE + ".benchmarks")
+    ]
+    top = times.get(PACKAGE, (0, 0))[0]
+    return {"modules": len(own), "ms": (sum(own) + top) / 1000}
+
+
+def loaded_styles(modules: List[str]) -> List[str]:
+    """Return the formatter styles among loaded modules."""
+    return [style for style in STYLE_MODULES if PACKAGE + "." + style in modules]
+
+
+def main():
+    """Run the benchmark."""
+    if not __debug__:
+        sys.exit("the checks of this benchmark are asserts: run it without -O")
+
+    selected = "{}.formatters.utils.get_formatter({!r})".format(PACKAGE, SELECTED)
+    cases = {
+        "startup": STARTUP,
+        "startup + {}".format(SELECTED): STARTUP + [selected],
+        "startup + every style": STARTUP
+        + ["import " + ", ".join(PACKAGE + "." + name for name in STYLE_MODULES)],
+    }
+    for name, statements in cases.items():
+        best = None
+        for _ in range(5):
+            times, state = import_times(statements)
+            summary = summarize(times)
+            if best is None or summary["ms"] < best[0]["ms"]:
+                best = (summary, state)
+
+        summary, state = best
+        print(
+            "{:<22} {:3} package modules  {:7.2f} ms".format(
+                name, summary["modules"], summary["ms"]
+            )
+        )
+
+        loaded = loaded_styles(state["modules"])
+        if statements is STARTUP:
+            print("  formatter styles imported at startup: {}".format(loaded or None))
+            assert not loaded, "formatter styles must be imported lazily"
+            assert not state["handlers"], "the logger must be set up lazily"
+        elif statements[-1] is selected:
+            assert loaded == ["formatters." + SELECTED], loaded
+        else:
+            assert loaded == STYLE_MODULES, loaded
+
+
+if __name__ == "__main__":
+    main()
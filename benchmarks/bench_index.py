@@ -0,0 +1,55 @@
+"""Cost of reading a definition with and without the definition index."""
+from ..parsers.buffer import StringBuffer
+from ..parsers.index import DefinitionIndex
+from ..parsers.parser import PythonParser
+from .utils import measure, report
+
+
+def class_source(methods, lines):
+    """Build a class of `methods` methods of roughly `lines` lines each.
+
+    The last method has an opened docstring, as if the user just typed it.
+    """
+    source = ["class Handler:"]
+    for index in range(methods):
+        source.append("    def method_{}(self, request, retries=3):".format(index))
+        if index == methods - 1:
+            source.append('        """')
+        for line in range(lines):
+            source.append("        value_{0} = compute(request, {0})".format(line))
+        source.append("        return value_0")
+        source.append("")
+
+    return "\n".join(source) + "\n"
+
+
+def main():
+    """Run the benchmark."""
+    for methods, lines in ((10, 20), (100, 50)):
+        text = class_source(methods, lines)
+        buffer = StringBuffer(text)
+        position = text.index('"""') + 3
+
+        scanning = PythonParser()
+        indexed = PythonParser()
+        indexed.index = DefinitionIndex(text)
+
+        def edit():
+            index = DefinitionIndex(text)
+            index.apply_change(position, position, 1)
+            index.apply_change(position, position + 1, 0)
+            index.refresh(buffer)
+
+        report(
+            "{} methods of {} lines".format(methods, lines),
+            {
+                "scanning": measure(lambda: scanning.read_definition(buffer, position)),
+                "indexed": measure(lambda: indexed.read_definition(buffer, position)),
+                "build index": measure(lambda: DefinitionIndex(text)),
+                "build + edit": measure(edit),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""Logging cost of the keystroke path, at the INFO and DEBUG levels.
+
+The keystroke path reads the definition around an opened docstring, parses it
+and renders its snippet. At INFO, no record should even be created: every
+debug call is dropped by the level check, before its message is formatted.
+At DEBUG, records are queued to the thread writing them without their message
+being formatted, here by a handler that drops them. A run fails, with a
+non-zero exit code, if either of these does not hold.
+"""
+import logging
+from logging.handlers import QueueListener
+from queue import SimpleQueue
+
+from ..formatters.google import GoogleFormatter
+from ..formatters.utils import build_snippet
+from ..parsers.buffer import StringBuffer
+from ..parsers.parser import PythonParser
+from ..utils.consts import LOGGER_NAME
+from ..utils.log import RecordQueueHandler
+from .utils import measure, report
+
+
+def module_source(lines):
+    """Build a module with a function of roughly `lines` lines and its docstring."""
+    source = [
+        "import os",
+        "",
+        "",
+        "def handler(self, request: Request, retries: int = 3) -> Response:",
+        '    """',
+    ]
+    for index in range(lines // 4):
+        source.extend(
+            [
+                "    value_{0} = compute(request, {0})".format(index),
+                "    if value_{} is None:".format(index),
+                "        raise ValueError('missing {}')".format(index),
+                "    total = total + value_{}".format(index),
+            ]
+        )
+    source.append("    return total")
+    source.append("")
+
+    return "\n".join(source)
+
+
+def keystroke(parser, formatter, view, position):
+    """Run what the command runs when a docstring is opened."""
+    parser.is_docstring_closed(view, position)
+    line, contents = parser.read_definition(view, position)
+    return build_snippet(formatter, parser.parse(line, contents))
+
+
+class CountingRecords:
+    """Count the records created and the messages formatted while active."""
+
+    def __enter__(self):
+        """---."""
+        self.records = 0
+        self.messages = 0
+        self.make_record = logging.Logger.makeRecord
+        self.get_message = logging.LogRecord.getMessage
+
+        def make_record(logger, *args, **kwargs):
+            self.records += 1
+            return self.make_record(logger, *args, **kwargs)
+
+        def get_message(record):
+            self.messages += 1
+            return self.get_message(record)
+
+        logging.Logger.makeRecord = make_record  # type: ignore
+        logging.LogRecord.getMessage = get_message  # type: ignore
+        return self
+
+    def __exit__(self, *args):
+        """---."""
+        logging.Logger.makeRecord = self.make_record  # type: ignore
+        logging.LogRecord.getMessage = self.get_message  # type: ignore
+
+
+def main():
+    """Run the benchmark."""
+    logger = logging.getLogger(LOGGER_NAME)
+    level, handlers = logger.level, logger.handlers[:]
+
+    # A queue like the plugin's, draining into a handler that drops records
+    records: "SimpleQueue[logging.LogRecord]" = SimpleQueue()
+    listener = QueueListener(records, logging.NullHandler())
+    listener.start()
+    logger.handlers = [RecordQueueHandler(records)]
+
+    try:
+        for lines in (20, 2000):
+            view = StringBuffer(module_source(lines))
+            position = view.line_region(4).end()
+            parser = PythonParser()
+            formatter = GoogleFormatter()
+
+            results = {}
+            counts = []
+            for name in ("INFO", "DEBUG"):
+                logger.setLevel(name)
+                with CountingRecords() as counter:
+                    keystroke(parser, formatter, view, position)
+                assert counter.messages == 0, "messages formatted while logging"
+                if name == "INFO":
+                    assert counter.records == 0, "records created at INFO"
+                counts.append(
+                    "{}: {} records, {} messages".format(
+                        name, counter.records, counter.messages
+                    )
+                )
+                results[name] = measure(
+                    lambda: keystroke(parser, formatter, view, position)
+                )
+
+            report("{} line function ({})".format(lines, "; ".join(counts)), results)
+    finally:
+        listener.stop()
+        logger.handlers = handlers
+        logger.setLevel(level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""Latency of the language server, message by message.
+
+The server handles the messages of an in-process client. On every undocumented
+class and function of a corpus of standard library modules and synthetic
+modules, the client types an opening `\"\"\"` line as an incremental change,
+asks for completions right after the quotes, and undoes the change.
+
+Every completion must be the docstring the command line would add to the
+definition, and the document must still be indexed as if it was opened again
+after every edit. The code actions adding a definition's docstring and every
+missing docstring of the file must give the same text as the command line too.
+
+The change and completion are timed, along with a change sent as the whole new
+text of the document, which is what a server without incremental changes would
+be sent and have to read again.
+"""
+import io
+import time
+from typing import Any, Dict, List, Tuple
+
+from ..cli.fill import fill_source
+from ..cli.lsp import FILE_ACTION, LanguageServer, read_message
+from ..formatters.utils import get_formatter, render_docstring, snippet_to_text
+from ..parsers.buffer import StringBuffer
+from ..parsers.index import DefinitionIndex
+from ..parsers.scanner import iter_definitions, parse_undocumented
+from .bench_pipeline import stdlib_corpus, synthetic_corpus
+from .utils import report, summarize
+
+FORMATTER = "google"
+URI = "file:///corpus.py"
+
+
+class Client:
+    """Send messages to a server in the same process, and read its answers.
+
+    Keyword Arguments:
+        capabilities {dict} -- Capabilities of the client (default: {None})
+
+    Attributes:
+        latency {float} -- Time the server took on the last message, in
+            milliseconds
+    """
+
+    def __init__(self, capabilities=None):
+        """---."""
+        self.server = LanguageServer(FORMATTER)
+        self.server.writer = io.BytesIO()
+        self.requests = 0
+        self.latency = 0.0
+        self.request("initialize", {"capabilities": capabilities or {}})
+        self.notify("initialized", {})
+
+    def send(self, message: dict):
+        """Send a message, and time its handling."""
+        started = time.perf_counter()
+        self.server.handle(dict(message, jsonrpc="2.0"))
+        self.latency = (time.perf_counter() - started) * 1000
+
+    def notify(self, method: str, params: Any):
+        """Send a notification."""
+        self.send({"method": method, "params": params})
+
+    def request(self, method: str, params: Any) -> Any:
+        """Send a request, and return its result.
+
+        Raises:
+            AssertionError -- If the server answers with an error
+        """
+        self.requests += 1
+        self.send({"id": self.requests, "method": method, "params": params})
+
+        writer = self.server.writer
+        writer.seek(0)
+        answers = []
+        while True:
+            message = read_message(writer)
+            if message is None:
+                break
+            answers.append(message)
+        writer.seek(0)
+        writer.truncate()
+
+        (answer,) = [message for message in answers if message.get("id")]
+        assert "error" not in answer, answer
+        return answer["result"]
+
+
+def apply_edits(text: str, edits: List[Dict[str, Any]]) -> str:
+    """Apply `TextEdit`s, all relative to the original text, as a client does."""
+    buffer = StringBuffer(text)
+
+    def offset(position):
+        return buffer.line_starts[position["line"]] + position["character"]
+
+    for edit in sorted(edits, key=lambda edit: offset(edit["range"]["start"]))[::-1]:
+        begin, end = offset(edit["range"]["start"]), offset(edit["range"]["end"])
+        text = text[:begin] + edit["newText"] + text[end:]
+
+    return text
+
+
+def check_index(client: Client, source: str):
+    """Check that the document is indexed as if it was opened again.
+
+    Raises:
+        AssertionError -- If the line starts or definitions differ
+    """
+    document = client.server.documents[URI]
+    document.refresh()
+    assert document.buffer.text == source
+    assert document.buffer.line_starts == StringBuffer(source).line_starts
+
+    def spans(index):
+        return [
+            (entry.kind, entry.start, entry.end, entry.docstring)
+            for entry in index.entries
+        ]
+
+    assert spans(document.index) == spans(DefinitionIndex(source))
+
+
+def type_docstrings(client: Client, name: str, source: str) -> Dict[str, List[float]]:
+    """Open a docstring in every undocumented definition, and complete it.
+
+    Arguments:
+        client {Client} -- Client of the server
+        name {str} -- Name of the source
+        source {str} -- Python source
+
+    Returns:
+        dict -- Latencies of each message, in milliseconds
+
+    Raises:
+        AssertionError -- If a completion differs from the command line's
+            docstring
+    """
+    formatter = get_formatter(FORMATTER)()
+    client.notify(
+        "textDocument/didOpen",
+        {"textDocument": {"uri": URI, "version": 0, "text": source}},
+    )
+    version = 0
+    samples: Dict[str, List[float]] = {"change": [], "completion": [], "full": []}
+
+    def change(changes) -> float:
+        nonlocal version
+        version += 1
+        client.notify(
+            "textDocument/didChange",
+            {
+                "textDocument": {"uri": URI, "version": version},
+                "contentChanges": changes,
+            },
+        )
+        return client.latency
+
+    lines = source.split("\n")
+    for definition in iter_definitions(lines):
+        if definition.documented or definition.kind == "module":
+            continue
+
+        ((_, parsed),) = parse_undocumented(source, None, 4, {definition.row})
+        expected = render_docstring(formatter, parsed, definition)
+
+        row = definition.body_row
+        start = {"line": row, "character": 0}
+        opened = definition.indent + '"""\n'
+        inserted = {"range": {"start": start, "end": start}, "text": opened}
+        samples["change"].append(change([inserted]))
+
+        position = {"line": row, "character": len(definition.indent) + 3}
+        result = client.request(
+            "textDocument/completion",
+            {"textDocument": {"uri": URI}, "position": position},
+        )
+        samples["completion"].append(client.latency)
+        (item,) = result["items"]
+        text = definition.indent + snippet_to_text(item["textEdit"]["newText"])
+        assert text == expected, "{}:{}\n{}\n{}".format(
+            name, definition.row, text, expected
+        )
+
+        end = {"line": row + 1, "character": 0}
+        change([{"range": {"start": start, "end": end}, "text": ""}])
+
+    check_index(client, source)
+
+    for _ in range(min(len(samples["change"]), 20)):
+        samples["full"].append(change([{"text": source}]))
+
+    client.notify("textDocument/didClose", {"textDocument": {"uri": URI}})
+    return samples
+
+
+def check_code_actions(name: str, source: str):
+    """Check that the code actions add the docstrings of the command line.
+
+    Raises:
+        AssertionError -- If an action gives another text
+    """
+    expected, _ = fill_source(source, FORMATTER)
+    resolving = {
+        "textDocument": {"codeAction": {"resolveSupport": {"properties": ["edit"]}}}
+    }
+    for capabilities in (None, resolving):
+        client = Client(capabilities)
+        client.notify(
+            "textDocument/didOpen",
+            {"textDocument": {"uri": URI, "version": 0, "text": source}},
+        )
+
+        def actions(row, only=None):
+            position = {"line": row, "character": 0}
+            context: Dict[str, Any] = {"diagnostics": []}
+            if only:
+                context["only"] = only
+            return client.request(
+                "textDocument/codeAction",
+                {
+                    "textDocument": {"uri": URI},
+                    "range": {"start": position, "end": position},
+                    "context": context,
+                },
+            )
+
+        def edit_of(action):
+            if "edit" not in action:
+                action = client.request("codeAction/resolve", action)
+            return action["edit"]["changes"][URI]
+
+        (action,) = actions(0, [FILE_ACTION])
+        assert apply_edits(source, edit_of(action)) == expected, name
+
+        lines = source.split("\n")
+        formatter = get_formatter(FORMATTER)()
+        for definition in list(iter_definitions(lines))[:20]:
+            if definition.documented or definition.kind == "module":
+                continue
+
+            ((_, parsed),) = parse_undocumented(source, None, 4, {definition.row})
+            docstring = render_docstring(formatter, parsed, definition)
+            row = definition.body_row
+            wanted = "\n".join(lines[:row] + [docstring] + lines[row:])
+            (action,) = [
+                action
+                for action in actions(definition.row)
+                if action["kind"] != FILE_ACTION
+            ]
+            assert apply_edits(source, edit_of(action)) == wanted, (
+                name,
+                definition.row,
+            )
+
+
+def main():
+    """Run the benchmark."""
+    corpus: List[Tuple[str, str]] = stdlib_corpus() + synthetic_corpus()
+
+    client = Client()
+    samples: Dict[str, List[float]] = {"change": [], "completion": [], "full": []}
+    for name, source in corpus:
+        for message, latencies in type_docstrings(client, name, source).items():
+            samples[message].extend(latencies)
+        check_code_actions(name, source)
+    print("completions and code actions checked on {} module(s)".format(len(corpus)))
+
+    report(
+        "{} docstrings opened".format(len(samples["completion"])),
+        {
+            "incremental change": summarize(samples["change"]),
+            "whole text change": summarize(samples["full"]),
+            "completion": summarize(samples["completion"]),
+        },
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""Cost of parsing definitions through the on-disk parse cache.
+
+Every undocumented definition of a corpus of standard library modules is
+parsed by both engines with a cache, which must give back exactly what the
+parser returns on its own, whether the result was just written or read back.
+A cache bounded below the size of its results must evict the least recently
+used ones first, and reading must not wait on a flush that waits on another
+process holding the database.
+
+Filling the corpus is then timed for both engines without the cache, with a
+warm cache, as when a batch run covers an unchanged tree again, and with a warm
+cache after every method of the corpus gained an argument, so that only the
+other definitions are read back. The in-memory caches of the parser are
+cleared before each run, since every batch run starts in a new process.
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from ..cli.fill import fill_source
+from ..parsers import analyzer, ast_parser, signature
+from ..parsers.cache import ParseCache, cache_key
+from ..parsers.results import Arguments, ParsedFunction, param
+from ..parsers.scanner import parse_undocumented
+from ..parsers.utils import get_parser_class
+from .bench_pipeline import stdlib_corpus
+from .utils import measure, report
+
+
+def check_round_trip(corpus, parser_name: str) -> int:
+    """Parse every undocumented definition of a corpus with and without a cache.
+
+    Arguments:
+        corpus {list} -- `(name, source)` pairs
+        parser_name {str} -- Name of the parser engine
+
+    Returns:
+        int -- Number of definitions compared
+
+    Raises:
+        AssertionError -- If a cached result differs from the parser's
+    """
+    cache = ParseCache(":memory:")
+    compared = 0
+    for name, source in corpus:
+        expected = parse_undocumented(source, get_parser_class(parser_name)())
+
+        for _ in ("written", "read back"):
+            parser = get_parser_class(parser_name)()
+            parser.cache = cache
+            parsed = parse_undocumented(source, parser)
+            assert parsed == expected, "{}: {} parse differs".format(name, parser_name)
+
+        compared += len(expected)
+
+    cache.close()
+    return compared
+
+
+def check_eviction():
+    """Overflow a small cache, and check what it keeps.
+
+    Raises:
+        AssertionError -- If the cache outgrows its bound, evicts a result
+            used recently, or writes on a hit
+    """
+    cache = ParseCache(":memory:", max_size=4096)
+    for number in range(100):
+        # random names, which do not compress
+        arguments = Arguments([param(os.urandom(100).hex())], [])
+        parsed = ParsedFunction(arguments=arguments)
+        cache.put(cache_key("PythonParser", "0", str(number), ""), parsed)
+        # the first result stays in use
+        assert cache.get(cache_key("PythonParser", "0", "0", "")) is not None
+
+    (size,) = cache.connection.execute("SELECT SUM(size) FROM entries").fetchone()
+    assert size <= 4096, size
+    assert cache.get(cache_key("PythonParser", "0", "1", "")) is None
+
+    # a hit is only recorded in memory, until the next write
+    changes = cache.connection.total_changes
+    key = cache_key("PythonParser", "0", "99", "")
+    assert cache.get(key) is not None and key in cache.used
+    assert cache.connection.total_changes == changes
+    cache.close()
+
+
+def check_concurrent_reads(directory: str):
+    """Read from a cache while its flush waits on another connection.
+
+    Raises:
+        AssertionError -- If the read waits on the flush
+    """
+    path = os.path.join(directory, "concurrent.sqlite3")
+    cache = ParseCache(path, batched=True)
+    keys = [cache_key("PythonParser", "0", str(number), "") for number in range(2)]
+    cache.put(keys[0], ParsedFunction())
+    cache.flush()
+
+    # another process writing to the database
+    other = sqlite3.connect(path)
+    other.execute("BEGIN IMMEDIATE")
+    cache.put(keys[1], ParsedFunction())
+    flush = threading.Thread(target=cache.flush)
+    flush.start()
+    time.sleep(0.1)
+
+    started = time.perf_counter()
+    assert cache.get(keys[0]) is not None
+    assert time.perf_counter() - started < 0.05, "a read waited on a flush"
+
+    other.rollback()
+    other.close()
+    flush.join()
+    assert cache.get(keys[1]) is not None
+    cache.close()
+
+
+def add_argument(source: str) -> str:
+    """Add an argument to every function of a source."""
+    return source.replace("(self, ", "(self, extra, ")
+
+
+def main():
+    """Run the benchmark."""
+    corpus = stdlib_corpus()
+    for parser_name in ("regex", "ast"):
+        compared = check_round_trip(corpus, parser_name)
+        print("{}: {} definition(s) read back".format(parser_name, compared))
+    check_eviction()
+    print("eviction checked")
+
+    edited = [(name, add_argument(source)) for name, source in corpus]
+    directory = tempfile.mkdtemp(prefix="docblockr-parse-cache-")
+    try:
+        check_concurrent_reads(directory)
+        print("reads during a flush checked")
+
+        for parser_name in ("regex", "ast"):
+            path = os.path.join(directory, parser_name + ".sqlite3")
+            cache = ParseCache(path, batched=True)
+
+            def fill(sources, cache=None):
+                signature.parse_signature.cache_clear()
+                analyzer.body_tokens.cache_clear()
+                ast_parser.parse_function.cache_clear()
+                for _, source in sources:
+                    fill_source(source, "google", 4, parser_name, cache)
+                    if cache is not None:
+                        cache.flush()
+
+            fill(corpus, cache)
+            results = {
+                "without the cache": measure(lambda: fill(corpus), 5, 1),
+                "unchanged, warm": measure(lambda: fill(corpus, cache), 5, 1),
+                "edited, warm": measure(lambda: fill(edited, cache), 1, 0),
+            }
+            report("{}: fill {} module(s)".format(parser_name, len(corpus)), results)
+
+            entries, size = cache.connection.execute(
+                "SELECT COUNT(*), SUM(size) FROM entries"
+            ).fetchone()
+            print("  {} result(s), {:.0f} bytes each".format(entries, size / entries))
+            cache.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
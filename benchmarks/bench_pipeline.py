@@ -0,0 +1,354 @@
+"""Latency of the editor command, phase by phase, for every formatter.
+
+The plugin modules are imported against the in-memory `sublime` stubs, and the
+command is triggered on every undocumented definition of a corpus of standard
+library modules and synthetic modules, as if the user had just opened its
+docstring. Each trigger is timed in phases:
+
+- `initialize`: settings, parser and index lookups, and reading the definition
+- `closed`: checking whether the docstring is already closed
+- `parse`: parsing the definition
+- `snippet`: rendering the snippet with the formatter
+
+Results can be saved as a JSON baseline, and a later run compared against it:
+
+    python -m DocblockrPython.benchmarks.bench_pipeline --save baseline.json
+    python -m DocblockrPython.benchmarks.bench_pipeline --compare baseline.json
+
+A phase regresses when its p50 grows by more than the threshold, in which case
+the exit status is 1.
+"""
+import argparse
+import importlib.util
+import json
+import platform
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from . import stubs
+
+# The plugin modules import `sublime` when they are first imported
+stubs.install()
+
+from .. import commands, listeners  # noqa: E402
+from ..formatters.utils import FORMATTER_DICT  # noqa: E402
+from ..parsers.scanner import iter_definitions  # noqa: E402
+from ..utils.consts import SETTING_FILE  # noqa: E402
+from .stubs import sublime  # noqa: E402
+from .utils import summarize  # noqa: E402
+
+PHASES = ("initialize", "closed", "parse", "snippet")
+
+# Standard library modules with plenty of undocumented definitions
+STDLIB_MODULES = [
+    "argparse",
+    "ast",
+    "collections",
+    "dataclasses",
+    "difflib",
+    "email.message",
+    "inspect",
+    "json.decoder",
+    "logging",
+    "pathlib",
+    "tarfile",
+    "typing",
+]
+
+# Latencies by corpus, formatter and phase
+Results = Dict[str, Dict[str, Dict[str, Dict[str, float]]]]
+
+
+def stdlib_corpus() -> List[Tuple[str, str]]:
+    """Read the sources of the standard library modules of the corpus.
+
+    Returns:
+        list -- `(name, source)` pairs
+    """
+    corpus = []
+    for name in STDLIB_MODULES:
+        spec = importlib.util.find_spec(name)
+        if spec is None or not spec.origin or not spec.origin.endswith(".py"):
+            continue
+        with open(spec.origin, encoding="utf-8") as source:
+            corpus.append((name, source.read()))
+
+    return corpus
+
+
+def synthetic_module(classes: int, methods: int) -> str:
+    """Build a module of undocumented classes and methods.
+
+    Arguments:
+        classes {int} -- Number of classes
+        methods {int} -- Number of methods of each class
+
+    Returns:
+        str -- Source of the module
+    """
+    source = ["import os", "from typing import Dict, List, Optional", "", ""]
+    for index in range(classes):
+        source.append("class Handler{}(Base):".format(index))
+        source.append("    retries: int = 3")
+        source.append("")
+        for method in range(methods):
+            source.extend(
+                [
+                    "    @cached(maxsize={})".format(method),
+                    "    def method_{}(".format(method),
+                    "        self,",
+                    "        request: Dict[str, List[int]],",
+                    "        path: Optional[str] = None,",
+                    "        *args,",
+                    "        timeout: float = 1.5,",
+                    "        **kwargs",
+                    "    ) -> List[str]:",
+                    "        value = compute(request, {'key': (1, 2)})",
+                    "        if value is None:",
+                    "            raise ValueError('missing value')",
+                    "        for item in value:",
+                    "            yield os.path.join(path, item)",
+                    "        return [str(item) for item in value]",
+                    "",
+                ]
+            )
+        source.append("")
+
+    return "\n".join(source)
+
+
+def synthetic_corpus() -> List[Tuple[str, str]]:
+    """Build the synthetic modules of the corpus.
+
+    Returns:
+        list -- `(name, source)` pairs
+    """
+    return [
+        ("small", synthetic_module(2, 5)),
+        ("large", synthetic_module(20, 25)),
+    ]
+
+
+def open_docstrings(source: str) -> Tuple[str, List[int]]:
+    """Open a docstring in every undocumented definition of a source.
+
+    An opening `\"\"\"` line is inserted where each missing docstring belongs,
+    as `parsers.scanner.parse_undocumented` does.
+
+    Arguments:
+        source {str} -- Python source
+
+    Returns:
+        str, list -- The source with the opened docstrings, and their rows
+    """
+    lines = source.split("\n")
+    rows = []
+    opened: List[str] = []
+    start = 0
+    for definition in iter_definitions(lines):
+        if definition.documented:
+            continue
+        opened.extend(lines[start : definition.body_row])
+        rows.append(len(opened))
+        opened.append(definition.indent + '"""')
+        start = definition.body_row
+    opened.extend(lines[start:])
+
+    return "\n".join(opened), rows
+
+
+def trigger(command, view: sublime.View, position: int) -> Dict[str, float]:
+    """Run the command's pipeline at a position, and time each phase.
+
+    Arguments:
+        command {DocblockrPythonCommand} -- Command of the view
+        view {sublime.View} -- View to trigger the command in
+        position {int} -- Position of the cursor, after an opening `\"\"\"`
+
+    Returns:
+        dict -- Latency of each phase, in milliseconds
+    """
+    view.sel().clear()
+    view.sel().add(position)
+    timings = {}
+
+    started = time.perf_counter()
+    command.initialize(view)
+    timings["initialize"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    command.parser.is_docstring_closed(view, position)
+    timings["closed"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    output = command.parser.parse(command.line, command.contents)
+    timings["parse"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    command.create_snippet(output)
+    timings["snippet"] = time.perf_counter() - started
+
+    return {phase: seconds * 1000 for phase, seconds in timings.items()}
+
+
+def run(corpora: Dict[str, List[Tuple[str, str]]], repeat: int) -> Results:
+    """Trigger the command on every opened docstring of the corpora.
+
+    Arguments:
+        corpora {dict} -- `(name, source)` pairs, by corpus
+        repeat {int} -- Number of timed triggers of each docstring, the
+            fastest of which is kept
+
+    Returns:
+        dict -- Latencies by corpus, formatter and phase
+    """
+    settings = sublime.load_settings(SETTING_FILE)
+    # Time the parser, not the parse cache
+    settings.set("parse_cache_size", 0)
+    window = sublime.Window()
+
+    views = {}
+    for corpus, sources in corpora.items():
+        views[corpus] = []
+        for name, source in sources:
+            text, rows = open_docstrings(source)
+            view = sublime.View(text, window=window, file_name=name + ".py")
+            listeners.build_index(view)
+            positions = [view.line_region(row).end() for row in rows]
+            views[corpus].append((view, positions))
+
+    results: Results = {}
+    for formatter in FORMATTER_DICT:
+        # Through the settings file, which drops the resolved settings
+        settings.set("formatter", formatter)
+
+        for corpus, opened in views.items():
+            samples: Dict[str, List[float]] = {phase: [] for phase in PHASES}
+            for view, positions in opened:
+                command = commands.DocblockrPythonCommand(view)
+                for position in positions:
+                    # Warm up, then keep the best of `repeat` runs of each
+                    # phase, which filters out most of the scheduling noise
+                    trigger(command, view, position)
+                    runs = [trigger(command, view, position) for _ in range(repeat)]
+                    for phase in PHASES:
+                        samples[phase].append(min(run[phase] for run in runs))
+
+            results.setdefault(corpus, {})[formatter] = {
+                phase: dict(summarize(samples[phase]), count=len(samples[phase]))
+                for phase in PHASES
+            }
+
+    return results
+
+
+def print_results(results: Results):
+    """Print the latencies of a run.
+
+    Arguments:
+        results {dict} -- Latencies by corpus, formatter and phase
+    """
+    for corpus, formatters in results.items():
+        count = next(iter(next(iter(formatters.values())).values()))["count"]
+        print("{} corpus ({} triggers)".format(corpus, count))
+        print(
+            "  {:<10}{}".format("", "".join("{:>22}".format(phase) for phase in PHASES))
+        )
+        for formatter, phases in formatters.items():
+            print(
+                "  {:<10}{}".format(
+                    formatter,
+                    "".join(
+                        "{:>10.3f} /{:>8.3f} ms".format(
+                            phases[phase]["p50"], phases[phase]["p99"]
+                        )
+                        for phase in PHASES
+                    ),
+                )
+            )
+    print("  (p50 / p99)")
+
+
+def compare(baseline: Results, results: Results, threshold: float) -> List[str]:
+    """List the phases slower than in the baseline.
+
+    Arguments:
+        baseline {dict} -- Latencies of the baseline run
+        results {dict} -- Latencies of this run
+        threshold {float} -- Ratio of the p50 latencies considered a regression
+
+    Returns:
+        list -- Description of each regression
+    """
+    regressions = []
+    for corpus, formatters in results.items():
+        for formatter, phases in formatters.items():
+            for phase, latency in phases.items():
+                try:
+                    before = baseline[corpus][formatter][phase]["p50"]
+                except KeyError:
+                    continue
+
+                # Ignore changes below the timer's resolution
+                after = latency["p50"]
+                if after > before * threshold and after - before > 0.005:
+                    regressions.append(
+                        "{}/{}/{}: p50 {:.3f} ms -> {:.3f} ms (x{:.2f})".format(
+                            corpus, formatter, phase, before, after, after / before
+                        )
+                    )
+
+    return regressions
+
+
+def main():
+    """Run the benchmark."""
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    arguments.add_argument(
+        "--repeat", type=int, default=5, help="timed triggers of each docstring"
+    )
+    arguments.add_argument("--save", metavar="PATH", help="save the results as JSON")
+    arguments.add_argument(
+        "--compare", metavar="PATH", help="compare against saved results"
+    )
+    arguments.add_argument(
+        "--threshold",
+        type=float,
+        default=1.25,
+        help="p50 ratio reported as a regression (default: 1.25)",
+    )
+    options = arguments.parse_args()
+
+    results = run(
+        {"stdlib": stdlib_corpus(), "synthetic": synthetic_corpus()}, options.repeat
+    )
+    print_results(results)
+
+    if options.save:
+        with open(options.save, "w", encoding="utf-8") as output:
+            json.dump(
+                {
+                    "python": platform.python_version(),
+                    "platform": sys.platform,
+                    "repeat": options.repeat,
+                    "results": results,
+                },
+                output,
+                indent=2,
+            )
+
+    if options.compare:
+        with open(options.compare, encoding="utf-8") as saved:
+            baseline = json.load(saved)["results"]
+
+        regressions = compare(baseline, results, options.threshold)
+        for regression in regressions:
+            print("regression: " + regression)
+        if regressions:
+            sys.exit(1)
+        print("no regression against {}".format(options.compare))
+
+
+if __name__ == "__main__":
+    main()
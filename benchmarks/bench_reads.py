@@ -0,0 +1,94 @@
+"""Number of buffer calls and time spent reading definitions of a large class.
+
+Every buffer call is a round trip to the editor in the plugin host, so the
+count matters more than the in-memory timings.
+"""
+from ..parsers.buffer import StringBuffer
+from ..parsers.parser import PythonParser
+from .utils import measure, report
+
+
+class CountingBuffer(StringBuffer):
+    """`StringBuffer` counting the calls made to it."""
+
+    def __init__(self, text: str, tab_size: int = 4):
+        """---."""
+        super().__init__(text, tab_size)
+        self.calls = 0
+
+    def line(self, x):
+        """---."""
+        self.calls += 1
+        return super().line(x)
+
+    def substr(self, x):
+        """---."""
+        self.calls += 1
+        return super().substr(x)
+
+    def indentation_level(self, point):
+        """---."""
+        self.calls += 1
+        return super().indentation_level(point)
+
+
+def legacy_read_below(view, position):
+    """Read the body below a docstring one line at a time, as the parser did."""
+    level = view.indentation_level(position)
+    contents = ""
+    current = view.line(position)
+    while current.end() + 1 < view.size():
+        current = view.line(current.end() + 1)
+        line = view.substr(current).rstrip()
+        if not line:
+            continue
+        if view.indentation_level(current.end()) < level:
+            break
+        contents += line + "\n"
+
+    return contents
+
+
+def class_source(methods):
+    """Build a class of `methods` ten line methods, with an opened docstring."""
+    source = ["class Handler:", '    """']
+    for index in range(methods):
+        source.append("    def method_{}(self, request, retries=3):".format(index))
+        for line in range(8):
+            source.append("        value_{0} = compute(request, {0})".format(line))
+        source.append("        return value_0")
+    source.append("")
+
+    return "\n".join(source)
+
+
+def main():
+    """Run the benchmark."""
+    for methods in (50, 500):
+        buffer = CountingBuffer(class_source(methods))
+        position = buffer.line_region(1).end()
+        parser = PythonParser()
+
+        buffer.calls = 0
+        legacy_read_below(buffer, position)
+        legacy_calls = buffer.calls
+
+        buffer.calls = 0
+        parser.read_definition(buffer, position)
+        calls = buffer.calls
+
+        report(
+            "class docstring, {} lines ({} vs {} buffer calls)".format(
+                methods * 10, legacy_calls, calls
+            ),
+            {
+                "per-line reads": measure(lambda: legacy_read_below(buffer, position)),
+                "read_definition": measure(
+                    lambda: parser.read_definition(buffer, position)
+                ),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
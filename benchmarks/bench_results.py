@@ -0,0 +1,136 @@
+"""Memory held by parse results, as slotted objects and as dicts.
+
+Every undocumented definition of a corpus of standard library modules is
+parsed again for each copy of the corpus, as a batch run over a repository
+parses many similar files, and the results are kept. The memory they hold is
+traced, then compared with the same results in the shape `PythonParser.parse`
+used to return: lists of `(section, attributes)` pairs holding dicts, where
+every name, hint and default was a new slice of the text of its definition.
+
+Both parser engines must give results that read back through `dump` and
+`load` unchanged.
+"""
+import argparse
+import gc
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..parsers import analyzer, ast_parser, signature
+from ..parsers.results import Param, Parsed, dump, load
+from ..parsers.scanner import parse_undocumented
+from ..parsers.utils import get_parser_class
+from .bench_pipeline import stdlib_corpus
+
+# Types guessed from a value are constants of the parser, shared by every result
+GUESSED_TYPES = frozenset(
+    ["number", "str", "list", "dict", "tuple", "bool", "regexp", "unicode", "function"]
+)
+
+
+def sliced(text):
+    """Copy a string, as slicing it out of a definition did."""
+    if text is None or text in GUESSED_TYPES:
+        return text
+
+    return "".join(list(text))
+
+
+def as_dict(item: Param) -> Dict[str, Optional[str]]:
+    """Turn a parameter into the dict the parser returned."""
+    params = {"name": sliced(item.name), "type": sliced(item.type)}
+    if item.default is not None:
+        params["default"] = sliced(item.default)
+
+    return params
+
+
+def as_dicts(parsed: Parsed) -> List[Tuple[str, Any]]:
+    """Turn a parsed definition into the pairs of dicts the parser returned."""
+    pairs: List[Tuple[str, Any]] = []
+    for section, attributes in parsed:
+        if section == "arguments":
+            attributes = {
+                group: [as_dict(item) for item in params]
+                for group, params in attributes._asdict().items()
+            }
+        elif section == "attributes":
+            attributes = [as_dict(item) for item in attributes]
+        elif section in ("returns", "yields"):
+            attributes = {"type": sliced(attributes.type)}
+        else:
+            attributes = [sliced(name) for name in attributes]
+        pairs.append((section, attributes))
+
+    return pairs
+
+
+def clear_caches():
+    """Drop the in-memory caches of the parser, so only the results are held."""
+    signature.parse_signature.cache_clear()
+    analyzer.body_tokens.cache_clear()
+    ast_parser.parse_function.cache_clear()
+    gc.collect()
+
+
+def parse_copies(corpus, parser_name: str, copies: int) -> List[Parsed]:
+    """Parse every undocumented definition of a corpus, once per copy."""
+    results = []
+    for _ in range(copies):
+        for _, source in corpus:
+            parser = get_parser_class(parser_name)()
+            results.extend(parsed for _, parsed in parse_undocumented(source, parser))
+
+    return results
+
+
+def check_round_trip(results: List[Parsed]):
+    """Check that results read back from `dump` unchanged.
+
+    Raises:
+        AssertionError -- If a result reads back differently
+    """
+    for parsed in results:
+        if parsed:
+            assert load(dump(parsed)) == parsed, parsed
+
+
+def main():
+    """Run the benchmark."""
+    arguments = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    arguments.add_argument(
+        "--copies", type=int, default=10, help="parses of the corpus kept at once"
+    )
+    args = arguments.parse_args()
+
+    corpus = stdlib_corpus()
+    for parser_name in ("regex", "ast"):
+        clear_caches()
+        tracemalloc.start()
+        start = tracemalloc.get_traced_memory()[0]
+        results = parse_copies(corpus, parser_name, args.copies)
+        clear_caches()
+        slotted = tracemalloc.get_traced_memory()[0] - start
+
+        dicts = [as_dicts(parsed) for parsed in results]
+        clear_caches()
+        legacy = tracemalloc.get_traced_memory()[0] - start - slotted
+        tracemalloc.stop()
+
+        check_round_trip(results)
+        print(
+            "{}: {} result(s) of {} module(s), {} copies".format(
+                parser_name, len(results), len(corpus), args.copies
+            )
+        )
+        for name, size in (("dicts", legacy), ("slotted", slotted)):
+            print(
+                "  {:<8} {:9.2f} MiB  {:6.0f} bytes each".format(
+                    name, size / 2**20, size / len(results)
+                )
+            )
+        print("  {:.1f}x less memory".format(legacy / slotted))
+        del results, dicts
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Cost of parsing the parameters of very long function signatures.
+
+Compares the signature parser, with and without its cache, with the previous
+approach of regular expressions for the hints and a character by character
+split of the parameters.
+"""
+import re
+
+from ..parsers.parser import PythonParser
+from ..parsers.signature import parse_signature
+from .utils import measure, report
+
+
+def legacy_split_by_commas(string):
+    """Split parameters by commas the way the parser did before."""
+    out = []
+    current = ""
+    open_quotes = "\"'<({["
+    close_quotes = "\"'>)}]"
+    matching_quote = ""
+    inside_quotes = False
+    is_next_literal = False
+
+    for char in string:
+        if is_next_literal:
+            current += char
+            is_next_literal = False
+        elif inside_quotes:
+            if char == "\\":
+                is_next_literal = True
+            else:
+                current += char
+                if char == matching_quote:
+                    inside_quotes = False
+        else:
+            if char == ",":
+                if len(current.strip()):
+                    out.append(current.strip())
+                current = ""
+            else:
+                current += char
+                quote_index = open_quotes.find(char)
+                if quote_index > -1:
+                    matching_quote = close_quotes[quote_index]
+                    inside_quotes = True
+
+    if len(current.strip()):
+        out.append(current.strip())
+    return out
+
+
+def legacy_parse_arguments(parser, line):
+    """Parse the parameters of a signature the way the parser did before."""
+    parsed_arguments = {"arguments": [], "keyword_arguments": []}
+    arguments = re.search(r"^\s*def\s+\w+\((.*)\)", line)
+    hints = dict(
+        re.findall(r"(\w+)\s*:\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*", arguments.group(1))
+    )
+    arguments = re.sub(r":\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*", "", arguments.group(1))
+
+    for index, argument in enumerate(legacy_split_by_commas(arguments)):
+        if index == 0 and argument in ["self", "cls"]:
+            continue
+
+        argument_type = "keyword_arguments" if "=" in argument else "arguments"
+        parsed_arguments[argument_type].append(parser.process_variable(argument, hints))
+
+    return parsed_arguments
+
+
+def signature(parameters):
+    """Build a definition line with `parameters` parameters."""
+    kinds = (
+        "arg_{}",
+        "hinted_{}: Dict[str, List[int]]",
+        "number_{}: int = {}",
+        "text_{}: Optional[str] = 'a, b: c'",
+        "mapping_{}={{'key': ({}, 2)}}",
+    )
+    pieces = ["self"]
+    for index in range(parameters):
+        pieces.append(kinds[index % len(kinds)].format(index, index))
+
+    return "def handler({}) -> None:".format(", ".join(pieces))
+
+
+def main():
+    """Run the benchmark."""
+    parser = PythonParser()
+    for parameters in (20, 200):
+        line = signature(parameters)
+
+        def uncached():
+            parse_signature.cache_clear()
+            return parser.parse_arguments(line)
+
+        report(
+            "signature with {} parameters".format(parameters),
+            {
+                "regex + split_by_commas": measure(
+                    lambda: legacy_parse_arguments(parser, line)
+                ),
+                "parse_signature, uncached": measure(uncached),
+                "parse_signature, cached": measure(
+                    lambda: parser.parse_arguments(line)
+                ),
+            },
+        )
+
+
+if __name__ == "__main__":
+    main()
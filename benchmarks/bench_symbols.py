@@ -0,0 +1,164 @@
+"""Cost of the project symbol index, and the types it resolves.
+
+A project is made of copies of standard library packages, along with a module
+defining a class, an annotated function and a constant. The editor command is
+triggered on a file using them, whose defaults, returned value and base class
+must be resolved through the index.
+
+The index is then timed when built from scratch, when brought up to date with
+no file changed, and the command's parse with and without the index.
+"""
+import os
+import shutil
+import sysconfig
+import tempfile
+
+from . import stubs
+
+# The plugin modules import `sublime` when they are first imported
+stubs.install()
+
+from .. import commands, listeners  # noqa: E402
+from ..parsers.results import Returns  # noqa: E402
+from ..parsers.symbols import ProjectSymbols, SymbolIndex  # noqa: E402
+from ..utils.consts import SETTING_FILE  # noqa: E402
+from .bench_pipeline import trigger  # noqa: E402
+from .stubs import sublime  # noqa: E402
+from .utils import measure, report  # noqa: E402
+
+# Standard library packages copied into the project
+PACKAGES = ["asyncio", "concurrent", "email", "http", "json", "logging", "xml"]
+
+CLIENTS = """
+DEFAULT_TIMEOUT = 30.0
+
+
+class Client:
+    pass
+
+
+class Base:
+    pass
+
+
+def make_client(url: str) -> Client:
+    return Client()
+"""
+
+USES = '''from .clients import DEFAULT_TIMEOUT, Base, make_client
+
+
+class Handler(Base):
+    """
+    pass
+
+
+def connect(url, timeout=DEFAULT_TIMEOUT):
+    """
+    return make_client(url)
+'''
+
+
+def make_project(root: str) -> str:
+    """Copy the packages of the project, and write the modules using symbols.
+
+    Arguments:
+        root {str} -- Empty folder of the project
+
+    Returns:
+        str -- Path of the module using the symbols
+    """
+    library = sysconfig.get_paths()["stdlib"]
+    for package in PACKAGES:
+        shutil.copytree(os.path.join(library, package), os.path.join(root, package))
+
+    os.makedirs(os.path.join(root, "service"))
+    for name, source in (("__init__", ""), ("clients", CLIENTS), ("uses", USES)):
+        with open(os.path.join(root, "service", name + ".py"), "w") as file:
+            file.write(source)
+
+    return os.path.join(root, "service", "uses.py")
+
+
+def check_resolution(window: sublime.Window, path: str):
+    """Parse the definitions of the module using the symbols of the project.
+
+    Arguments:
+        window {sublime.Window} -- Window of the project
+        path {str} -- Path of the module
+
+    Raises:
+        AssertionError -- If a type is not resolved
+    """
+    view = sublime.View(USES, window=window, file_name=path)
+    listeners.build_index(view)
+    command = commands.DocblockrPythonCommand(view)
+
+    parsed = []
+    for row in (4, 9):
+        trigger(command, view, view.line_region(row).end())
+        parsed.append(dict(command.parser.parse(command.line, command.contents)))
+
+    handler, connect = parsed
+    assert handler["extends"] == ["service.clients.Base"], handler
+    timeout = connect["arguments"].keyword_arguments[0]
+    assert timeout.type == "number", timeout
+    assert connect["returns"] == Returns("Client"), connect
+
+
+def main():
+    """Run the benchmark."""
+    root = tempfile.mkdtemp(prefix="docblockr-symbols-")
+    database = os.path.join(root, "symbols.sqlite3")
+    try:
+        path = make_project(os.path.join(root, "project"))
+        folders = (os.path.join(root, "project"),)
+        files = list(listeners.project_files(folders))
+
+        settings = sublime.load_settings(SETTING_FILE)
+        settings.set("formatter", "google")
+        settings.set("symbol_index", True)
+        # Time the parser, not the parse cache
+        settings.set("parse_cache_size", 0)
+        window = sublime.Window(folders=list(folders))
+        # the stub runs the async indexing right away
+        listeners.index_project(window)
+        check_resolution(window, path)
+        print("resolved the types of {} file(s)".format(len(files)))
+
+        def cold():
+            if os.path.exists(database):
+                os.remove(database)
+            SymbolIndex(database).update(files)
+
+        index = SymbolIndex(database)
+        index.update(files)
+        symbols = ProjectSymbols(index, path)
+        results = {
+            "build from scratch": measure(cold, 3, 1),
+            "up to date": measure(lambda: index.update(files), 5, 1),
+            "lookup": measure(lambda: symbols.type_of("make_client(url)"), 1000),
+        }
+        report("symbol index of {} file(s)".format(len(files)), results)
+
+        view = sublime.View(USES, window=window, file_name=path)
+        listeners.build_index(view)
+        command = commands.DocblockrPythonCommand(view)
+        position = view.line_region(9).end()
+        trigger(command, view, position)
+
+        def parse():
+            command.parser.parse(command.line, command.contents)
+
+        with_index = measure(parse, 200)
+        command.parser.symbols = None
+        report(
+            "parse `connect`",
+            {"with the index": with_index, "without": measure(parse, 200)},
+        )
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
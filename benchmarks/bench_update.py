@@ -0,0 +1,103 @@
+"""Cost of updating every docstring of a file, as done on save.
+
+Each docstring of a documented module is checked against its definition.
+Updating a file that did not change must leave it alone, and updating a file
+whose signatures changed must give the docstrings generated for the new
+signatures. The command is then timed with its plans cached, as on a save
+following an edit, and with a cold cache, as on the first save of a file.
+"""
+from typing import Tuple
+
+from . import stubs
+
+# The plugin modules import `sublime` when they are first imported
+stubs.install()
+
+from .. import commands, listeners  # noqa: E402
+from ..cli.fill import fill_source  # noqa: E402
+from ..formatters.update import plan_update  # noqa: E402
+from ..parsers.docstrings import DOCSTRING_PARSER_DICT  # noqa: E402
+from ..utils.consts import SETTING_FILE  # noqa: E402
+from .bench_pipeline import synthetic_module  # noqa: E402
+from .stubs import sublime  # noqa: E402
+from .utils import measure, report  # noqa: E402
+
+
+def change_signatures(source: str) -> str:
+    """Drop an argument of every method, and add another one."""
+    return source.replace("        path: Optional[str] = None,\n", "").replace(
+        "        self,\n", "        self,\n        session: Session,\n"
+    )
+
+
+def update_all(window: sublime.Window, source: str) -> Tuple[str, sublime.View]:
+    """Run the command on every docstring of a new view of a source.
+
+    Arguments:
+        window {sublime.Window} -- Window to open the view in
+        source {str} -- Python source
+
+    Returns:
+        str, sublime.View -- The updated source, and its view
+    """
+    view = sublime.View(source, window=window)
+    listeners.build_index(view)
+    commands.DocblockrPythonUpdateDocstringCommand(view).run(sublime.Edit(), True)
+    return view.substr(sublime.Region(0, view.size())), view
+
+
+def check_updates(window: sublime.Window, style: str, source: str):
+    """Update a documented source, before and after its signatures change.
+
+    Arguments:
+        window {sublime.Window} -- Window to open the views in
+        style {str} -- Name of the formatter
+        source {str} -- Undocumented python source
+
+    Raises:
+        AssertionError -- If an update differs from the generated docstrings
+    """
+    documented, _ = fill_source(source, style)
+    updated, _ = update_all(window, documented)
+    assert updated == documented, "{}: an up to date file changed".format(style)
+
+    expected, _ = fill_source(change_signatures(source), style)
+    updated, _ = update_all(window, change_signatures(documented))
+    assert updated == expected, "{}: the update differs from fill".format(style)
+
+
+def main():
+    """Run the benchmark."""
+    settings = sublime.load_settings(SETTING_FILE)
+    # Time the parser, not the parse cache
+    settings.set("parse_cache_size", 0)
+    window = sublime.Window()
+
+    for style in DOCSTRING_PARSER_DICT:
+        settings.set("formatter", style)
+        check_updates(window, style, synthetic_module(3, 4))
+    print("updates checked for {} styles".format(len(DOCSTRING_PARSER_DICT)))
+
+    settings.set("formatter", "google")
+    source = synthetic_module(10, 19)
+    documented, count = fill_source(source, "google")
+    changed = change_signatures(documented)
+
+    def cold(text: str):
+        plan_update.cache_clear()
+        update_all(window, text)
+
+    results = {
+        "unchanged, cached": measure(lambda: update_all(window, documented), 10),
+        "unchanged, cold": measure(lambda: cold(documented), 5),
+        "changed, cached": measure(lambda: update_all(window, changed), 10),
+        "changed, cold": measure(lambda: cold(changed), 5),
+    }
+    report(
+        "update {} docstrings ({} lines)".format(count, documented.count("\n") + 1),
+        results,
+    )
+
+
+if __name__ == "__main__":
+    main()
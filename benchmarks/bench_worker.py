@@ -0,0 +1,246 @@
+"""Time the plugin host spends on whole-file operations, with a worker process.
+
+The `Document File` and `Update All Docstrings` commands run on views of the
+standard library and synthetic modules, once in the plugin host and once with
+a worker process started from the interpreter running the benchmark. The
+worker must give the text the plugin host gives, files must be documented as
+the command line documents them, and the edits of a snapshot must be dropped
+once the buffer changed. A worker that cannot be started must leave the
+commands working in the plugin host.
+
+With a worker, the plugin host only reads the snapshot and applies the edits;
+both are timed, along with the requests the worker answers on the async
+thread. The stub views update their line starts on every edit, so applying
+edits takes longer here than in Sublime Text, in the plugin host as well.
+"""
+import os
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import stubs
+
+# The plugin modules import `sublime` when they are first imported
+stubs.install()
+
+from .. import commands, listeners  # noqa: E402
+from ..cli.fill import fill_source  # noqa: E402
+from ..utils.consts import SETTING_FILE  # noqa: E402
+from .bench_pipeline import stdlib_corpus, synthetic_module  # noqa: E402
+from .bench_update import change_signatures  # noqa: E402
+from .stubs import sublime  # noqa: E402
+from .utils import measure, report, summarize  # noqa: E402
+
+FORMATTER = "google"
+
+PACKAGE = __package__.split(".")[0]
+
+
+def install_package():
+    """Link the package into the packages directory the worker starts from."""
+    packages = sublime.packages_path()
+    os.makedirs(packages, exist_ok=True)
+    link = os.path.join(packages, PACKAGE)
+    if not os.path.exists(link):
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        os.symlink(root, link)
+
+
+class Deferred:
+    """Keep the jobs sent to the async thread, instead of running them."""
+
+    def __init__(self):
+        """---."""
+        self.jobs: List[Callable[[], None]] = []
+        self.set_timeout_async = sublime.set_timeout_async
+
+    def __enter__(self):
+        """---."""
+        sublime.set_timeout_async = lambda callback, delay=0: self.jobs.append(callback)
+        return self
+
+    def __exit__(self, *args):
+        """---."""
+        sublime.set_timeout_async = self.set_timeout_async
+
+
+def apply_pending(view: sublime.View) -> bool:
+    """Run the `docblockr_python_apply_edits` command sent to a view, if any.
+
+    The stub views only record the commands they are sent.
+
+    Returns:
+        bool -- Whether there was one
+    """
+    for index, (command, args) in enumerate(view.commands):
+        if command == "docblockr_python_apply_edits":
+            del view.commands[index]
+            commands.DocblockrPythonApplyEditsCommand(view).run(sublime.Edit(), **args)
+            return True
+
+    return False
+
+
+def run_command(view: sublime.View, command: str) -> str:
+    """Run a whole-file command on a view, and apply its edits.
+
+    Returns:
+        str -- Text of the view afterwards
+    """
+    if command == "document_file":
+        commands.DocblockrPythonDocumentFileCommand(view).run(sublime.Edit())
+    else:
+        commands.DocblockrPythonUpdateDocstringCommand(view).run(sublime.Edit(), True)
+    apply_pending(view)
+
+    return view.substr(sublime.Region(0, view.size()))
+
+
+def cases(source: str) -> List[Tuple[str, str]]:
+    """Return the `(command, text)` of each operation on a source."""
+    documented, _ = fill_source(source, FORMATTER)
+    return [
+        ("document_file", source),
+        ("update_docstrings", documented),
+        ("update_docstrings", change_signatures(documented)),
+    ]
+
+
+def check_commands(
+    window: sublime.Window,
+    corpus: List[Tuple[str, str]],
+    expected: Optional[List[str]] = None,
+) -> List[str]:
+    """Check the text the commands give.
+
+    Arguments:
+        window {sublime.Window} -- Window to open the views in
+        corpus {list} -- `(name, source)` of each module
+
+    Keyword Arguments:
+        expected {list} -- Texts given in the plugin host (default: {None})
+
+    Raises:
+        AssertionError -- If a command gives another text, or applies the
+            edits of a stale snapshot
+
+    Returns:
+        list -- Text given by each operation
+    """
+    results = []
+    for name, source in corpus:
+        for command, text in cases(source):
+            view = sublime.View(text, window=window)
+            listeners.build_index(view)
+            result = run_command(view, command)
+            if command == "document_file":
+                assert result == fill_source(text, FORMATTER)[0], (name, command)
+            if expected is not None:
+                assert result == expected[len(results)], (name, command)
+            results.append(result)
+
+    if listeners.get_worker() is None:
+        return results
+
+    # The edits of a snapshot are dropped once the buffer changed
+    text, _ = fill_source(corpus[0][1], FORMATTER)
+    view = sublime.View(change_signatures(text), window=window)
+    listeners.build_index(view)
+    with Deferred() as deferred:
+        commands.DocblockrPythonUpdateDocstringCommand(view).run(sublime.Edit(), True)
+    view.insert(sublime.Edit(), 0, "\n")
+    for job in deferred.jobs:
+        job()
+    assert apply_pending(view)
+    assert view.substr(sublime.Region(0, view.size())) == "\n" + change_signatures(text)
+
+    return results
+
+
+def time_plugin_host(
+    window: sublime.Window, source: str, repeat: int
+) -> Dict[str, Dict[str, float]]:
+    """Time the plugin host and the worker on the operations of a source.
+
+    Returns:
+        dict -- Latencies of each phase, by name
+    """
+    samples: Dict[str, List[float]] = {}
+
+    def sample(name, started):
+        samples.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+
+    for command, text in cases(source):
+        for _ in range(repeat):
+            view = sublime.View(text, window=window)
+            listeners.build_index(view)
+
+            with Deferred() as deferred:
+                started = time.perf_counter()
+                run_command(view, command)
+                sample("{}, snapshot".format(command), started)
+
+            # the request to the worker, and the flush of the parse cache
+            started = time.perf_counter()
+            for job in deferred.jobs:
+                job()
+            sample("{}, worker".format(command), started)
+
+            started = time.perf_counter()
+            assert apply_pending(view)
+            sample("{}, apply".format(command), started)
+
+    return {name: summarize(latencies) for name, latencies in samples.items()}
+
+
+def main():
+    """Run the benchmark."""
+    install_package()
+    settings = sublime.load_settings(SETTING_FILE)
+    settings.set("formatter", FORMATTER)
+    window = sublime.Window()
+    corpus = [("3000 line module", synthetic_module(30, 12))] + stdlib_corpus()[:4]
+
+    # In the plugin host
+    settings.set("worker_python", "")
+    in_process = {}
+    for name, source in corpus[:1]:
+        for command, text in cases(source):
+
+            def run(command=command, text=text):
+                view = sublime.View(text, window=window)
+                listeners.build_index(view)
+                run_command(view, command)
+
+            in_process[command + ", plugin host"] = measure(run, repeat=10)
+    expected = check_commands(window, corpus)
+
+    # In a worker that cannot be started
+    settings.set("worker_python", os.path.join(sublime.packages_path(), "missing"))
+    check_commands(window, corpus[:1], expected)
+
+    settings.set("worker_python", sys.executable)
+    started = time.perf_counter()
+    worker = listeners.get_worker()
+    assert worker is not None
+    worker.request("document_file", {"text": "", "formatter": FORMATTER})
+    print("worker started in {:.0f} ms".format((time.perf_counter() - started) * 1000))
+
+    check_commands(window, corpus, expected)
+    print("commands checked on {} module(s)".format(len(corpus)))
+
+    name, source = corpus[0]
+    report(
+        "{} ({} lines), in the plugin host".format(name, source.count("\n")),
+        in_process,
+    )
+    report(
+        "{} ({} lines), with a worker".format(name, source.count("\n")),
+        time_plugin_host(window, source, 10),
+    )
+
+    listeners.plugin_unloaded()
+
+
+if __name__ == "__main__":
+    main()
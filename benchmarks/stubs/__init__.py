@@ -0,0 +1,18 @@
+"""Stand-ins for the `sublime` and `sublime_plugin` modules.
+
+`install` registers them under their real names, so the plugin modules, e.g.
+`commands.py`, can be imported and driven outside of Sublime Text.
+"""
+import sys
+
+
+def install():
+    """Make `import sublime` and `import sublime_plugin` load the stubs.
+
+    Modules already imported keep whatever `sublime` they were imported with,
+    so this must run before the plugin modules are imported.
+    """
+    from . import sublime, sublime_plugin
+
+    sys.modules.setdefault("sublime", sublime)
+    sys.modules.setdefault("sublime_plugin", sublime_plugin)
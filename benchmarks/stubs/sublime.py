@@ -0,0 +1,409 @@
+"""In-memory stand-in for the `sublime` module.
+
+Only the parts of the API the plugin uses are implemented. Views are backed by
+a `StringBuffer`, windows hold their project data in memory, and timeouts run
+their callback right away.
+"""
+import itertools
+import os
+import tempfile
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from ...parsers.buffer import Region, StringBuffer
+
+__all__ = [
+    "Region",
+    "Selection",
+    "Settings",
+    "Buffer",
+    "View",
+    "Window",
+    "Edit",
+    "TextChange",
+    "load_settings",
+    "platform",
+    "packages_path",
+    "cache_path",
+    "installed_packages_path",
+    "set_timeout",
+    "set_timeout_async",
+    "status_message",
+    "active_window",
+    "windows",
+]
+
+ids = itertools.count(1)
+
+# Configuration directory of the stub editor, with its `Packages` folder
+DATA_PATH = os.path.join(tempfile.gettempdir(), "sublime-stub")
+
+
+class Selection:
+    """Regions selected in a view."""
+
+    def __init__(self, regions: Optional[List[Region]] = None):
+        """---."""
+        self.regions = list(regions or [Region(0)])
+
+    def __getitem__(self, index: int) -> Region:
+        """---."""
+        return self.regions[index]
+
+    def __len__(self) -> int:
+        """---."""
+        return len(self.regions)
+
+    def __iter__(self):
+        """---."""
+        return iter(self.regions)
+
+    def clear(self):
+        """Deselect everything."""
+        self.regions = []
+
+    def add(self, region: Union[Region, int]):
+        """Add a region, or a caret at a point, to the selection."""
+        self.regions.append(region if isinstance(region, Region) else Region(region))
+
+
+class Settings:
+    """A settings object, with change callbacks.
+
+    Arguments:
+        values {dict} -- Initial settings (default: {None})
+    """
+
+    def __init__(self, values: Optional[Dict[str, Any]] = None):
+        """---."""
+        self.values = dict(values or {})
+        self.callbacks: Dict[str, Callable[[], None]] = {}
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """---."""
+        return self.values.get(key, default)
+
+    def has(self, key: str) -> bool:
+        """---."""
+        return key in self.values
+
+    def set(self, key: str, value: Any):
+        """Change a setting, and run the change callbacks."""
+        self.values[key] = value
+        for callback in list(self.callbacks.values()):
+            callback()
+
+    def erase(self, key: str):
+        """Remove a setting, and run the change callbacks."""
+        self.values.pop(key, None)
+        for callback in list(self.callbacks.values()):
+            callback()
+
+    def add_on_change(self, tag: str, callback: Callable[[], None]):
+        """---."""
+        self.callbacks[tag] = callback
+
+    def clear_on_change(self, tag: str):
+        """---."""
+        self.callbacks.pop(tag, None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """---."""
+        return dict(self.values)
+
+
+class Edit:
+    """Token passed to `TextCommand.run`."""
+
+
+class TextChange:
+    """An edit of a buffer, as reported to `on_text_changed`.
+
+    Arguments:
+        a {int} -- Offset where the replaced text started
+        b {int} -- Offset where the replaced text ended
+        text {str} -- Inserted text
+    """
+
+    class Position:
+        """A position in a buffer."""
+
+        def __init__(self, pt: int):
+            """---."""
+            self.pt = pt
+
+    def __init__(self, a: int, b: int, text: str):
+        """---."""
+        self.a = self.Position(a)
+        self.b = self.Position(b)
+        self.str = text
+
+
+class Buffer:
+    """The text shared by the views of a file."""
+
+    def __init__(self):
+        """---."""
+        self.buffer_id = next(ids)
+        self.view_list: List["View"] = []
+
+    def id(self) -> int:
+        """---."""
+        return self.buffer_id
+
+    def views(self) -> List["View"]:
+        """---."""
+        return list(self.view_list)
+
+    def primary_view(self) -> Optional["View"]:
+        """---."""
+        return self.view_list[0] if self.view_list else None
+
+
+class View(StringBuffer):
+    """A view of an in-memory python buffer.
+
+    Arguments:
+        text {str} -- Contents of the buffer, using `\\n` line endings
+
+    Keyword Arguments:
+        settings {dict} -- View settings, `tab_size` and `syntax` default to a
+            python view indented with 4 spaces (default: {None})
+        window {Window} -- Window holding the view (default: {None})
+        file_name {str} -- Path of the file of the view (default: {None})
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        settings: Optional[Dict[str, Any]] = None,
+        window: Optional["Window"] = None,
+        file_name: Optional[str] = None,
+    ):
+        """---."""
+        values = {"tab_size": 4, "syntax": "Packages/Python/Python.sublime-syntax"}
+        values.update(settings or {})
+        super().__init__(text, values["tab_size"])
+
+        self.view_id = next(ids)
+        self.view_settings = Settings(values)
+        self.view_window = window
+        self.path = file_name
+        self.selection = Selection()
+        self.changes = 0
+        # `(command, arguments)` of every command run on the view
+        self.commands: List[tuple] = []
+        # Callbacks notified of edits, such as a `TextChangeListener`
+        self.text_listeners: List[Callable[[List[TextChange]], None]] = []
+
+        self.text_buffer = Buffer()
+        self.text_buffer.view_list.append(self)
+        if window is not None:
+            window.view_list.append(self)
+
+    def id(self) -> int:
+        """---."""
+        return self.view_id
+
+    def buffer_id(self) -> int:
+        """---."""
+        return self.text_buffer.id()
+
+    def buffer(self) -> Buffer:
+        """---."""
+        return self.text_buffer
+
+    def window(self) -> Optional["Window"]:
+        """---."""
+        return self.view_window
+
+    def file_name(self) -> Optional[str]:
+        """---."""
+        return self.path
+
+    def settings(self) -> Settings:  # type: ignore
+        """---."""
+        return self.view_settings
+
+    def sel(self) -> Selection:
+        """---."""
+        return self.selection
+
+    def change_count(self) -> int:
+        """---."""
+        return self.changes
+
+    def is_loading(self) -> bool:
+        """---."""
+        return False
+
+    def scope_name(self, point: int) -> str:
+        """Return the scope of a point. Every point is python source here."""
+        return "source.python "
+
+    def rowcol(self, point: int):
+        """Return the zero based row and column of a point."""
+        row = self.row_of(point)
+        return row, point - self.line_starts[row]
+
+    def text_point(self, row: int, col: int) -> int:
+        """Return the offset of a zero based row and column."""
+        return self.line_starts[row] + col
+
+    def replace_text(self, begin: int, end: int, text: str):
+        """Replace a region of the buffer, and report the change."""
+        self.text = self.text[:begin] + text + self.text[end:]
+
+        # Splice the line starts of the new text in, shifting the following ones
+        first = bisect_right(self.line_starts, begin)
+        last = bisect_right(self.line_starts, end)
+        delta = len(text) - (end - begin)
+        inserted = [
+            begin + index + 1 for index, char in enumerate(text) if char == "\n"
+        ]
+        self.line_starts[first:] = inserted + [
+            start + delta for start in self.line_starts[last:]
+        ]
+
+        self.changes += 1
+        for listener in self.text_listeners:
+            listener([TextChange(begin, end, text)])
+
+    def insert(self, edit: Edit, point: int, text: str) -> int:
+        """---."""
+        self.replace_text(point, point, text)
+        return len(text)
+
+    def erase(self, edit: Edit, region: Region):
+        """---."""
+        self.replace_text(region.begin(), region.end(), "")
+
+    def replace(self, edit: Edit, region: Region, text: str):
+        """---."""
+        self.replace_text(region.begin(), region.end(), text)
+
+    def run_command(self, command: str, args: Optional[Dict[str, Any]] = None):
+        """Record a command. `insert` and `insert_snippet` are not expanded."""
+        self.commands.append((command, args or {}))
+
+    def show_popup(self, content: str, *args, **kwargs):
+        """---."""
+        self.commands.append(("show_popup", {"content": content}))
+
+
+class Window:
+    """A window, holding the data of its project.
+
+    Keyword Arguments:
+        project_data {dict} -- Contents of the project file (default: {None})
+        folders {list} -- Folders open in the window (default: {None})
+    """
+
+    def __init__(
+        self,
+        project_data: Optional[Dict[str, Any]] = None,
+        folders: Optional[List[str]] = None,
+    ):
+        """---."""
+        self.window_id = next(ids)
+        self.data = project_data
+        self.folder_list = list(folders or [])
+        self.view_list: List[View] = []
+        self.panels: Dict[str, View] = {}
+        self.commands: List[tuple] = []
+        window_list.append(self)
+
+    def id(self) -> int:
+        """---."""
+        return self.window_id
+
+    def project_data(self) -> Optional[Dict[str, Any]]:
+        """---."""
+        return self.data
+
+    def set_project_data(self, data: Optional[Dict[str, Any]]):
+        """---."""
+        self.data = data
+
+    def views(self) -> List[View]:
+        """---."""
+        return list(self.view_list)
+
+    def folders(self) -> List[str]:
+        """---."""
+        return list(self.folder_list)
+
+    def active_view(self) -> Optional[View]:
+        """---."""
+        return self.view_list[-1] if self.view_list else None
+
+    def create_output_panel(self, name: str, unlisted: bool = False) -> View:
+        """---."""
+        panel = self.panels.get(name)
+        if panel is None:
+            panel = self.panels[name] = View(settings={"syntax": ""})
+        return panel
+
+    def find_output_panel(self, name: str) -> Optional[View]:
+        """---."""
+        return self.panels.get(name)
+
+    def run_command(self, command: str, args: Optional[Dict[str, Any]] = None):
+        """Record a command."""
+        self.commands.append((command, args or {}))
+
+
+window_list: List[Window] = []
+settings_files: Dict[str, Settings] = {}
+
+
+def load_settings(name: str) -> Settings:
+    """Return the settings file `name`, created empty on first use."""
+    if name not in settings_files:
+        settings_files[name] = Settings()
+
+    return settings_files[name]
+
+
+def platform() -> str:
+    """---."""
+    return "linux"
+
+
+def packages_path() -> str:
+    """---."""
+    return os.path.join(DATA_PATH, "Packages")
+
+
+def cache_path() -> str:
+    """---."""
+    return os.path.join(DATA_PATH, "Cache")
+
+
+def installed_packages_path() -> str:
+    """---."""
+    return os.path.join(DATA_PATH, "Installed Packages")
+
+
+def set_timeout(callback: Callable[[], None], delay: int = 0):
+    """Run a callback right away."""
+    callback()
+
+
+def set_timeout_async(callback: Callable[[], None], delay: int = 0):
+    """Run a callback right away."""
+    callback()
+
+
+def status_message(message: str):
+    """---."""
+
+
+def active_window() -> Optional[Window]:
+    """---."""
+    return window_list[-1] if window_list else None
+
+
+def windows() -> List[Window]:
+    """---."""
+    return list(window_list)
@@ -0,0 +1,72 @@
+"""In-memory stand-in for the `sublime_plugin` module."""
+from . import sublime
+
+
+class Command:
+    """Base of every command."""
+
+    def is_enabled(self, *args, **kwargs) -> bool:
+        """---."""
+        return True
+
+
+class TextCommand(Command):
+    """A command run on a view.
+
+    Arguments:
+        view {sublime.View} -- View the command runs on
+    """
+
+    def __init__(self, view: sublime.View):
+        """---."""
+        self.view = view
+
+
+class WindowCommand(Command):
+    """A command run on a window.
+
+    Arguments:
+        window {sublime.Window} -- Window the command runs on
+    """
+
+    def __init__(self, window: sublime.Window):
+        """---."""
+        self.window = window
+
+
+class ApplicationCommand(Command):
+    """A command run on the application."""
+
+
+class EventListener:
+    """Listener of events of every view and window."""
+
+
+class ViewEventListener:
+    """Listener of the events of a single view.
+
+    Arguments:
+        view {sublime.View} -- View the listener is attached to
+    """
+
+    def __init__(self, view: sublime.View):
+        """---."""
+        self.view = view
+
+
+class TextChangeListener:
+    """Listener of the edits of a buffer."""
+
+    def __init__(self):
+        """---."""
+        self.buffer = None
+
+    def attach(self, buffer: sublime.Buffer):
+        """Start listening to the edits of a buffer."""
+        self.buffer = buffer
+        view = buffer.primary_view()
+        if view is not None:
+            view.text_listeners.append(self.on_text_changed)
+
+    def on_text_changed(self, changes):
+        """---."""
@@ -0,0 +1,63 @@
+"""Common Utilities for the benchmarks."""
+import statistics
+import time
+from typing import Callable, Dict, List
+
+
+def measure(func: Callable, repeat: int = 50, warmup: int = 3) -> Dict[str, float]:
+    """Time repeated calls of `func`.
+
+    Arguments:
+        func {callable} -- Function to time, called without arguments
+
+    Keyword Arguments:
+        repeat {int} -- Number of timed calls (default: {50})
+        warmup {int} -- Number of untimed calls made first (default: {3})
+
+    Returns:
+        dict -- p50, p99 and mean latencies, in milliseconds
+    """
+    for _ in range(warmup):
+        func()
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    return summarize(samples)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize latency samples.
+
+    Arguments:
+        samples {list} -- Latencies, in milliseconds
+
+    Returns:
+        dict -- p50, p99 and mean latencies, in milliseconds
+    """
+    samples = sorted(samples)
+    return {
+        "p50": statistics.median(samples),
+        "p99": samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+        "mean": statistics.mean(samples),
+    }
+
+
+def report(title: str, results: Dict[str, Dict[str, float]]):
+    """Print a table of latencies.
+
+    Arguments:
+        title {str} -- Heading of the table
+        results {dict} -- Latencies by case, as returned by `measure`
+    """
+    print(title)
+    width = max(len(name) for name in results)
+    for name, result in results.items():
+        print(
+            "  {name:<{width}}  p50 {p50:9.3f} ms  p99 {p99:9.3f} ms".format(
+                name=name, width=width, **result
+            )
+        )
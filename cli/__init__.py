@@ -0,0 +1 @@
+"""Command line tools running the docstring generator outside of Sublime Text."""
@@ -0,0 +1,44 @@
+"""Command line entry point.
+
+Run from the directory containing this package, e.g.
+
+    python -m DocblockrPython.cli fill src/ --jobs 16
+    python -m DocblockrPython.cli coverage src/ --fail-under 80
+    python -m DocblockrPython.cli drift src/ --format json
+    python -m DocblockrPython.cli lsp --formatter google
+    python -m DocblockrPython.cli worker --cache-dir path/to/cache
+"""
+import argparse
+import sys
+
+from . import coverage, drift, fill, lsp, worker
+
+
+def main(argv=None) -> int:
+    """Parse the command line and run the requested command.
+
+    Keyword Arguments:
+        argv {list} -- Command line arguments (default: {None})
+
+    Returns:
+        int -- Process exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m {}".format(__package__),
+        description="Generate python docstrings from the command line.",
+    )
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND")
+    subparsers.required = True
+
+    fill.add_parser(subparsers)
+    coverage.add_parser(subparsers)
+    drift.add_parser(subparsers)
+    lsp.add_parser(subparsers)
+    worker.add_parser(subparsers)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,308 @@
+"""Report the docstring coverage of a tree of python files."""
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from ..parsers.scanner import iter_definitions
+from .fill import DEFAULT_CACHE_DIR, iter_python_files, job_count
+
+# Bumped whenever the cached results of a file would change
+CACHE_VERSION = "1"
+
+
+class FileCoverage(NamedTuple):
+    """Docstring coverage of a single file.
+
+    Attributes:
+        path {str} -- Path of the file
+        digest {str} -- Hash of the file contents, the key of its cached result
+        total {int} -- Number of modules, classes and functions
+        missing {list} -- `(kind, row, name)` of each undocumented definition,
+            with one based rows
+        error {str} -- Reason the file was skipped, if any
+    """
+
+    path: str
+    digest: str = ""
+    total: int = 0
+    missing: Tuple[Tuple[str, int, str], ...] = ()
+    error: Optional[str] = None
+
+
+def content_digest(raw: bytes, *options: str) -> str:
+    """Hash the contents of a file.
+
+    Arguments:
+        raw {bytes} -- Contents of the file
+        *options {str} -- Anything else the cached result depends on
+
+    Returns:
+        str -- Hex digest, which also depends on `CACHE_VERSION`
+    """
+    key = "\0".join((CACHE_VERSION,) + options).encode()
+    return hashlib.sha256(key + b"\0" + raw).hexdigest()
+
+
+def scan_source(path: str, raw: bytes) -> FileCoverage:
+    """Find the undocumented definitions of a source.
+
+    Arguments:
+        path {str} -- Path of the file
+        raw {bytes} -- Contents of the file
+
+    Returns:
+        FileCoverage -- Coverage of the file
+    """
+    digest = content_digest(raw)
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError as error:
+        return FileCoverage(path, digest, error=str(error))
+
+    lines = text.replace("\r\n", "\n").split("\n")
+    total = 0
+    missing = []
+    for definition in iter_definitions(lines):
+        total += 1
+        if not definition.documented:
+            missing.append((definition.kind, definition.row + 1, definition.name))
+
+    return FileCoverage(path, digest, total, tuple(missing))
+
+
+def scan_file(path: str) -> FileCoverage:
+    """Find the undocumented definitions of a file.
+
+    Arguments:
+        path {str} -- Path of the python file
+
+    Returns:
+        FileCoverage -- Coverage of the file
+    """
+    try:
+        with open(path, "rb") as file:
+            raw = file.read()
+    except OSError as error:
+        return FileCoverage(path, error=str(error))
+
+    return scan_source(path, raw)
+
+
+def cache_path(cache_dir: str, digest: str, command: str = "coverage") -> str:
+    """Return the path of the cached result of a file.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+        digest {str} -- Hash of the file contents
+
+    Keyword Arguments:
+        command {str} -- Command the result belongs to (default: {"coverage"})
+
+    Returns:
+        str -- Path of the cache entry
+    """
+    return os.path.join(cache_dir, command, digest[:2], digest + ".json")
+
+
+def read_cache(cache_dir: str, path: str, digest: str) -> Optional[FileCoverage]:
+    """Load the cached coverage of a file.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+        path {str} -- Path of the file
+        digest {str} -- Hash of the file contents
+
+    Returns:
+        FileCoverage -- Cached coverage, or None if there is none
+    """
+    try:
+        with open(cache_path(cache_dir, digest), encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    missing = tuple((kind, row, name) for kind, row, name in cached["missing"])
+    return FileCoverage(path, digest, cached["total"], missing)
+
+
+def write_cache(cache_dir: str, result: FileCoverage):
+    """Cache the coverage of a file, under the hash of its contents.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+        result {FileCoverage} -- Coverage of the file
+    """
+    target = cache_path(cache_dir, result.digest)
+    temporary = "{}.{}.tmp".format(target, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"total": result.total, "missing": result.missing}, file)
+        # atomic, so concurrent runs never read a partial entry
+        os.replace(temporary, target)
+    except OSError:
+        pass
+
+
+def collect(paths: List[str], jobs: Optional[int], cache_dir: Optional[str]):
+    """Measure the coverage of files, reusing the cached results.
+
+    Arguments:
+        paths {list} -- Paths of the python files
+        jobs {int} -- Number of worker processes, None for one per CPU
+        cache_dir {str} -- Cache directory, None to disable the cache
+
+    Returns:
+        list, int -- Coverage of each file in order, and the number of files
+            read from the cache
+    """
+    results: Dict[str, FileCoverage] = {}
+    pending = []
+    for path in paths:
+        cached = None
+        if cache_dir is not None:
+            try:
+                with open(path, "rb") as file:
+                    cached = read_cache(cache_dir, path, content_digest(file.read()))
+            except OSError:
+                pass
+
+        if cached is None:
+            pending.append(path)
+        else:
+            results[path] = cached
+    hits = len(results)
+
+    if jobs == 1 or len(pending) < 2:
+        scanned = list(map(scan_file, pending))
+    else:
+        workers = jobs or os.cpu_count() or 1
+        chunksize = max(1, min(64, len(pending) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scanned = list(executor.map(scan_file, pending, chunksize=chunksize))
+
+    for result in scanned:
+        results[result.path] = result
+        if cache_dir is not None and result.digest and not result.error:
+            write_cache(cache_dir, result)
+
+    return [results[path] for path in paths], hits
+
+
+def percent(documented: int, total: int) -> float:
+    """Return the share of documented definitions, 100 when there are none."""
+    return 100.0 * documented / total if total else 100.0
+
+
+def run(args) -> int:
+    """Run the `coverage` command.
+
+    Arguments:
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        int -- Process exit code
+    """
+    started = time.perf_counter()
+    paths = list(iter_python_files(args.paths))
+    cache_dir = None if args.no_cache else args.cache_dir
+    results, hits = collect(paths, args.jobs, cache_dir)
+    elapsed = time.perf_counter() - started
+
+    # `(documented, total)` by directory
+    packages: Dict[str, List[int]] = {}
+    total = 0
+    missing = 0
+    errors = 0
+    for result in results:
+        if result.error:
+            errors += 1
+            print("{}: skipped ({})".format(result.path, result.error), file=sys.stderr)
+            continue
+
+        total += result.total
+        missing += len(result.missing)
+        package = packages.setdefault(os.path.dirname(result.path) or ".", [0, 0])
+        package[0] += result.total - len(result.missing)
+        package[1] += result.total
+
+        if result.missing:
+            print(
+                "{}: {} of {} undocumented".format(
+                    result.path, len(result.missing), result.total
+                )
+            )
+            if args.verbose:
+                for kind, row, name in result.missing:
+                    print("  {}:{}: {} {}".format(result.path, row, kind, name))
+
+    if packages:
+        print()
+        width = max(len(name) for name in packages)
+        for name, (documented, count) in sorted(packages.items()):
+            print(
+                "{:<{width}}  {:>5}/{:<5} {:6.1f}%".format(
+                    name, documented, count, percent(documented, count), width=width
+                )
+            )
+
+    coverage = percent(total - missing, total)
+    print(
+        "Coverage {:.1f}% ({} of {} definitions documented) in {} file(s), "
+        "{} cached, in {:.2f}s".format(
+            coverage, total - missing, total, len(paths), hits, elapsed
+        )
+    )
+
+    if errors:
+        return 1
+    if args.fail_under is not None and coverage < args.fail_under:
+        print("Coverage is below {}%".format(args.fail_under), file=sys.stderr)
+        return 2
+
+    return 0
+
+
+def add_parser(subparsers):
+    """Register the `coverage` command.
+
+    Arguments:
+        subparsers {argparse._SubParsersAction} -- Command registry
+    """
+    parser = subparsers.add_parser(
+        "coverage", help="report undocumented modules, classes and functions"
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATHS")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=job_count,
+        default=None,
+        help="number of worker processes, 0 for one per CPU (default: 0)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="directory of the cached results (default: {})".format(DEFAULT_CACHE_DIR),
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="neither read nor write the cache"
+    )
+    parser.add_argument(
+        "--fail-under",
+        type=float,
+        default=None,
+        metavar="PERCENT",
+        help="exit with status 2 when the total coverage is lower",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="list every undocumented definition",
+    )
+    parser.set_defaults(func=run)
@@ -0,0 +1,447 @@
+"""Report the docstrings that no longer match the functions they document.
+
+The docstring of every function is read back in the configured style, and
+compared with what the formatter would write for the function's definition:
+
+- `argument-missing` and `argument-extra`, for the arguments the docstring
+  lacks, or documents but the function no longer takes,
+- `raise-missing`, for the exceptions raised but not documented,
+- `returns-missing` and `yields-missing`, for a value returned or yielded but
+  not documented, and `returns-not-yields` or `yields-not-returns` when the
+  docstring documents the other one.
+
+Only what the parser can see is reported: documented exceptions, return values
+and yields missing from the definition may come from a callee or an abstract
+method. Docstrings without any section are not checked, as a summary alone
+does not claim to list anything.
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from ..formatters.update import read_documented
+from ..formatters.utils import get_setting
+from ..parsers.cache import ParseCache, shared_cache
+from ..parsers.docstrings import Docstring
+from ..parsers.index import DefinitionIndex
+from ..parsers.scanner import DEFINITION_NAME
+from ..parsers.utils import get_parser_class
+from .coverage import DEFAULT_CACHE_DIR, cache_path, content_digest
+from .fill import iter_python_files, job_count
+
+# Bumped whenever the findings for a file would change
+CACHE_VERSION = "1"
+
+MESSAGES = {
+    "argument-missing": "argument `{}` is not documented",
+    "argument-extra": "documents `{}`, which is not an argument",
+    "raise-missing": "raises `{}`, which is not documented",
+    "returns-missing": "returns a value, which is not documented",
+    "yields-missing": "yields values, which are not documented",
+    "returns-not-yields": "documents a returned value, but yields",
+    "yields-not-returns": "documents yielded values, but returns",
+}
+
+# `(row, function, code, subject)`, with one based rows
+Finding = Tuple[int, str, str, str]
+
+
+class FileDrift(NamedTuple):
+    """Docstring drift of a single file.
+
+    Attributes:
+        path {str} -- Path of the file
+        digest {str} -- Hash of the file contents and options, the key of its
+            cached result
+        checked {int} -- Number of docstrings compared with their function
+        findings {list} -- `(row, function, code, subject)` of each difference
+        error {str} -- Reason the file was skipped, if any
+    """
+
+    path: str
+    digest: str = ""
+    checked: int = 0
+    findings: Tuple[Finding, ...] = ()
+    error: Optional[str] = None
+
+
+def argument_names(sections: List[Tuple[str, Any]]) -> List[str]:
+    """Return the names of the arguments of parsed sections, stars removed."""
+    for section, attributes in sections:
+        if section == "arguments":
+            items = attributes.arguments + attributes.keyword_arguments
+            return [item.name.lstrip("*") for item in items]
+
+    return []
+
+
+def compare(docstring: Docstring, sections: List[Tuple[str, Any]]):
+    """Find where a docstring differs from the sections of its function.
+
+    Arguments:
+        docstring {Docstring} -- The docstring, read back
+        sections {list} -- Sections the formatter writes for the function
+
+    Returns:
+        list -- `(code, subject)` of each difference
+    """
+    wanted = dict(sections)
+    written = dict(docstring.sections)
+    differences = []
+
+    if "arguments" in wanted or "arguments" in written:
+        expected = argument_names(sections)
+        documented = argument_names(docstring.sections)
+        differences.extend(
+            ("argument-missing", name) for name in expected if name not in documented
+        )
+        differences.extend(
+            ("argument-extra", name) for name in documented if name not in expected
+        )
+
+    differences.extend(
+        ("raise-missing", name)
+        for name in wanted.get("raises", ())
+        if name not in written.get("raises", ())
+    )
+
+    for result, other in (("returns", "yields"), ("yields", "returns")):
+        if result not in wanted or result in written:
+            continue
+        if other in written:
+            differences.append(("{}-not-{}".format(other, result), other))
+        else:
+            differences.append(("{}-missing".format(result), result))
+
+    return differences
+
+
+def scan_source(
+    path: str,
+    raw: bytes,
+    style: str,
+    parser_name: Optional[str],
+    tab_size: int,
+    cache: Optional[ParseCache] = None,
+) -> FileDrift:
+    """Compare the docstring of every function of a source with its definition.
+
+    Arguments:
+        path {str} -- Path of the file
+        raw {bytes} -- Contents of the file
+        style {str} -- Name of the formatter the docstrings are written with
+        parser_name {str} -- Name of the parser engine
+        tab_size {int} -- Width of an indentation level
+
+    Keyword Arguments:
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Returns:
+        FileDrift -- Drift of the file
+    """
+    digest = file_digest(raw, style, parser_name, tab_size)
+    try:
+        text = raw.decode("utf-8").replace("\r\n", "\n")
+    except UnicodeDecodeError as error:
+        return FileDrift(path, digest, error=str(error))
+
+    parser_class = get_parser_class(parser_name)
+    checked = 0
+    findings = []
+    row = 1
+    position = 0
+    for entry in DefinitionIndex(text, tab_size).entries:
+        row += text.count("\n", position, entry.start)
+        position = entry.start
+        if (
+            entry.kind != "function"
+            or entry.docstring is None
+            or entry.docstring[1] is None
+        ):
+            continue
+
+        begin, end = entry.docstring
+        documented = read_documented(
+            parser_class,
+            style,
+            entry.kind,
+            text[entry.start : entry.end],
+            begin - entry.start,
+            end - entry.start,
+            tab_size,
+            sectioned=True,
+            cache=cache,
+        )
+        if documented is None:
+            continue
+
+        checked += 1
+        match = DEFINITION_NAME.match(text[entry.start : entry.header_end].lstrip())
+        name = match.group(2) if match else ""
+        findings.extend(
+            (row, name, code, subject)
+            for code, subject in compare(documented.docstring, documented.sections)
+        )
+
+    return FileDrift(path, digest, checked, tuple(findings))
+
+
+def scan_file(
+    path: str,
+    style: str,
+    parser_name: Optional[str],
+    tab_size: int,
+    cache_dir: Optional[str] = None,
+) -> FileDrift:
+    """Compare the docstring of every function of a file with its definition.
+
+    Arguments:
+        path {str} -- Path of the python file
+        style {str} -- Name of the formatter the docstrings are written with
+        parser_name {str} -- Name of the parser engine
+        tab_size {int} -- Width of an indentation level
+
+    Keyword Arguments:
+        cache_dir {str} -- Directory of the parse cache, None to parse every
+            definition (default: {None})
+
+    Returns:
+        FileDrift -- Drift of the file
+    """
+    try:
+        with open(path, "rb") as file:
+            raw = file.read()
+    except OSError as error:
+        return FileDrift(path, error=str(error))
+
+    cache = shared_cache(cache_dir) if cache_dir is not None else None
+    try:
+        result = scan_source(path, raw, style, parser_name, tab_size, cache)
+    except Exception as error:
+        # a parser bug, reported so that the run fails rather than stopping
+        return FileDrift(path, error="could not parse: {!r}".format(error))
+
+    if cache is not None:
+        cache.flush()
+
+    return result
+
+
+def file_digest(
+    raw: bytes, style: str, parser_name: Optional[str], tab_size: int
+) -> str:
+    """Hash the contents of a file, along with the options of the check."""
+    return content_digest(
+        raw, "drift", CACHE_VERSION, style, parser_name or "regex", str(tab_size)
+    )
+
+
+def read_cache(cache_dir: str, path: str, digest: str) -> Optional[FileDrift]:
+    """Load the cached drift of a file.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+        path {str} -- Path of the file
+        digest {str} -- Hash of the file contents and options
+
+    Returns:
+        FileDrift -- Cached drift, or None if there is none
+    """
+    try:
+        with open(cache_path(cache_dir, digest, "drift"), encoding="utf-8") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    findings = tuple(tuple(finding) for finding in cached["findings"])
+    return FileDrift(path, digest, cached["checked"], findings)  # type: ignore
+
+
+def write_cache(cache_dir: str, result: FileDrift):
+    """Cache the drift of a file, under the hash of its contents and options.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+        result {FileDrift} -- Drift of the file
+    """
+    target = cache_path(cache_dir, result.digest, "drift")
+    temporary = "{}.{}.tmp".format(target, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump({"checked": result.checked, "findings": result.findings}, file)
+        # atomic, so concurrent runs never read a partial entry
+        os.replace(temporary, target)
+    except OSError:
+        pass
+
+
+def collect(paths: List[str], args) -> Tuple[List[FileDrift], int]:
+    """Check files, reusing the cached results of the unchanged ones.
+
+    Changed files still read the parse results of their unchanged functions
+    from the parse cache of the same directory.
+
+    Arguments:
+        paths {list} -- Paths of the python files
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        list, int -- Drift of each file in order, and the number of files
+            read from the cache
+    """
+    cache_dir = None if args.no_cache else args.cache_dir
+    options = (args.formatter, args.parser, args.tab_size)
+
+    results: Dict[str, FileDrift] = {}
+    pending = []
+    for path in paths:
+        cached = None
+        if cache_dir is not None:
+            try:
+                with open(path, "rb") as file:
+                    digest = file_digest(file.read(), *options)
+                cached = read_cache(cache_dir, path, digest)
+            except OSError:
+                pass
+
+        if cached is None:
+            pending.append(path)
+        else:
+            results[path] = cached
+    hits = len(results)
+
+    worker = partial(
+        scan_file,
+        style=args.formatter,
+        parser_name=args.parser,
+        tab_size=args.tab_size,
+        cache_dir=cache_dir,
+    )
+    if args.jobs == 1 or len(pending) < 2:
+        scanned = list(map(worker, pending))
+    else:
+        workers = args.jobs or os.cpu_count() or 1
+        chunksize = max(1, min(64, len(pending) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            scanned = list(executor.map(worker, pending, chunksize=chunksize))
+
+    for result in scanned:
+        results[result.path] = result
+        if cache_dir is not None and result.digest and not result.error:
+            write_cache(cache_dir, result)
+
+    return [results[path] for path in paths], hits
+
+
+def run(args) -> int:
+    """Run the `drift` command.
+
+    Arguments:
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        int -- Process exit code
+    """
+    started = time.perf_counter()
+    paths = list(iter_python_files(args.paths))
+    results, hits = collect(paths, args)
+    elapsed = time.perf_counter() - started
+
+    checked = 0
+    errors = 0
+    findings = []
+    for result in results:
+        if result.error:
+            errors += 1
+            print("{}: skipped ({})".format(result.path, result.error), file=sys.stderr)
+            continue
+
+        checked += result.checked
+        for row, name, code, subject in result.findings:
+            findings.append(
+                {
+                    "path": result.path,
+                    "row": row,
+                    "function": name,
+                    "code": code,
+                    "subject": subject,
+                    "message": MESSAGES[code].format(subject),
+                }
+            )
+
+    if args.format == "json":
+        json.dump(findings, sys.stdout, indent=2)
+        print()
+    else:
+        for finding in findings:
+            print("{path}:{row}: {code} in {function}: {message}".format(**finding))
+
+    # Kept off the standard output of the json format, which is only findings
+    print(
+        "{} finding(s) in {} docstring(s) of {} file(s), {} cached, in {:.2f}s".format(
+            len(findings), checked, len(paths), hits, elapsed
+        ),
+        file=sys.stderr if args.format == "json" else sys.stdout,
+    )
+
+    if errors:
+        return 1
+    if findings:
+        return 2
+
+    return 0
+
+
+def add_parser(subparsers):
+    """Register the `drift` command.
+
+    Arguments:
+        subparsers {argparse._SubParsersAction} -- Command registry
+    """
+    parser = subparsers.add_parser(
+        "drift", help="report docstrings that no longer match their function"
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATHS")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=job_count,
+        default=None,
+        help="number of worker processes, 0 for one per CPU (default: 0)",
+    )
+    parser.add_argument(
+        "-f",
+        "--formatter",
+        default=get_setting("formatter", "google"),
+        help="docstring style: PEP0257, docblock, google, numpy or sphinx",
+    )
+    parser.add_argument(
+        "-p",
+        "--parser",
+        default=get_setting("parser", "regex"),
+        choices=["regex", "ast"],
+        help="engine reading the definitions",
+    )
+    parser.add_argument(
+        "--tab-size", type=int, default=4, help="width of an indentation level"
+    )
+    parser.add_argument(
+        "--format",
+        default="text",
+        choices=["text", "json"],
+        help="`path:row: code in function: message` lines, or a json list",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="directory of the cached results (default: {})".format(DEFAULT_CACHE_DIR),
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="neither read nor write the cache"
+    )
+    parser.set_defaults(func=run)
@@ -0,0 +1,272 @@
+"""Fill in missing docstrings across a tree of python files."""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Iterable, Iterator, NamedTuple, Optional, Tuple
+
+from ..formatters.utils import get_formatter, get_setting, render_docstring
+from ..parsers.cache import ParseCache, shared_cache
+from ..parsers.scanner import insert_docstrings, parse_undocumented
+from ..parsers.utils import get_parser_class
+
+DEFAULT_CACHE_DIR = ".docblockr-cache"
+
+EXCLUDED_DIRECTORIES = {
+    "__pycache__",
+    "node_modules",
+    "venv",
+}
+
+
+class FileResult(NamedTuple):
+    """Outcome of filling a single file.
+
+    Attributes:
+        path {str} -- Path of the file
+        filled {int} -- Number of docstrings added
+        error {str} -- Reason the file was skipped, if any
+    """
+
+    path: str
+    filled: int = 0
+    error: Optional[str] = None
+
+
+def job_count(value: str) -> int:
+    """Read the `--jobs` option: a number of processes, 0 for one per CPU.
+
+    Raises:
+        argparse.ArgumentTypeError -- If the number is negative
+    """
+    jobs = int(value)
+    if jobs < 0:
+        raise argparse.ArgumentTypeError("must be 0 or more, not {}".format(jobs))
+    return jobs
+
+
+def iter_python_files(paths: Iterable[str]) -> Iterator[str]:
+    """Yield every python file in the given files and directories.
+
+    Hidden directories and common virtualenv/cache directories are skipped.
+
+    Arguments:
+        paths {list} -- Files and directories to search
+
+    Yields:
+        str -- Path of a python file
+    """
+    for path in paths:
+        if os.path.isfile(path):
+            yield path
+            continue
+
+        for root, directories, files in os.walk(path):
+            directories[:] = sorted(
+                directory
+                for directory in directories
+                if not directory.startswith(".")
+                and directory not in EXCLUDED_DIRECTORIES
+            )
+            for name in sorted(files):
+                if name.endswith(".py"):
+                    yield os.path.join(root, name)
+
+
+def fill_source(
+    text: str,
+    formatter_name: str,
+    tab_size=4,
+    parser_name: Optional[str] = None,
+    cache: Optional[ParseCache] = None,
+) -> Tuple[str, int]:
+    """Add a docstring to every undocumented definition of a source.
+
+    Arguments:
+        text {str} -- Python source, using `\\n` line endings
+        formatter_name {str} -- Name of the formatter to render with
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        parser_name {str} -- Name of the parser engine (default: {None})
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Returns:
+        str, int -- The updated source and the number of docstrings added
+    """
+    formatter = get_formatter(formatter_name)()
+    parser = get_parser_class(parser_name)()
+    parser.cache = cache
+    docstrings = [
+        (definition, render_docstring(formatter, parsed, definition, tab_size))
+        for definition, parsed in parse_undocumented(text, parser, tab_size)
+    ]
+
+    return insert_docstrings(text, docstrings), len(docstrings)
+
+
+def fill_file(
+    path: str,
+    formatter_name: str,
+    tab_size=4,
+    dry_run=False,
+    parser_name=None,
+    cache_dir: Optional[str] = None,
+):
+    """Add the missing docstrings of a single file, in place.
+
+    Arguments:
+        path {str} -- Path of the python file
+        formatter_name {str} -- Name of the formatter to render with
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        dry_run {bool} -- Only count the missing docstrings (default: {False})
+        parser_name {str} -- Name of the parser engine (default: {None})
+        cache_dir {str} -- Directory of the parse cache, None to parse every
+            definition (default: {None})
+
+    Returns:
+        FileResult -- Outcome for this file
+    """
+    try:
+        with open(path, "rb") as file:
+            raw = file.read()
+        source = raw.decode("utf-8")
+    except (OSError, UnicodeDecodeError) as error:
+        return FileResult(path, error=str(error))
+
+    newline = "\r\n" if "\r\n" in source else "\n"
+    cache = shared_cache(cache_dir) if cache_dir is not None else None
+    try:
+        text, filled = fill_source(
+            source.replace("\r\n", "\n"), formatter_name, tab_size, parser_name, cache
+        )
+    except Exception as error:
+        # a parser bug, reported so that the run fails rather than stopping
+        return FileResult(path, error="could not parse: {!r}".format(error))
+
+    if cache is not None:
+        cache.flush()
+
+    if not filled:
+        return FileResult(path)
+
+    # Never write a file we cannot vouch for
+    try:
+        compile(text, path, "exec", dont_inherit=True)
+    except (SyntaxError, ValueError) as error:
+        return FileResult(path, error="result is not valid python: {}".format(error))
+
+    if not dry_run:
+        with open(path, "wb") as file:
+            file.write(text.replace("\n", newline).encode("utf-8"))
+
+    return FileResult(path, filled)
+
+
+def run(args) -> int:
+    """Run the `fill` command.
+
+    Arguments:
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        int -- Process exit code
+    """
+    started = time.perf_counter()
+    paths = list(iter_python_files(args.paths))
+    worker = partial(
+        fill_file,
+        formatter_name=args.formatter,
+        tab_size=args.tab_size,
+        dry_run=args.dry_run,
+        parser_name=args.parser,
+        cache_dir=None if args.no_cache else args.cache_dir,
+    )
+
+    if args.jobs == 1:
+        results = list(map(worker, paths))
+    else:
+        workers = args.jobs or os.cpu_count() or 1
+        chunksize = max(1, min(64, len(paths) // (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(worker, paths, chunksize=chunksize))
+
+    elapsed = time.perf_counter() - started
+
+    filled = 0
+    changed = 0
+    errors = 0
+    for result in results:
+        if result.error:
+            errors += 1
+            print("{}: skipped ({})".format(result.path, result.error), file=sys.stderr)
+        elif result.filled:
+            filled += result.filled
+            changed += 1
+            if args.verbose:
+                print("{}: {} docstring(s)".format(result.path, result.filled))
+
+    print(
+        "{} {} docstring(s) in {} of {} file(s) in {:.2f}s ({:.0f} files/sec)".format(
+            "Missing" if args.dry_run else "Added",
+            filled,
+            changed,
+            len(paths),
+            elapsed,
+            len(paths) / elapsed if elapsed else 0,
+        )
+    )
+
+    return 1 if errors else 0
+
+
+def add_parser(subparsers):
+    """Register the `fill` command.
+
+    Arguments:
+        subparsers {argparse._SubParsersAction} -- Command registry
+    """
+    parser = subparsers.add_parser(
+        "fill", help="add docstrings to every undocumented module, class and function"
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATHS")
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=job_count,
+        default=None,
+        help="number of worker processes, 0 for one per CPU (default: 0)",
+    )
+    parser.add_argument(
+        "-f",
+        "--formatter",
+        default=get_setting("formatter", "google"),
+        help="docstring style: PEP0257, docblock, google, numpy or sphinx",
+    )
+    parser.add_argument(
+        "-p",
+        "--parser",
+        default=get_setting("parser", "regex"),
+        choices=["regex", "ast"],
+        help="engine reading the definitions",
+    )
+    parser.add_argument(
+        "--tab-size", type=int, default=4, help="width of an indentation level"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help="directory of the parse cache (default: {})".format(DEFAULT_CACHE_DIR),
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="parse every definition again"
+    )
+    parser.add_argument(
+        "-n", "--dry-run", action="store_true", help="report without writing files"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true")
+    parser.set_defaults(func=run)
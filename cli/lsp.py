@@ -0,0 +1,782 @@
+"""Language server generating docstrings, for editors other than Sublime Text.
+
+Speaks the Language Server Protocol over stdio:
+
+    python -m DocblockrPython.cli lsp --formatter google
+
+Opening a docstring (`\"\"\"`) on the first line of a body offers its
+docstring as a completion, a snippet to tab through as in Sublime Text. Code
+actions add the docstring of the definition under the cursor, or of every
+undocumented definition of the file.
+
+Every open document keeps its text along with its line starts, a definition
+index and a string table. `didChange` edits all of them in place, so requests
+never read the whole document again. Parse results are cached across requests
+by the text of each definition.
+
+With tracing on, through `$/setTrace` or the `trace` of `initialize`, the
+latency of every message is sent as a `$/logTrace` notification. Verbose
+traces also hold the time spent in each phase of the parser.
+"""
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+from ..formatters.base import RenderContext
+from ..formatters.utils import (
+    build_snippet,
+    escape,
+    get_formatter,
+    get_setting,
+    render_docstring,
+    snippet_to_text,
+)
+from ..parsers.buffer import EditableBuffer, Region
+from ..parsers.cache import DATABASE_NAME, ParseCache, sqlite3
+from ..parsers.index import DefinitionIndex, IndexEntry
+from ..parsers.parser import PythonParser, closing_quote
+from ..parsers.scanner import parse_undocumented
+from ..parsers.strings import StringTable
+from ..parsers.utils import get_parser_class
+from ..utils.log import child_logger
+from ..utils.timing import timings
+
+log = child_logger(__name__)
+
+# JSON-RPC error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INTERNAL_ERROR = -32603
+SERVER_NOT_INITIALIZED = -32002
+
+# Values of the protocol
+SYNC_INCREMENTAL = 2
+COMPLETION_KIND_SNIPPET = 15
+FORMAT_PLAIN_TEXT = 1
+FORMAT_SNIPPET = 2
+INSERT_AS_IS = 1
+
+DEFINITION_ACTION = "refactor.rewrite"
+FILE_ACTION = "source.docstrings"
+
+# Text before the cursor of a docstring just opened, as in the keymap
+OPENED_DOCSTRING = re.compile(r"^\s*(\"\"\"|''')\s*$")
+CLOSING_QUOTES = re.compile(r"\s*(\"\"\"|''')\s*$")
+
+
+def read_message(stream: BinaryIO) -> Optional[dict]:
+    """Read a message framed by its `Content-Length` header.
+
+    Arguments:
+        stream {BinaryIO} -- Stream to read from
+
+    Returns:
+        dict -- The message, or None at the end of the stream
+
+    Raises:
+        ValueError -- If the message is not valid json
+    """
+    length = None
+    while True:
+        header = stream.readline()
+        if not header:
+            return None
+
+        header = header.strip()
+        if header:
+            name, _, value = header.decode("ascii").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        elif length is not None:
+            break
+
+    return json.loads(stream.read(length).decode("utf-8"))
+
+
+def write_message(stream: BinaryIO, message: dict):
+    """Write a message, framed by its `Content-Length` header.
+
+    Arguments:
+        stream {BinaryIO} -- Stream to write to
+        message {dict} -- The message
+    """
+    body = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    stream.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+    stream.flush()
+
+
+def normalize(text: str) -> str:
+    """Use `\\n` line endings only, as the parser expects."""
+    return text.replace("\r\n", "\n").replace("\r", "\n")
+
+
+def from_utf16(line: str, units: int) -> int:
+    """Turn a column in UTF-16 code units into an index in a line."""
+    if line.isascii():
+        return min(units, len(line))
+
+    count = 0
+    for index, char in enumerate(line):
+        if count >= units:
+            return index
+        count += 2 if ord(char) > 0xFFFF else 1
+
+    return len(line)
+
+
+def to_utf16(line: str, index: int) -> int:
+    """Turn an index in a line into a column in UTF-16 code units."""
+    if line.isascii():
+        return index
+
+    return index + sum(1 for char in line[:index] if ord(char) > 0xFFFF)
+
+
+class Document:
+    """An open document, kept up to date with the edits of the client.
+
+    The definition index and string table are rescanned where edits touched
+    them only when they are next read, through `refresh`.
+
+    Arguments:
+        text {str} -- Contents of the document
+        version {int} -- Version of the contents
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        utf16 {bool} -- Count columns in UTF-16 code units rather than in
+            characters (default: {True})
+
+    Attributes:
+        buffer {EditableBuffer} -- Text and line starts of the document
+        index {DefinitionIndex} -- Definitions of the document
+        strings {StringTable} -- Triple quoted strings of the document
+        newline {str} -- Line ending the document uses
+    """
+
+    def __init__(self, text: str, version: int, tab_size: int = 4, utf16=True):
+        """---."""
+        self.tab_size = tab_size
+        self.utf16 = utf16
+        self.reset(text, version)
+
+    def reset(self, text: str, version: int):
+        """Replace the whole contents of the document.
+
+        Arguments:
+            text {str} -- Contents of the document
+            version {int} -- Version of the contents
+        """
+        self.version = version
+        self.newline = "\r\n" if "\r\n" in text[: text.find("\n") + 1] else "\n"
+        text = normalize(text)
+        self.buffer = EditableBuffer(text, self.tab_size)
+        self.index = DefinitionIndex(text, self.tab_size, version)
+        self.strings = StringTable(text, version)
+
+    def line_text(self, row: int) -> str:
+        """Return the text of a row, without its line ending."""
+        return self.buffer.substr(self.buffer.line_region(row))
+
+    def offset_at(self, position: Dict[str, int]) -> int:
+        """Turn a position of the protocol into an offset in the text.
+
+        Arguments:
+            position {dict} -- `line` and `character` of the position
+
+        Returns:
+            int -- Offset, clamped to the end of its line
+        """
+        row = position["line"]
+        if row >= len(self.buffer.line_starts):
+            return self.buffer.size()
+
+        region = self.buffer.line_region(row)
+        column = position["character"]
+        if self.utf16:
+            column = from_utf16(self.line_text(row), column)
+
+        return region.begin() + min(column, region.size())
+
+    def position_at(self, offset: int) -> Dict[str, int]:
+        """Turn an offset in the text into a position of the protocol.
+
+        Arguments:
+            offset {int} -- Offset in the text
+
+        Returns:
+            dict -- `line` and `character` of the position
+        """
+        row = self.buffer.row_of(offset)
+        column = offset - self.buffer.line_starts[row]
+        if self.utf16:
+            column = to_utf16(self.line_text(row), column)
+
+        return {"line": row, "character": column}
+
+    def apply_change(self, change: Dict[str, Any], version: int):
+        """Apply a change sent by `didChange`.
+
+        Arguments:
+            change {dict} -- The replaced `range` and its new `text`, or only
+                the new text of the whole document
+            version {int} -- Version of the document after the change
+        """
+        if change.get("range") is None:
+            self.reset(change["text"], version)
+            return
+
+        begin = self.offset_at(change["range"]["start"])
+        end = self.offset_at(change["range"]["end"])
+        text = normalize(change["text"])
+
+        self.buffer.replace(begin, end, text)
+        for table in (self.index, self.strings):
+            table.apply_change(begin, end, len(text))
+            table.version = version
+        self.version = version
+
+    def refresh(self):
+        """Rescan the definitions and strings edited since the last refresh."""
+        self.index.refresh(self.buffer)
+        self.strings.refresh(self.buffer)
+
+    def entry_at(self, row: int) -> Optional[IndexEntry]:
+        """Return the definition whose definition line is a row, if any."""
+        start = self.buffer.line_starts[row]
+        index = bisect_left(self.index.starts, start)
+        if index < len(self.index.entries) and self.index.starts[index] == start:
+            return self.index.entries[index]
+
+        return None
+
+    def undocumented_at(self, offset: int) -> Optional[IndexEntry]:
+        """Find the undocumented definition whose header holds an offset.
+
+        Arguments:
+            offset {int} -- Offset in the text
+
+        Returns:
+            IndexEntry -- The definition, or None if the offset is not in the
+                decorators or definition lines of an undocumented definition
+        """
+        index = bisect_left(self.index.starts, offset + 1)
+        for entry in reversed(self.index.entries[max(0, index - 2) : index + 1]):
+            start = entry.decorators[0] if entry.decorators else entry.start
+            if (
+                start <= offset <= entry.header_end
+                and entry.docstring is None
+                and entry.body_indent is not None
+            ):
+                return entry
+
+        return None
+
+
+class LanguageServer:
+    """Handle the messages of a client, over a pair of streams.
+
+    Keyword Arguments:
+        formatter {str} -- Name of the formatter (default: {"google"})
+        parser {str} -- Name of the parser engine (default: {"regex"})
+        tab_size {int} -- Width of an indentation level (default: {4})
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Attributes:
+        documents {dict} -- Open documents, by uri
+        trace {str} -- `off`, `messages` or `verbose`
+    """
+
+    def __init__(
+        self,
+        formatter: str = "google",
+        parser: str = "regex",
+        tab_size: int = 4,
+        cache: Optional[ParseCache] = None,
+    ):
+        """---."""
+        self.formatter_name = formatter
+        self.parser_name = parser
+        self.tab_size = tab_size
+        self.cache = cache
+        self.documents: Dict[str, Document] = {}
+        self.trace = "off"
+        self.utf16 = True
+        self.snippets = True
+        self.resolve_edits = False
+        self.initialized = False
+        self.shut_down = False
+        self.exited = False
+        self.writer: Optional[BinaryIO] = None
+
+        self.handlers: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "initialize": self.initialize,
+            "initialized": lambda params: None,
+            "shutdown": self.shutdown,
+            "exit": self.exit,
+            "$/setTrace": self.set_trace,
+            "textDocument/didOpen": self.did_open,
+            "textDocument/didChange": self.did_change,
+            "textDocument/didClose": self.did_close,
+            "textDocument/completion": self.completion,
+            "textDocument/codeAction": self.code_action,
+            "codeAction/resolve": self.resolve_code_action,
+        }
+
+    def serve(self, reader: BinaryIO, writer: BinaryIO) -> int:
+        """Handle messages until the client exits, or closes the stream.
+
+        Arguments:
+            reader {BinaryIO} -- Stream of the messages of the client
+            writer {BinaryIO} -- Stream of the messages to the client
+
+        Returns:
+            int -- Process exit code, 0 if the client shut the server down
+        """
+        self.writer = writer
+        while not self.exited:
+            try:
+                message = read_message(reader)
+            except ValueError as error:
+                self.send({"id": None, "error": error_of(PARSE_ERROR, str(error))})
+                continue
+
+            if message is None:
+                break
+            self.handle(message)
+
+        return 0 if self.shut_down else 1
+
+    def send(self, message: dict):
+        """Send a message to the client."""
+        assert self.writer is not None
+        write_message(self.writer, dict(message, jsonrpc="2.0"))
+
+    def notify(self, method: str, params: Any):
+        """Send a notification to the client."""
+        self.send({"method": method, "params": params})
+
+    def handle(self, message: dict):
+        """Handle a request or notification, and answer requests.
+
+        Arguments:
+            message {dict} -- The message
+        """
+        method = message.get("method")
+        if method is None:
+            # A response, but the server sends no requests
+            return
+
+        request = "id" in message
+        handler = self.handlers.get(method)
+        error = None
+        if not self.initialized and method not in ("initialize", "exit"):
+            error = error_of(SERVER_NOT_INITIALIZED, "not initialized")
+        elif self.shut_down and method != "exit":
+            error = error_of(INVALID_REQUEST, "shut down")
+        elif handler is None:
+            error = error_of(METHOD_NOT_FOUND, method)
+
+        if error is not None:
+            if request:
+                self.send({"id": message["id"], "error": error})
+            return
+
+        verbose = self.trace == "verbose"
+        if verbose:
+            timings.enabled = True
+            timings.clear()
+        started = time.perf_counter()
+
+        result = None
+        try:
+            result = handler(message.get("params") or {})
+        except Exception as exception:
+            log.exception("could not handle %s", method)
+            error = error_of(INTERNAL_ERROR, str(exception))
+
+        latency = (time.perf_counter() - started) * 1000
+        timings.enabled = False
+
+        if request:
+            if error is None:
+                self.send({"id": message["id"], "result": result})
+            else:
+                self.send({"id": message["id"], "error": error})
+
+        if self.trace != "off" and not self.exited:
+            trace = {"message": "{} in {:.3f} ms".format(method, latency)}
+            if verbose:
+                trace["verbose"] = ", ".join(
+                    "{} {:.3f} ms".format(phase, sum(samples))
+                    for phase, samples in timings.samples.items()
+                )
+            self.notify("$/logTrace", trace)
+
+    def initialize(self, params: Dict[str, Any]) -> dict:
+        """Read the capabilities and options of the client.
+
+        `initializationOptions` may hold a `formatter`, a `parser` and a
+        `tab_size`, in place of the command line options.
+        """
+        options = params.get("initializationOptions") or {}
+        self.formatter_name = options.get("formatter", self.formatter_name)
+        self.parser_name = options.get("parser", self.parser_name)
+        self.tab_size = options.get("tab_size", self.tab_size)
+        self.trace = params.get("trace") or "off"
+
+        capabilities = params.get("capabilities") or {}
+        general = capabilities.get("general") or {}
+        self.utf16 = "utf-32" not in (general.get("positionEncodings") or ())
+        text_document = capabilities.get("textDocument") or {}
+        completion = text_document.get("completion") or {}
+        self.snippets = bool(
+            (completion.get("completionItem") or {}).get("snippetSupport")
+        )
+        code_action = text_document.get("codeAction") or {}
+        resolved = (code_action.get("resolveSupport") or {}).get("properties") or ()
+        self.resolve_edits = "edit" in resolved
+
+        self.initialized = True
+        return {
+            "capabilities": {
+                "positionEncoding": "utf-16" if self.utf16 else "utf-32",
+                "textDocumentSync": {
+                    "openClose": True,
+                    "change": SYNC_INCREMENTAL,
+                },
+                "completionProvider": {"triggerCharacters": ['"', "'"]},
+                "codeActionProvider": {
+                    "codeActionKinds": [DEFINITION_ACTION, FILE_ACTION],
+                    "resolveProvider": True,
+                },
+            },
+            "serverInfo": {"name": "docblockr-python"},
+        }
+
+    def shutdown(self, params: Dict[str, Any]):
+        """Stop handling anything but `exit`."""
+        self.shut_down = True
+
+    def exit(self, params: Dict[str, Any]):
+        """Stop serving."""
+        self.exited = True
+
+    def set_trace(self, params: Dict[str, Any]):
+        """Turn tracing on or off."""
+        self.trace = params.get("value") or "off"
+
+    def did_open(self, params: Dict[str, Any]):
+        """Index an opened document."""
+        item = params["textDocument"]
+        self.documents[item["uri"]] = Document(
+            item["text"], item.get("version", 0), self.tab_size, self.utf16
+        )
+
+    def did_change(self, params: Dict[str, Any]):
+        """Apply the changes of a document, in order."""
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return
+
+        version = params["textDocument"].get("version", document.version)
+        for change in params["contentChanges"]:
+            document.apply_change(change, version)
+
+    def did_close(self, params: Dict[str, Any]):
+        """Forget a closed document."""
+        self.documents.pop(params["textDocument"]["uri"], None)
+
+    def get_parser(self, document: Optional[Document] = None) -> PythonParser:
+        """Return a parser, reading a document through its index if any."""
+        parser = get_parser_class(self.parser_name)()
+        parser.cache = self.cache
+        if document is not None:
+            document.refresh()
+            parser.index = document.index
+            parser.strings = document.strings
+
+        return parser
+
+    def completion(self, params: Dict[str, Any]) -> Optional[dict]:
+        """Offer the docstring of a definition, when one was just opened.
+
+        Returns:
+            dict -- A `CompletionList` of the docstring, or None if the cursor
+                does not follow the opening quotes of a docstring
+        """
+        document = self.documents.get(params["textDocument"]["uri"])
+        if document is None:
+            return None
+
+        buffer = document.buffer
+        position = document.offset_at(params["position"])
+        row = buffer.row_of(position)
+        region = buffer.line_region(row)
+        before = buffer.substr(Region(region.begin(), position))
+        match = OPENED_DOCSTRING.match(before)
+        if match is None:
+            return None
+
+        parser = self.get_parser(document)
+        if parser.is_docstring_closed(buffer, position) is True:
+            return None
+
+        line, contents = parser.read_definition(buffer, position)
+        parsed = parser.parse(line, contents)
+
+        trailing = buffer.substr(Region(position, region.end())).strip()
+        trailing = escape(CLOSING_QUOTES.sub("", trailing))
+        snippet = build_snippet(
+            get_formatter(self.formatter_name)(),
+            parsed,
+            trailing or None,
+            closing_quote(before),
+            RenderContext(),
+        )
+        # Only `$`, `}` and `\` are escaped in the snippets of the protocol
+        snippet = snippet.replace("\\{", "{")
+        if not self.snippets:
+            snippet = snippet_to_text(snippet)
+
+        indent = before[: match.start(1)]
+        unit = "\t" if "\t" in indent else " " * self.tab_size
+        lines = snippet.replace("\t", unit).split("\n")
+        text = match.group(1) + document.newline.join(
+            lines[:1] + [indent + line if line else line for line in lines[1:]]
+        )
+
+        return {
+            "isIncomplete": False,
+            "items": [
+                {
+                    "label": match.group(1),
+                    "kind": COMPLETION_KIND_SNIPPET,
+                    "detail": "{} docstring".format(self.formatter_name),
+                    "filterText": match.group(1),
+                    "preselect": True,
+                    "insertTextFormat": FORMAT_SNIPPET
+                    if self.snippets
+                    else FORMAT_PLAIN_TEXT,
+                    "insertTextMode": INSERT_AS_IS,
+                    "textEdit": {
+                        "range": {
+                            "start": document.position_at(
+                                region.begin() + match.start(1)
+                            ),
+                            "end": document.position_at(region.end()),
+                        },
+                        "newText": text,
+                    },
+                }
+            ],
+        }
+
+    def code_action(self, params: Dict[str, Any]) -> List[dict]:
+        """Offer to add docstrings to the definition under the cursor, or the file.
+
+        The definition must be undocumented, and the cursor on its decorators
+        or definition lines. Edits are left to `codeAction/resolve` when the
+        client supports it.
+
+        Returns:
+            list -- The `CodeAction`s
+        """
+        uri = params["textDocument"]["uri"]
+        document = self.documents.get(uri)
+        if document is None:
+            return []
+        document.refresh()
+
+        only = (params.get("context") or {}).get("only")
+
+        def wanted(kind: str) -> bool:
+            return only is None or any(
+                kind == prefix or kind.startswith(prefix + ".") for prefix in only
+            )
+
+        actions = []
+        if wanted(DEFINITION_ACTION):
+            offset = document.offset_at(params["range"]["start"])
+            entry = document.undocumented_at(offset)
+            if entry is not None:
+                actions.append(
+                    {
+                        "title": "Add docstring",
+                        "kind": DEFINITION_ACTION,
+                        "data": {
+                            "uri": uri,
+                            "version": document.version,
+                            "row": document.buffer.row_of(entry.start),
+                        },
+                    }
+                )
+
+        if wanted(FILE_ACTION):
+            actions.append(
+                {
+                    "title": "Add missing docstrings to the file",
+                    "kind": FILE_ACTION,
+                    "data": {"uri": uri, "version": document.version},
+                }
+            )
+
+        if not self.resolve_edits:
+            actions = [self.resolve_code_action(action) for action in actions]
+
+        return actions
+
+    def resolve_code_action(self, action: Dict[str, Any]) -> dict:
+        """Add the edit of a code action.
+
+        Actions on a document edited since they were offered are left without
+        an edit.
+
+        Returns:
+            dict -- The `CodeAction`, with its `edit`
+        """
+        data = action.get("data") or {}
+        document = self.documents.get(data.get("uri"))
+        if document is None or document.version != data.get("version"):
+            return action
+
+        if "row" in data:
+            edits = self.definition_edits(document, data["row"])
+        else:
+            edits = self.file_edits(document)
+
+        return dict(action, edit={"changes": {data["uri"]: edits}})
+
+    def insertion(self, document: Document, row: int, docstring: str) -> dict:
+        """Make the `TextEdit` inserting a docstring above a row."""
+        position = {"line": row, "character": 0}
+        text = docstring.replace("\n", document.newline) + document.newline
+        return {"range": {"start": position, "end": position}, "newText": text}
+
+    def definition_edits(self, document: Document, row: int) -> List[dict]:
+        """Make the edits adding the docstring of the definition on a row.
+
+        Only the text of the definition is read, from its first decorator to
+        the end of its body.
+        """
+        document.refresh()
+        entry = document.entry_at(row)
+        if entry is None:
+            return []
+
+        start = entry.decorators[0] if entry.decorators else entry.start
+        first = document.buffer.row_of(start)
+        block = document.buffer.substr(Region(start, entry.end))
+
+        formatter = get_formatter(self.formatter_name)()
+        return [
+            self.insertion(
+                document,
+                first + definition.body_row,
+                render_docstring(formatter, parsed, definition, self.tab_size),
+            )
+            for definition, parsed in parse_undocumented(
+                block, self.get_parser(), self.tab_size, {row - first}
+            )
+        ]
+
+    def file_edits(self, document: Document) -> List[dict]:
+        """Make the edits adding every missing docstring of a document."""
+        formatter = get_formatter(self.formatter_name)()
+        return [
+            self.insertion(
+                document,
+                definition.body_row,
+                render_docstring(formatter, parsed, definition, self.tab_size),
+            )
+            for definition, parsed in parse_undocumented(
+                document.buffer.text, self.get_parser(), self.tab_size
+            )
+        ]
+
+
+def error_of(code: int, message: str) -> Dict[str, Any]:
+    """Make the `error` of a response."""
+    return {"code": code, "message": message}
+
+
+def open_cache(cache_dir: Optional[str]) -> Optional[ParseCache]:
+    """Open the parse cache of the server.
+
+    Arguments:
+        cache_dir {str} -- Cache directory, or None for a cache in memory
+
+    Returns:
+        ParseCache -- The cache, or None if it cannot be opened
+    """
+    if sqlite3 is None:
+        return None
+
+    try:
+        if cache_dir is None:
+            return ParseCache(":memory:")
+
+        os.makedirs(cache_dir, exist_ok=True)
+        return ParseCache(os.path.join(cache_dir, DATABASE_NAME))
+    except (OSError, sqlite3.Error) as error:
+        log.warning("could not open the parse cache: %s", error)
+        return None
+
+
+def run(args) -> int:
+    """Run the `lsp` command.
+
+    Arguments:
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        int -- Process exit code
+    """
+    cache = None if args.no_cache else open_cache(args.cache_dir)
+    server = LanguageServer(args.formatter, args.parser, args.tab_size, cache)
+    try:
+        return server.serve(sys.stdin.buffer, sys.stdout.buffer)
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def add_parser(subparsers):
+    """Register the `lsp` command.
+
+    Arguments:
+        subparsers {argparse._SubParsersAction} -- Command registry
+    """
+    parser = subparsers.add_parser(
+        "lsp", help="run a language server over stdio, for other editors"
+    )
+    parser.add_argument(
+        "-f",
+        "--formatter",
+        default=get_setting("formatter", "google"),
+        help="docstring style: PEP0257, docblock, google, numpy or sphinx",
+    )
+    parser.add_argument(
+        "-p",
+        "--parser",
+        default=get_setting("parser", "regex"),
+        choices=["regex", "ast"],
+        help="engine reading the definitions",
+    )
+    parser.add_argument(
+        "--tab-size", type=int, default=4, help="width of an indentation level"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory of the parse cache (default: a cache in memory)",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="parse every definition again"
+    )
+    parser.set_defaults(func=run)
@@ -0,0 +1,447 @@
+"""Worker process running whole-file operations for the plugin.
+
+Documenting or updating every definition of a large file would block the
+plugin host of Sublime Text, which every other plugin shares. With the
+`worker_python` setting, the plugin starts this process on first use instead:
+
+    python -m DocblockrPython.cli worker --cache-dir path/to/cache
+
+and sends it a snapshot of the buffer. Only applying the resulting edits is
+left to the plugin host.
+
+Requests and responses are ascii json objects, one per line, over stdin and
+stdout:
+
+    {"id": 1, "method": "document_file", "params": {"text": "...", ...}}
+    {"id": 1, "result": {"edits": [[begin, end, text], ...]}}
+    {"id": 1, "error": "message"}
+
+The process lives until stdin is closed or a `shutdown` request, so the parse
+cache, the symbol indexes and the in-memory caches of the parser stay warm
+between requests.
+"""
+import json
+import os
+import subprocess
+import sys
+import threading
+from typing import IO, Any, Dict, List, Optional, Tuple, Type
+
+from ..formatters.update import plan_update
+from ..formatters.utils import get_formatter, render_docstring
+from ..parsers.buffer import StringBuffer
+from ..parsers.cache import ParseCache, sqlite3
+from ..parsers.index import DefinitionIndex
+from ..parsers.parser import PythonParser
+from ..parsers.scanner import parse_undocumented
+from ..parsers.symbols import ProjectSymbols, SymbolIndex
+from ..parsers.utils import get_parser_class
+from ..utils.log import child_logger
+from .lsp import open_cache
+
+log = child_logger(__name__)
+
+# `(begin, end, text)` replacing a region of the text an operation was given
+Edit = Tuple[int, int, str]
+
+
+class WorkerError(Exception):
+    """The worker process failed a request, or could not be reached."""
+
+
+def document_edits(
+    text: str, parser: PythonParser, formatter, tab_size=4
+) -> List[Edit]:
+    """Insert a docstring in every undocumented definition of a source.
+
+    Arguments:
+        text {str} -- Python source, using `\\n` line endings
+        parser {PythonParser} -- Parser reading the definitions
+        formatter {formatters.base.Base} -- Formatter instance to render with
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        list -- Insertions, in the order of the text
+    """
+    line_starts = StringBuffer(text, tab_size).line_starts
+    edits: List[Edit] = []
+    for definition, parsed in parse_undocumented(text, parser, tab_size):
+        docstring = render_docstring(formatter, parsed, definition, tab_size)
+        if definition.body_row < len(line_starts):
+            point = line_starts[definition.body_row]
+        else:
+            point = len(text)
+        edits.append((point, point, docstring + "\n"))
+
+    return edits
+
+
+def update_edits(
+    text: str,
+    parser_class: Type[PythonParser],
+    style: str,
+    tab_size=4,
+    cache: Optional[ParseCache] = None,
+    index: Optional[DefinitionIndex] = None,
+) -> List[Edit]:
+    """Update every docstring of a source with at least one section.
+
+    Arguments:
+        text {str} -- Python source, using `\\n` line endings
+        parser_class {type} -- Parser engine
+        style {str} -- Name of the formatter the docstrings are written with
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        cache {ParseCache} -- Cache of parse results (default: {None})
+        index {DefinitionIndex} -- Up to date index of the source, built
+            again if None (default: {None})
+
+    Returns:
+        list -- Replaced lines of the docstrings, in the order of the text
+    """
+    buffer = StringBuffer(text, tab_size)
+    line_starts = buffer.line_starts
+    if index is None:
+        index = DefinitionIndex(text, tab_size)
+
+    edits: List[Edit] = []
+    for entry in index.entries:
+        if entry.docstring is None or entry.docstring[1] is None:
+            continue
+
+        begin, end = entry.docstring
+        patch = plan_update(
+            parser_class,
+            style,
+            entry.kind,
+            text[entry.start : entry.end],
+            begin - entry.start,
+            end - entry.start,
+            tab_size,
+            sectioned=True,
+            cache=cache,
+        )
+        if patch is None:
+            continue
+
+        row = buffer.row_of(begin)
+        start = line_starts[row + patch.begin]
+        if row + patch.end < len(line_starts):
+            stop, ending = line_starts[row + patch.end], "\n"
+        else:
+            # the docstring closes on the last line, without a trailing newline
+            stop, ending = len(text), ""
+
+        replacement = ""
+        if patch.lines:
+            replacement = "\n".join(line for _, line in patch.lines) + ending
+        edits.append((start, stop, replacement))
+
+    return edits
+
+
+class Worker:
+    """Handle the requests of the plugin, keeping caches between them.
+
+    Keyword Arguments:
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Attributes:
+        symbol_indexes {dict} -- Symbol indexes opened so far, by path
+    """
+
+    def __init__(self, cache: Optional[ParseCache] = None):
+        """---."""
+        self.cache = cache
+        self.symbol_indexes: Dict[str, SymbolIndex] = {}
+        self.shut_down = False
+        self.methods = {
+            "document_file": self.document_file,
+            "update_docstrings": self.update_docstrings,
+            "shutdown": self.shutdown,
+        }
+
+    def serve(self, reader: IO[str], writer: IO[str]) -> int:
+        """Answer requests until stdin is closed, or a `shutdown` request.
+
+        Arguments:
+            reader {IO} -- Stream of the requests
+            writer {IO} -- Stream of the responses
+
+        Returns:
+            int -- Process exit code
+        """
+        for line in reader:
+            if not line.strip():
+                continue
+
+            response = self.handle(line)
+            writer.write(json.dumps(response) + "\n")
+            writer.flush()
+            if self.shut_down:
+                break
+
+        self.close()
+        return 0
+
+    def handle(self, line: str) -> Dict[str, Any]:
+        """Run a request.
+
+        Arguments:
+            line {str} -- The request, as json
+
+        Returns:
+            dict -- The response, with the `result` or `error` of the request
+        """
+        try:
+            request = json.loads(line)
+        except ValueError as error:
+            return {"id": None, "error": "invalid request: {}".format(error)}
+
+        method = self.methods.get(request.get("method"))
+        if method is None:
+            error = "unknown method: {}".format(request.get("method"))
+            return {"id": request.get("id"), "error": error}
+
+        try:
+            result = method(request.get("params") or {})
+        except Exception as exception:
+            log.exception("could not run %s", request.get("method"))
+            return {"id": request.get("id"), "error": str(exception)}
+
+        return {"id": request.get("id"), "result": result}
+
+    def get_symbols(self, params: Dict[str, Any]) -> Optional[ProjectSymbols]:
+        """Return the symbols of the project of a request, if it has an index.
+
+        Arguments:
+            params {dict} -- Parameters of the request, with the path of the
+                symbol index as `symbols` and of the file as `file_name`
+
+        Returns:
+            ProjectSymbols -- The symbols, or None without an index
+        """
+        path = params.get("symbols")
+        if not path or sqlite3 is None:
+            return None
+
+        index = self.symbol_indexes.get(path)
+        if index is None:
+            try:
+                index = self.symbol_indexes[path] = SymbolIndex(path)
+            except sqlite3.Error as error:
+                log.warning("could not open the symbol index: %s", error)
+                return None
+
+        return ProjectSymbols(index, params.get("file_name"))
+
+    def document_file(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Insert a docstring in every undocumented definition of a buffer.
+
+        Arguments:
+            params {dict} -- `text`, `formatter`, `parser`, `tab_size`, and
+                `symbols` and `file_name` when the project is indexed
+
+        Returns:
+            dict -- The `edits` of the buffer
+        """
+        parser = get_parser_class(params.get("parser"))()
+        parser.cache = self.cache
+        parser.symbols = self.get_symbols(params)
+        formatter = get_formatter(params["formatter"])()
+        edits = document_edits(
+            params["text"], parser, formatter, params.get("tab_size", 4)
+        )
+
+        return {"edits": edits}
+
+    def update_docstrings(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Update every docstring of a buffer with at least one section.
+
+        Arguments:
+            params {dict} -- `text`, `formatter`, `parser` and `tab_size`
+
+        Returns:
+            dict -- The `edits` of the buffer
+        """
+        edits = update_edits(
+            params["text"],
+            get_parser_class(params.get("parser")),
+            params["formatter"],
+            params.get("tab_size", 4),
+            self.cache,
+        )
+
+        return {"edits": edits}
+
+    def shutdown(self, params: Dict[str, Any]):
+        """Stop once the response is sent."""
+        self.shut_down = True
+
+    def close(self):
+        """Close the caches."""
+        for index in self.symbol_indexes.values():
+            index.close()
+        self.symbol_indexes.clear()
+
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
+
+
+class WorkerClient:
+    """Send requests to a worker process, started on the first request.
+
+    A worker that exits, or cannot be read, is started again on the next
+    request.
+
+    Arguments:
+        command {list} -- Command line of the worker process
+
+    Keyword Arguments:
+        cwd {str} -- Directory to start it in (default: {None})
+    """
+
+    def __init__(self, command: List[str], cwd: Optional[str] = None):
+        """---."""
+        self.command = command
+        self.cwd = cwd
+        self.process: Optional[subprocess.Popen] = None
+        self.requests = 0
+        # Requests may come from several threads, and are answered in order
+        self.lock = threading.Lock()
+
+    def start(self) -> subprocess.Popen:
+        """Start the worker process, unless it is running.
+
+        Raises:
+            WorkerError -- If the process cannot be started
+
+        Returns:
+            subprocess.Popen -- The process
+        """
+        if self.process is not None and self.process.poll() is None:
+            return self.process
+
+        # No console window pops up on Windows
+        flags = getattr(subprocess, "CREATE_NO_WINDOW", 0) if os.name == "nt" else 0
+        try:
+            self.process = subprocess.Popen(
+                self.command,
+                cwd=self.cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True,
+                creationflags=flags,
+            )
+        except OSError as error:
+            raise WorkerError("could not start the worker: {}".format(error))
+
+        log.debug("started the worker %s", self.process.pid)
+        return self.process
+
+    def request(self, method: str, params: Dict[str, Any]) -> Any:
+        """Run a request in the worker, and wait for its result.
+
+        Arguments:
+            method {str} -- Name of the request
+            params {dict} -- Parameters of the request
+
+        Raises:
+            WorkerError -- If the worker failed the request, or exited
+
+        Returns:
+            Any -- Result of the request
+        """
+        with self.lock:
+            process = self.start()
+            assert process.stdin is not None and process.stdout is not None
+
+            self.requests += 1
+            request = {"id": self.requests, "method": method, "params": params}
+            try:
+                process.stdin.write(json.dumps(request) + "\n")
+                process.stdin.flush()
+                while True:
+                    line = process.stdout.readline()
+                    if not line:
+                        raise WorkerError("the worker exited")
+
+                    response = json.loads(line)
+                    if response.get("id") == self.requests:
+                        break
+            except (OSError, ValueError, WorkerError) as error:
+                self.stop()
+                raise WorkerError(str(error))
+
+        if "error" in response:
+            raise WorkerError(response["error"])
+
+        return response.get("result")
+
+    def stop(self):
+        """Stop the worker process, if it is running."""
+        process, self.process = self.process, None
+        if process is None:
+            return
+
+        try:
+            # The worker stops once stdin is closed
+            if process.stdin is not None:
+                process.stdin.close()
+            process.wait(timeout=1)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+        finally:
+            if process.stdout is not None:
+                process.stdout.close()
+
+    def close(self):
+        """Stop the worker process, for good."""
+        with self.lock:
+            self.stop()
+
+
+def run(args) -> int:
+    """Run the `worker` command.
+
+    Arguments:
+        args {argparse.Namespace} -- Parsed command line arguments
+
+    Returns:
+        int -- Process exit code
+    """
+    cache = None if args.no_cache else open_cache(args.cache_dir)
+    if cache is not None:
+        cache.max_size = int(args.cache_size * 1024 * 1024)
+    return Worker(cache).serve(sys.stdin, sys.stdout)
+
+
+def add_parser(subparsers):
+    """Register the `worker` command.
+
+    Arguments:
+        subparsers {argparse._SubParsersAction} -- Command registry
+    """
+    parser = subparsers.add_parser(
+        "worker", help="run whole-file operations for the plugin, over stdio"
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory of the parse cache (default: a cache in memory)",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=32,
+        help="size of the parse cache, in megabytes",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="parse every definition again"
+    )
+    parser.set_defaults(func=run)
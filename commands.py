@@ -10,16 +10,41 @@ import re
 import sublime
 import sublime_plugin
 
-from typing import Optional
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
-from .utils.consts import PACKAGE_NAME
+from .cli.worker import Edit, WorkerError, document_edits, update_edits
 from .utils.log import child_logger
-from .formatters.utils import get_formatter, get_setting
-from .parsers.parser import PythonParser, get_parser
+from .utils.timing import timed, timings
+from .formatters.base import RenderContext
+from .formatters.update import DocstringPatch, plan_update
+from .formatters.utils import (
+    ResolvedSettings,
+    build_snippet,
+    escape,
+    get_setting,
+    resolve_settings,
+)
+from .listeners import (
+    build_index,
+    get_index,
+    get_parse_cache,
+    get_string_table,
+    get_symbols,
+    get_worker,
+    is_python,
+)
+from .parsers.parser import PythonParser, closing_quote
+from .parsers.utils import get_parser, get_parser_class
 
 
 log = child_logger(__name__)
 
+TIMINGS_PANEL = "docblockr_python_timings"
+
+# Definitions with at least this many characters are parsed on the async thread
+ASYNC_CONTENTS_SIZE = 8192
+
 
 def write(view, string):
     """Write a string to the view as a snippet.
@@ -32,23 +57,64 @@ def write(view, string):
     view.run_command("insert_snippet", {"contents": string})
 
 
-def escape(string):
-    r"""Escape the special characters.
+def apply_edits(view: sublime.View, edit, edits: Sequence[Edit]):
+    """Apply the edits of a whole-file operation to a view.
 
-    Escapes characters that are also in snippet tab fields so that inserting into the view
-    doesn't accidentally create another tabbable field
     Arguments:
-        string {String} -- String to be excaped
+        view {sublime.View} -- View the operation read
+        edit {sublime.edit} -- Sublime Edit buffer
+        edits {list} -- `(begin, end, text)` of each edit, in the order of the
+            text
+    """
+    # Bottom up, so that the regions above each edit keep their offsets
+    for begin, end, text in reversed(edits):
+        view.replace(edit, sublime.Region(begin, end), text)
 
-    Examples:
-        >>> escape('function $test() {}')
-        'function \$test() \{\}'
 
-    Returns:
-        {String} String with escaped characters
+def run_in_worker(
+    view: sublime.View,
+    method: str,
+    params: Dict[str, Any],
+    fallback: Callable[[], List[Edit]],
+    message: str,
+) -> bool:
+    """Run a whole-file operation in the worker process, if there is one.
+
+    The worker reads a snapshot of the buffer on the async thread, and its
+    edits are applied by `docblockr_python_apply_edits` on the main thread.
+    If the worker fails, the operation runs on the async thread instead.
+
+    Arguments:
+        view {sublime.View} -- View to edit
+        method {str} -- Request of the worker
+        params {dict} -- Parameters of the request, with the snapshot
+        fallback {callable} -- Make the edits without the worker
+        message {str} -- Status message, formatted with the number of edits
 
+    Returns:
+        bool -- False if there is no worker, and the caller must run the
+            operation itself
     """
-    return string.replace("$", r"\$").replace("{", r"\{").replace("}", r"\}")
+    worker = get_worker()
+    if worker is None:
+        return False
+
+    change_count = view.change_count()
+
+    def job():
+        try:
+            edits = worker.request(method, params)["edits"]
+        except WorkerError as error:
+            log.warning("the worker could not run %s: %s", method, error)
+            edits = fallback()
+
+        args = {"edits": edits, "change_count": change_count, "message": message}
+        sublime.set_timeout(
+            lambda: view.run_command("docblockr_python_apply_edits", args)
+        )
+
+    sublime.set_timeout_async(job)
+    return True
 
 
 class DocblockrPythonCommand(sublime_plugin.TextCommand):
@@ -63,23 +129,26 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
         position        {Integer}
         trailing_rgn    {String}
         trailing_string {String}
-        settings        {String}
+        closing_string  {String}
+        settings        {ResolvedSettings}
         indent_spaces   {String}
         parser          {Object}
         line            {String}
         contents        {String}
+        generation      {Integer}
     """
 
     position = 0
     trailing_rgn = ""
     trailing_string = ""
-    settings = ""
+    closing_string = '"""'
+    settings: Optional[ResolvedSettings] = None
     indent_spaces = ""
     parser: Optional[PythonParser] = None
     line = ""
     contents = ""
     view_settings = None
-    project_settings = None
+    generation = 0
 
     def run(self, edit):
         """Sublime Command Entrypoint.
@@ -87,11 +156,18 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
         Entrypoint for the Sublime Text Command. Outputs the result of the parsing to
         the view.
 
+        The definition is read here, but large definitions are parsed and
+        rendered on the async thread. Their snippet is written back on the main
+        thread, in place of the trailing text, unless the command ran again,
+        the buffer changed or the cursor moved in the meantime. The trailing
+        text is then left alone.
+
         Arguments:
             edit {sublime.edit} -- Sublime Edit buffer
         """
         assert self.parser is not None
 
+        timings.enabled = get_setting("record_timings", False) is True
         self.initialize(self.view)
 
         # If this docstring is already closed, then generate a new line
@@ -99,9 +175,43 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
             write(self.view, "\n")
             return
 
-        self.view.erase(edit, self.trailing_rgn)
+        # Any job of a previous run is stale from now on
+        self.generation += 1
+
+        if len(self.contents) < ASYNC_CONTENTS_SIZE:
+            self.view.erase(edit, self.trailing_rgn)
+            write(self.view, self.render(self.parser, self.line, self.contents))
+            return
+
+        generation = self.generation
+        change_count = self.view.change_count()
+        trailing = self.trailing_rgn
+        parser, line, contents = self.parser, self.line, self.contents
+
+        def job():
+            snippet = self.render(parser, line, contents)
+            sublime.set_timeout(
+                lambda: self.apply(generation, change_count, trailing, snippet)
+            )
+
+        sublime.set_timeout_async(job)
+
+    def render(self, parser: PythonParser, line: str, contents: str) -> str:
+        """Parse a definition and render its snippet.
+
+        Runs on the async thread for large definitions. The settings, trailing
+        string and closing string may then be changed by a newer run, but the
+        snippet of an older run is discarded by `apply` anyway.
 
-        output = self.parser.parse(self.line, self.contents)
+        Arguments:
+            parser {PythonParser} -- Parser of the view
+            line {str} -- Definition line
+            contents {str} -- Contents of the definition
+
+        Returns:
+            str -- sublime text formatted snippet string
+        """
+        output = parser.parse(line, contents)
 
         log.debug("output -> %s", output)
 
@@ -109,8 +219,40 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
 
         log.debug("snippet -> %s", snippet)
 
+        return snippet
+
+    def apply(
+        self,
+        generation: int,
+        change_count: int,
+        trailing: sublime.Region,
+        snippet: str,
+    ):
+        """Write the snippet of a run over its trailing text, unless it is stale.
+
+        Arguments:
+            generation {int} -- Generation of the run
+            change_count {int} -- Change count of the buffer when the run started
+            trailing {sublime.Region} -- Text after the cursor when the run
+                started, which the summary line of the snippet holds
+            snippet {str} -- Snippet rendered by the run
+        """
+        selection = self.view.sel()
+        if (
+            generation != self.generation
+            or change_count != self.view.change_count()
+            or len(selection) != 1
+            or selection[0].end() != trailing.begin()
+        ):
+            log.debug("dropped the stale snippet of run %s", generation)
+            return
+
+        # The snippet replaces the selected trailing text, in the same edit
+        selection.clear()
+        selection.add(trailing)
         write(self.view, snippet)
 
+    @timed("initialize")
     def initialize(self, view: sublime.View):
         """Set up the command's settings.
 
@@ -122,38 +264,39 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
             view {sublime.View} -- The view to be edited
         """
         self.view_settings = view.settings()
-
-        project_settings = (view.window().project_data() or {}).get("settings", {})
-        self.project_settings = project_settings.get(PACKAGE_NAME, {})
+        self.settings = resolve_settings(view.window())
 
         position = view.sel()[0].end()
 
+        line_rgn = view.line(position)
+        self.closing_string = closing_quote(
+            view.substr(sublime.Region(line_rgn.begin(), position))
+        )
+
         # trailing characters are put inside the body of the comment
-        self.trailing_rgn = sublime.Region(position, view.line(position).end())
+        self.trailing_rgn = sublime.Region(position, line_rgn.end())
         self.trailing_string = view.substr(self.trailing_rgn).strip()
         # drop trailing '"""'
         self.trailing_string = escape(
             re.sub(r'\s*("""|\'\'\')\s*$', "", self.trailing_string)
         )
 
-        self.parser = get_parser(view)
+        self.parser = get_parser(view, self.settings.parser)
 
         log.debug("get the parser -> %s", self.parser)
 
         if not self.parser:
             return
 
-        # read the previous line
-        self.line, multiline = self.parser.get_definition(view, position)
-        self.contents = self.parser.get_definition_contents(
-            view, view.line(position).end(), multiline
-        )
+        self.parser.index = get_index(view)
+        self.parser.strings = get_string_table(view)
+        self.parser.symbols = get_symbols(view)
+        self.parser.cache = get_parse_cache()
 
-        if self.line and re.match(r"^\s*async\s+def", self.line):
-            log.debug("the function is asynchronous")
-            self.line = re.sub(r"async\s+", "", self.line)
-            self.contents = re.sub(r"async\s+", "", self.contents)
+        # read the previous line
+        self.line, self.contents = self.parser.read_definition(view, position)
 
+    @timed("create_snippet")
     def create_snippet(self, parsed_attributes):
         """Format a Sublime Text snippet syntax string.
 
@@ -161,36 +304,280 @@ class DocblockrPythonCommand(sublime_plugin.TextCommand):
         in the group to create the snippets using the user specified formatter.
 
         Arguments:
-            parsed_attributes {dict} -- key value of attributes groups
+            parsed_attributes {Parsed} -- Output of `PythonParser.parse`
 
         Returns:
             str -- sublime text formatted snippet string
 
         """
-        project_formatter = self.project_settings.get("formatter", None)
-        formatter = get_formatter(project_formatter or get_setting("formatter"))()
+        assert self.settings is not None
+
+        # The summary line has the trailing text, or a placeholder
+        return build_snippet(
+            self.settings.formatter,
+            parsed_attributes,
+            self.trailing_string or None,
+            self.closing_string,
+            RenderContext(),
+        )
+
+
+class DocblockrPythonDocumentFileCommand(sublime_plugin.TextCommand):
+    """Add a docstring to every undocumented definition of the view.
+
+    Every module, class and function missing a docstring is parsed in one pass
+    over the buffer, and the docstrings are inserted in a single edit, which
+    is undone as a whole.
+
+    Extends:
+        sublime_plugin.TextCommand
+    """
+
+    def is_enabled(self):
+        """---."""
+        return is_python(self.view.settings())
+
+    @timed("document_file")
+    def run(self, edit):
+        """Insert the missing docstrings, with placeholder text.
+
+        With a worker process, the docstrings are inserted once it has
+        rendered them.
+
+        Arguments:
+            edit {sublime.edit} -- Sublime Edit buffer
+        """
+        view = self.view
+        settings = resolve_settings(view.window())
+        tab_size = view.settings().get("tab_size", 4)
+        parser = get_parser_class(settings.parser)(view.settings())
+        parser.symbols = get_symbols(view)
+        parser.cache = get_parse_cache()
+
+        text = view.substr(sublime.Region(0, view.size()))
+
+        def fallback():
+            return document_edits(text, parser, settings.formatter, tab_size)
+
+        params = {
+            "text": text,
+            "formatter": settings.formatter.name,
+            "parser": settings.parser,
+            "tab_size": tab_size,
+            "symbols": parser.symbols and parser.symbols.index.path,
+            "file_name": view.file_name(),
+        }
+        if run_in_worker(
+            view, "document_file", params, fallback, "added {} docstring(s)"
+        ):
+            return
+
+        edits = fallback()
+        apply_edits(view, edit, edits)
+
+        log.debug("documented %s definition(s)", len(edits))
+        sublime.status_message(
+            "DocBlockr Python: added {} docstring(s)".format(len(edits))
+        )
+
+
+class DocblockrPythonUpdateDocstringCommand(sublime_plugin.TextCommand):
+    """Update docstrings to match the definitions they document.
+
+    Only the sections that differ from the definition are rewritten, and only
+    the lines between the first and last changed ones are replaced. Plans are
+    cached by the text of each definition, so that running this on every save
+    only parses the definitions edited since the previous run.
+
+    Extends:
+        sublime_plugin.TextCommand
+    """
+
+    def is_enabled(self, all=False, background=True):
+        """---."""
+        return is_python(self.view.settings())
+
+    @timed("update_docstring")
+    def run(self, edit, all=False, background=True):
+        """Update the docstring of the definition holding the cursor.
+
+        New entries are written as a snippet, to tab through what is left to
+        write. With `all`, every docstring of the view with at least one
+        section is updated instead, with placeholder text, by the worker
+        process if there is one.
 
-        # Make sure the summary line has the trailing text, or a placeholder
-        if not self.trailing_string:
-            self.trailing_string = formatter.summary()
+        Arguments:
+            edit {sublime.edit} -- Sublime Edit buffer
 
-        snippet = self.trailing_string + "\n"#formatter.description()
+        Keyword Arguments:
+            all {bool} -- Update every docstring of the view (default: {False})
+            background {bool} -- Let the worker process update every docstring,
+                instead of updating them right away (default: {True})
+        """
+        view = self.view
+        settings = resolve_settings(view.window())
+        tab_size = view.settings().get("tab_size", 4)
+        parser_class = get_parser_class(settings.parser)
+        cache = get_parse_cache()
+        style = settings.formatter.name
+
+        if all:
+            text = view.substr(sublime.Region(0, view.size()))
+
+            def fallback():
+                return update_edits(text, parser_class, style, tab_size, cache)
+
+            params = {
+                "text": text,
+                "formatter": style,
+                "parser": settings.parser,
+                "tab_size": tab_size,
+            }
+            if background and run_in_worker(
+                view, "update_docstrings", params, fallback, "updated {} docstring(s)"
+            ):
+                return
+
+        index = get_index(view)
+        if index is None:
+            build_index(view)
+            index = get_index(view)
+        assert index is not None
+
+        if all:
+            edits = update_edits(text, parser_class, style, tab_size, cache, index)
+            apply_edits(view, edit, edits)
+
+            log.debug("updated %s docstring(s)", len(edits))
+            sublime.status_message(
+                "DocBlockr Python: updated {} docstring(s)".format(len(edits))
+            )
+            return
 
-        sani = False
+        position = view.sel()[0].end()
+        preceding = index.entries[: bisect_right(index.starts, position)]
+        # the innermost definition holding the cursor
+        entries = [entry for entry in preceding if entry.end >= position][-1:]
 
-        for attribute_type, attributes in parsed_attributes:
-            if len(attributes) == 0:
+        patches: List[Tuple[int, DocstringPatch]] = []
+        for entry in entries:
+            if entry.docstring is None or entry.docstring[1] is None:
                 continue
 
-            if sani:
-                snippet += "\n"
+            begin, end = entry.docstring
+            patch = plan_update(
+                parser_class,
+                style,
+                entry.kind,
+                view.substr(sublime.Region(entry.start, entry.end)),
+                begin - entry.start,
+                end - entry.start,
+                tab_size,
+                cache=cache,
+            )
+            if patch is not None:
+                patches.append((view.rowcol(begin)[0], patch))
+
+        # Bottom up, so that the rows above each patch keep their offsets
+        for row, patch in reversed(patches):
+            self.apply(edit, row, patch, patch.fields)
+
+        log.debug("updated %s docstring(s)", len(patches))
+        sublime.status_message(
+            "DocBlockr Python: updated {} docstring(s)".format(len(patches))
+        )
+
+    def apply(self, edit, row: int, patch: DocstringPatch, snippet: bool = False):
+        """Replace the lines of a docstring planned by a patch.
 
-            presni = snippet
-            segment = getattr(formatter, attribute_type)
-            snippet += segment(attributes)
-            if presni == snippet and attribute_type == "arguments":
-                sani = True
+        Arguments:
+            edit {sublime.edit} -- Sublime Edit buffer
+            row {int} -- Row of the opening quotes
+            patch {DocstringPatch} -- Lines to replace
 
-        snippet += self.parser.closing_string
+        Keyword Arguments:
+            snippet {bool} -- Write the new lines as a snippet, leaving the
+                cursor in their first field (default: {False})
+        """
+        view = self.view
+        begin = view.text_point(row + patch.begin, 0)
+        if row + patch.end <= view.rowcol(view.size())[0]:
+            region = sublime.Region(begin, view.text_point(row + patch.end, 0))
+            ending = "\n"
+        else:
+            # the docstring closes on the last line, without a trailing newline
+            region = sublime.Region(begin, view.size())
+            ending = ""
+
+        if not patch.lines:
+            view.erase(edit, region)
+        elif not snippet:
+            text = "\n".join(text for _, text in patch.lines)
+            view.replace(edit, region, text + ending)
+        else:
+            view.erase(edit, region)
+            view.sel().clear()
+            view.sel().add(sublime.Region(begin))
+            write(view, "\n".join(line for line, _ in patch.lines) + ending)
+
+
+class DocblockrPythonApplyEditsCommand(sublime_plugin.TextCommand):
+    """Apply the edits the worker process made on a snapshot of the view.
+
+    The edits are dropped if the buffer changed since the snapshot was taken.
 
-        return snippet
+    Extends:
+        sublime_plugin.TextCommand
+    """
+
+    def run(self, edit, edits, change_count, message):
+        """Apply the edits in a single edit, which is undone as a whole.
+
+        Arguments:
+            edit {sublime.edit} -- Sublime Edit buffer
+            edits {list} -- `[begin, end, text]` of each edit, in the order of
+                the text
+            change_count {int} -- Change count of the buffer in the snapshot
+            message {str} -- Status message, formatted with the number of edits
+        """
+        if self.view.change_count() != change_count:
+            log.debug("dropped %s edit(s) of a stale snapshot", len(edits))
+            sublime.status_message(
+                "DocBlockr Python: the file changed, run the command again"
+            )
+            return
+
+        apply_edits(self.view, edit, edits)
+        sublime.status_message("DocBlockr Python: " + message.format(len(edits)))
+
+
+class DocblockrPythonShowTimingsCommand(sublime_plugin.WindowCommand):
+    """Show the latencies recorded for each phase of the command.
+
+    Latencies are only recorded while the `record_timings` setting is on.
+    `get_definition_contents` includes the time spent in `read_above`.
+
+    Extends:
+        sublime_plugin.WindowCommand
+    """
+
+    def run(self, clear=False):
+        """Print a histogram of each phase to an output panel.
+
+        Keyword Arguments:
+            clear {bool} -- Forget the recorded latencies afterwards
+                (default: {False})
+        """
+        report = timings.histogram()
+        if not timings.enabled:
+            notice = "Timings are off, set `record_timings` to record them.\n\n"
+            report = notice + report
+
+        panel = self.window.create_output_panel(TIMINGS_PANEL)
+        panel.run_command("select_all")
+        panel.run_command("right_delete")
+        panel.run_command("append", {"characters": report})
+        self.window.run_command("show_panel", {"panel": "output." + TIMINGS_PANEL})
+
+        if clear:
+            timings.clear()
@@ -7,76 +7,72 @@ class Pep0257Formatter(Base):
 
     name = "PEP0257"
 
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        return ""
+    def decorators(self, attributes, context):
+        """Write the snippet for a list of decorators."""
 
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        return ""
+    def extends(self, attributes, context):
+        """Write the snippet for a list of extended objects."""
 
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        section = "\nArguments:\n"
+    def arguments(self, attributes, context):
+        """Write the snippet for a list of arguments."""
         template = "\t{name} -- {description}\n"
 
-        for attr in attributes["arguments"]:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
-            )
-
-        if len(attributes["arguments"]) == 0:
-            section = ""
+        if len(attributes.arguments) > 0:
+            context.write("\nArguments:\n")
 
-        section += self.keyword_arguments(attributes["keyword_arguments"])
+        for attr in attributes.arguments:
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                )
+            )
 
-        return section
+        self.keyword_arguments(attributes.keyword_arguments, context)
 
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        section = "\nKeyword arguments:\n"
+    def keyword_arguments(self, attributes, context):
+        """Write the snippet for a list of keyword arguments."""
         template = "\t{name} -- {description} (default {default})\n"
 
         if len(attributes) == 0:
-            return ""
+            return
+
+        context.write("\nKeyword arguments:\n")
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
-                default=self._generate_field("default", attr["default"]),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                    default=context.field("default", attr.default),
+                )
             )
 
-        return section
+    def returns(self, attribute, context):
+        """Write the snippet for a list of return values."""
 
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        return ""
+    def yields(self, attribute, context):
+        """Write the snippet for a list of yielded results."""
 
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        return ""
-
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        section = "\n"
+    def raises(self, attributes, context):
+        """Write the snippet for a list of raiased exceptions."""
+        context.write("\n")
         template = "Raises a {{{attribute}}} ${{{tab_index_1}:[description]}}\n"
 
         for attr in attributes:
-            section += template.format(attribute=attr, tab_index_1=next(self.tab_index))
-
-        return section
+            context.write(
+                template.format(attribute=attr, tab_index_1=context.next_index())
+            )
 
-    def attributes(self, attributes):
-        """Create snippet string for a list of attributes."""
-        section = "\nAttributes:\n"
+    def attributes(self, attributes, context):
+        """Write the snippet for a list of attributes."""
+        context.write("\nAttributes:\n")
         template = "\t{name} -- {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                )
             )
-
-        return section
@@ -1,5 +1,6 @@
 """Base formatter class."""
 from abc import abstractmethod
+from typing import List, Optional
 
 
 def counter():
@@ -17,6 +18,59 @@ def counter():
         yield count
 
 
+class RenderContext:
+    """State of a single snippet rendering.
+
+    Every rendering numbers its snippet fields from 1, and collects its text in
+    a list that is joined once at the end, so rendering is linear in the size
+    of the snippet.
+
+    Attributes:
+        tab_index {generator} -- Numbers of the tabbable fields of the snippet
+        parts {list} -- Text written so far, in order
+    """
+
+    def __init__(self):
+        """---."""
+        self.tab_index = counter()
+        self.parts: List[str] = []
+
+    def next_index(self) -> int:
+        """Return the number of the next tabbable field."""
+        return next(self.tab_index)
+
+    def field(self, name: str, value: Optional[str] = None) -> str:
+        """Make a Sublime Text snippet field.
+
+        If a value is passed and it is not None, it will be returned. Otherwise,
+        this will generate a snippet field in the next tabbable index.
+
+        Arguments:
+            name {str} -- Name of the placeholder text
+
+        Keyword Arguments:
+            value {str} -- Text to replace the field if not None (default: {None})
+
+        Returns:
+            str -- Snippet Field
+        """
+        if value is not None:
+            return value
+
+        return "${{{tab_index}:_{name}_}}".format(
+            tab_index=self.next_index(), name=name
+        )
+
+    def write(self, text: str):
+        """Append text to the snippet."""
+        if text:
+            self.parts.append(text)
+
+    def render(self) -> str:
+        """Return the text written so far."""
+        return "".join(self.parts)
+
+
 class Base:
     """Base Formatter Class.
 
@@ -27,21 +81,20 @@ class Base:
     note that any inheriting class _must_ set the `name` variable if it wants to
     be registered in the registry.
 
-    - _generate_field -- Generates tabbable snippet fields.
     - summary -- Generic summary line.
     - description -- Generic description line.
 
+    Every section method writes its text to the `RenderContext` it is passed,
+    which also numbers the tabbable fields.
+
     Extends:
         metaclass=FormatterMeta
 
     Attributes:
         name {str} -- The name the formatter will be registered under.Default is 'google'.
-        tab_index {generator} -- Provides a simple count generator for convenience
-                                 in making tabbable fields
     """
 
     name: str = "google"
-    tab_index = counter()
 
     def __dict__(self):
         """---."""
@@ -63,108 +116,78 @@ class Base:
         for attr, value in self.__dict__().items():
             yield attr, value
 
-    def _generate_field(self, name, value=None):
-        """Make a Sublime Text snippet field.
-
-        If a value is passed and it is not None, it will be returned. Otherwise,
-        this will generate a snippet field in the next tabbable index.
-
-        Arguments:
-            name {str} -- Name of the placeholder text
-
-        Keyword Arguments:
-            value {str} -- Text to replace the field if not None (default: {None})
-
-        Returns:
-            str -- Snippet Field
-        """
-        if value is not None:
-            return value
-
-        return "${{{tab_index}:_{name}_}}".format(
-            tab_index=next(self.tab_index), name=name
-        )
-
-    def summary(self):
-        """Create snippet string for the summary line."""
-        return "{}".format(self._generate_field("summary"))
+    def summary(self, context: RenderContext):
+        """Write the snippet for the summary line."""
+        context.write(context.field("summary"))
 
-    def description(self):
-        """Create snippet string for the description body."""
-        return "\n\n{}\n".format(self._generate_field("description"))
+    def description(self, context: RenderContext):
+        """Write the snippet for the description body."""
+        context.write("\n\n{}\n".format(context.field("description")))
 
     @abstractmethod
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        return ""
+    def decorators(self, attributes, context: RenderContext):
+        """Write the snippet for a list of decorators."""
 
     @abstractmethod
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        return ""
+    def extends(self, attributes, context: RenderContext):
+        """Write the snippet for a list of extended objects."""
 
     @abstractmethod
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        return ""
+    def arguments(self, attributes, context: RenderContext):
+        """Write the snippet for a list of arguments."""
 
     @abstractmethod
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        return ""
+    def keyword_arguments(self, attributes, context: RenderContext):
+        """Write the snippet for a list of keyword arguments."""
 
     @abstractmethod
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        return ""
+    def returns(self, attribute, context: RenderContext):
+        """Write the snippet for a list of return values."""
 
     @abstractmethod
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        return ""
+    def yields(self, attribute, context: RenderContext):
+        """Write the snippet for a list of yielded results."""
 
     @abstractmethod
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        return ""
+    def raises(self, attributes, context: RenderContext):
+        """Write the snippet for a list of raiased exceptions."""
 
     @abstractmethod
-    def attributes(self, attributes):
-        """Create snippet string for a list of attributes."""
-        return ""
+    def attributes(self, attributes, context: RenderContext):
+        """Write the snippet for a list of attributes."""
 
 
 class BaseFormatter(Base):
     """Documentation Formatter Class."""
 
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        return "{}\n".format(self._generate_field("decorators"))
+    def decorators(self, attributes, context: RenderContext):
+        """Write the snippet for a list of decorators."""
+        context.write("{}\n".format(context.field("decorators")))
 
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        return "{}\n".format(self._generate_field("extends"))
+    def extends(self, attributes, context: RenderContext):
+        """Write the snippet for a list of extended objects."""
+        context.write("{}\n".format(context.field("extends")))
 
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        return "{}\n".format(self._generate_field("arguments"))
+    def arguments(self, attributes, context: RenderContext):
+        """Write the snippet for a list of arguments."""
+        context.write("{}\n".format(context.field("arguments")))
 
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        return "{}\n".format(self._generate_field("keyword arguments"))
+    def keyword_arguments(self, attributes, context: RenderContext):
+        """Write the snippet for a list of keyword arguments."""
+        context.write("{}\n".format(context.field("keyword arguments")))
 
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        return "{}\n".format(self._generate_field("returns"))
+    def returns(self, attribute, context: RenderContext):
+        """Write the snippet for a list of return values."""
+        context.write("{}\n".format(context.field("returns")))
 
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        return "{}\n".format(self._generate_field("yields"))
+    def yields(self, attribute, context: RenderContext):
+        """Write the snippet for a list of yielded results."""
+        context.write("{}\n".format(context.field("yields")))
 
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        return "{}\n".format(self._generate_field("raises"))
+    def raises(self, attributes, context: RenderContext):
+        """Write the snippet for a list of raiased exceptions."""
+        context.write("{}\n".format(context.field("raises")))
 
-    def attributes(self, attributes):
-        """Create snippet string for a list of attributes."""
-        return "{}\n".format(self._generate_field("attributes"))
+    def attributes(self, attributes, context: RenderContext):
+        """Write the snippet for a list of attributes."""
+        context.write("{}\n".format(context.field("attributes")))
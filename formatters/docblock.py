@@ -7,110 +7,106 @@ class DocblockFormatter(Base):
 
     name = "docblock"
 
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        section = "\nDecorators:\n"
+    def decorators(self, attributes, context):
+        """Write the snippet for a list of decorators."""
+        context.write("\nDecorators:\n")
         template = "\t{}\n"
 
         for attr in attributes:
-            section += template.format(attr)
+            context.write(template.format(attr))
 
-        return section
-
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        section = "\nExtends:\n"
+    def extends(self, attributes, context):
+        """Write the snippet for a list of extended objects."""
+        context.write("\nExtends:\n")
         template = "\t{}\n"
 
         for attr in attributes:
-            section += template.format(attr)
-
-        return section
+            context.write(template.format(attr))
 
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        section = "\nArguments:\n"
+    def arguments(self, attributes, context):
+        """Write the snippet for a list of arguments."""
         template = "\t{name} ({type}) -- {description}\n"
 
-        for attr in attributes["arguments"]:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
-                description=self._generate_field("description"),
-            )
-
-        if len(attributes["arguments"]) == 0:
-            section = ""
+        if len(attributes.arguments) > 0:
+            context.write("\nArguments:\n")
 
-        section += self.keyword_arguments(attributes["keyword_arguments"])
+        for attr in attributes.arguments:
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                    description=context.field("description"),
+                )
+            )
 
-        return section
+        self.keyword_arguments(attributes.keyword_arguments, context)
 
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        section = "\nKeyword Arguments:\n"
+    def keyword_arguments(self, attributes, context):
+        """Write the snippet for a list of keyword arguments."""
         template = "\t{name} ({type}) -- {description} (default {default})\n"
 
         if len(attributes) == 0:
-            return ""
+            return
+
+        context.write("\nKeyword Arguments:\n")
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
-                description=self._generate_field("description"),
-                default=self._generate_field("default", attr["default"]),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                    description=context.field("description"),
+                    default=context.field("default", attr.default),
+                )
             )
 
-        return section
-
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        section = "\nReturns:\n"
+    def returns(self, attribute, context):
+        """Write the snippet for a list of return values."""
+        context.write("\nReturns:\n")
         template = "\t{type} -- {description}\n"
 
-        section += template.format(
-            type=self._generate_field("type", attribute["type"]),
-            description=self._generate_field("description"),
+        context.write(
+            template.format(
+                type=context.field("type", attribute.type),
+                description=context.field("description"),
+            )
         )
 
-        return section
-
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        section = "\nYields:\n"
+    def yields(self, attribute, context):
+        """Write the snippet for a list of yielded results."""
+        context.write("\nYields:\n")
         template = "\t{type} -- {description}\n"
 
-        section += template.format(
-            type=self._generate_field("type", attribute["type"]),
-            description=self._generate_field("description"),
+        context.write(
+            template.format(
+                type=context.field("type", attribute.type),
+                description=context.field("description"),
+            )
         )
 
-        return section
-
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        section = "\nRaises:\n"
+    def raises(self, attributes, context):
+        """Write the snippet for a list of raiased exceptions."""
+        context.write("\nRaises:\n")
         template = "\t{name} -- {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr),
+                    description=context.field("description"),
+                )
             )
 
-        return section
-
-    def attributes(self, attributes):
-        """Create snippet string for a list of attributes."""
-        section = "\nAttributes:\n"
+    def attributes(self, attributes, context):
+        """Write the snippet for a list of attributes."""
+        context.write("\nAttributes:\n")
         template = "\t{name} ({type}) -- {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                    description=context.field("description"),
+                )
             )
-
-        return section
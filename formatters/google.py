@@ -7,100 +7,91 @@ class GoogleFormatter(Base):
 
     name = "google"
 
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        return ""
+    def decorators(self, attributes, context):
+        """Write the snippet for a list of decorators."""
 
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        return ""
+    def extends(self, attributes, context):
+        """Write the snippet for a list of extended objects."""
 
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        section = "\nArgs:\n"
+    def arguments(self, attributes, context):
+        """Write the snippet for a list of arguments."""
+        if len(attributes.arguments) == 0 and len(attributes.keyword_arguments) == 0:
+            return
+
+        context.write("\nArgs:\n")
         template = "\t{name} ({type}): {description}\n"
 
-        for attr in attributes["arguments"]:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
-                description=self._generate_field("description"),
+        for attr in attributes.arguments:
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                    description=context.field("description"),
+                )
             )
 
-        section += self.keyword_arguments(attributes["keyword_arguments"])
-
-        if (
-            len(attributes["arguments"]) == 0
-            and len(attributes["keyword_arguments"]) == 0
-        ):
-            section = ""
-
-        return section
+        self.keyword_arguments(attributes.keyword_arguments, context)
 
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        section = ""
+    def keyword_arguments(self, attributes, context):
+        """Write the snippet for a list of keyword arguments."""
         template = "\t{name} ({type}): {description} (default: `{default}`)\n"
 
-        if len(attributes) == 0:
-            return ""
-
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
-                description=self._generate_field("description"),
-                default=self._generate_field("default", attr["default"]),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                    description=context.field("description"),
+                    default=context.field("default", attr.default),
+                )
             )
 
-        return section
-
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        section = "\nReturns:\n"
+    def returns(self, attribute, context):
+        """Write the snippet for a list of return values."""
+        context.write("\nReturns:\n")
         template = "\t{type}: {description}\n"
 
-        section += template.format(
-            description=self._generate_field("description"),
-            type=self._generate_field("type", attribute["type"]),
+        context.write(
+            template.format(
+                description=context.field("description"),
+                type=context.field("type", attribute.type),
+            )
         )
 
-        return section
-
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        section = "\nYields:\n"
+    def yields(self, attribute, context):
+        """Write the snippet for a list of yielded results."""
+        context.write("\nYields:\n")
         template = "\t{description}\n\t{type}\n"
 
-        section += template.format(
-            description=self._generate_field("description"),
-            type=self._generate_field("type", attribute["type"]),
+        context.write(
+            template.format(
+                description=context.field("description"),
+                type=context.field("type", attribute.type),
+            )
         )
 
-        return section
-
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        section = "\nRaises:\n"
+    def raises(self, attributes, context):
+        """Write the snippet for a list of raiased exceptions."""
+        context.write("\nRaises:\n")
         template = "\t{name}: {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr),
+                    description=context.field("description"),
+                )
             )
 
-        return section
-
-    def attributes(self, attributes):
-        """Create snippet string for a list of variables."""
-        section = "\nAttributes:\n"
+    def attributes(self, attributes, context):
+        """Write the snippet for a list of variables."""
+        context.write("\nAttributes:\n")
         template = "\t{name}: {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                )
             )
-
-        return section
@@ -7,103 +7,97 @@ class SphinxFormatter(Base):
 
     name = "sphinx"
 
-    def decorators(self, attributes):
-        """Create snippet string for a list of decorators."""
-        return ""
+    def decorators(self, attributes, context):
+        """Write the snippet for a list of decorators."""
 
-    def extends(self, attributes):
-        """Create snippet string for a list of extended objects."""
-        return ""
+    def extends(self, attributes, context):
+        """Write the snippet for a list of extended objects."""
 
-    def arguments(self, attributes):
-        """Create snippet string for a list of arguments."""
-        section = "\n"
+    def arguments(self, attributes, context):
+        """Write the snippet for a list of arguments."""
+        if len(attributes.arguments) == 0 and len(attributes.keyword_arguments) == 0:
+            return
+
+        context.write("\n")
         template = ":param {name}: {description}\n"
         template += ":type {name_1}: {type}\n"
 
-        for attr in attributes["arguments"]:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
-                name_1=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
+        for attr in attributes.arguments:
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                    name_1=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                )
             )
 
-        section += self.keyword_arguments(attributes["keyword_arguments"])
-
-        if section == "\n":
-            section = ""
-
-        return section
+        self.keyword_arguments(attributes.keyword_arguments, context)
 
-    def keyword_arguments(self, attributes):
-        """Create snippet string for a list of keyword arguments."""
-        section = ""
+    def keyword_arguments(self, attributes, context):
+        """Write the snippet for a list of keyword arguments."""
         template = ":param {name}: {description}, defaults to {default}\n"
         template += ":type {name_1}: {type}, optional\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
-                default=self._generate_field("default", attr["default"]),
-                name_1=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                    default=context.field("default", attr.default),
+                    name_1=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                )
             )
 
-        return section
-
-    def returns(self, attribute):
-        """Create snippet string for a list of return values."""
-        section = ""
+    def returns(self, attribute, context):
+        """Write the snippet for a list of return values."""
         template = ":returns: {description}\n"
         template += ":rtype: {type}\n"
 
-        section += template.format(
-            description=self._generate_field("description"),
-            type=self._generate_field("type", attribute["type"]),
+        context.write(
+            template.format(
+                description=context.field("description"),
+                type=context.field("type", attribute.type),
+            )
         )
 
-        return section
-
-    def yields(self, attribute):
-        """Create snippet string for a list of yielded results."""
-        section = ""
+    def yields(self, attribute, context):
+        """Write the snippet for a list of yielded results."""
         template = ":returns: {description}\n"
         template += ":rtype: {type}\n"
 
-        section += template.format(
-            description=self._generate_field("description"),
-            type=self._generate_field("type", attribute["type"]),
+        context.write(
+            template.format(
+                description=context.field("description"),
+                type=context.field("type", attribute.type),
+            )
         )
 
-        return section
-
-    def raises(self, attributes):
-        """Create snippet string for a list of raiased exceptions."""
-        section = ""
+    def raises(self, attributes, context):
+        """Write the snippet for a list of raiased exceptions."""
         template = ":raises {name}: {description}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr),
-                description=self._generate_field("description"),
+            context.write(
+                template.format(
+                    name=context.field("name", attr),
+                    description=context.field("description"),
+                )
             )
 
-        return section[:-1] + "\n"
-
-    def attributes(self, attributes):
-        """Create snippet string for a list of attributes."""
-        section = "\n"
+    def attributes(self, attributes, context):
+        """Write the snippet for a list of attributes."""
+        context.write("\n")
         template = ":param {name}: {description}\n"
         template += ":type {name_1}: {type}\n"
 
         for attr in attributes:
-            section += template.format(
-                name=self._generate_field("name", attr["name"]),
-                description=self._generate_field("description"),
-                name_1=self._generate_field("name", attr["name"]),
-                type=self._generate_field("type", attr["type"]),
+            context.write(
+                template.format(
+                    name=context.field("name", attr.name),
+                    description=context.field("description"),
+                    name_1=context.field("name", attr.name),
+                    type=context.field("type", attr.type),
+                )
             )
-
-        return section
@@ -0,0 +1,411 @@
+"""Update existing docstrings to match the definitions they document.
+
+The definition is parsed as the editor command parses it for a new docstring,
+and the existing docstring is read back in the configured style. Only the
+sections that differ are rewritten:
+
+- arguments, decorators and extended classes follow the definition: missing
+  entries are added, and entries the definition lost are dropped,
+- raised exceptions, attributes and returned or yielded values are only added,
+  since a docstring may rightly document what the parser cannot see, such as
+  the exceptions raised by a callee or the attributes set in `__init__`.
+
+Sections the parser never finds for a kind of definition are left alone, such
+as the arguments of `__init__` documented by a class.
+
+Entries that are kept keep their lines as written, descriptions included. New
+entries are rendered by the formatter, with snippet fields for what is left to
+write.
+"""
+import re
+from functools import lru_cache
+from typing import Any, List, NamedTuple, Optional, Tuple, Type
+
+from ..parsers.buffer import StringBuffer
+from ..parsers.cache import ParseCache
+from ..parsers.docstrings import Docstring, get_docstring_parser, written_sections
+from ..parsers.parser import PythonParser
+from ..parsers.strings import find_closing
+from ..utils.log import child_logger
+from .base import RenderContext
+from .utils import build_snippet, escape, get_formatter, snippet_to_text
+
+log = child_logger(__name__)
+
+OPENING_QUOTES = re.compile(r"^([ \t]*[rRuU]?)(\"\"\"|''')")
+
+# Order of the sections, as the parser lists them
+SECTION_ORDER = (
+    "decorators",
+    "extends",
+    "arguments",
+    "returns",
+    "yields",
+    "raises",
+    "attributes",
+)
+# Sections whose entries follow the definition, by kind of definition
+FOLLOWED = {"function": ("decorators", "arguments"), "class": ("extends",)}
+# Sections only ever added to
+ADDED = ("raises", "attributes")
+RESULTS = ("returns", "yields")
+
+# A line of the updated docstring, as `(snippet, text)`
+Line = Tuple[str, str]
+
+
+class DocstringPatch(NamedTuple):
+    """Lines replacing part of a docstring.
+
+    Attributes:
+        begin {int} -- First replaced line, the opening quotes being on line 0
+        end {int} -- Line following the replaced ones
+        lines {tuple} -- `(snippet, text)` of each new line. The snippet holds
+            fields for what is left to write, the text their placeholders
+        fields {bool} -- Whether any of the new lines holds a snippet field
+    """
+
+    begin: int
+    end: int
+    lines: Tuple[Line, ...]
+    fields: bool
+
+
+def split_literal(literal: str) -> Optional[Tuple[str, List[str], str]]:
+    """Split a triple quoted string into its quotes and contents.
+
+    Arguments:
+        literal {str} -- Lines of the string, from the beginning of its
+            opening line to the end of its closing line
+
+    Returns:
+        str, list, str -- Text up to the opening quotes, lines of the contents
+            and text from the closing quotes, or None if the string is not a
+            closed triple quoted string
+    """
+    match = OPENING_QUOTES.match(literal)
+    if match is None:
+        return None
+
+    end = find_closing(literal, match.group(2), match.end())
+    if end is None:
+        return None
+
+    closing = end - len(match.group(2))
+    contents = literal[match.end() : closing].split("\n")
+    return literal[: match.end()], contents, literal[closing:]
+
+
+def region_of(docstring: Docstring, section: str) -> Optional[Tuple[int, int]]:
+    """Return the lines spanned by a section, headers included.
+
+    Arguments:
+        docstring {Docstring} -- Parsed docstring
+        section {str} -- Section to look for
+
+    Returns:
+        int, int -- First line of the section and the line following it, or
+            None if the docstring has no such section
+    """
+    rows = list(docstring.header_rows.get(section, ()))
+    for (entry_section, _), entry_rows in docstring.rows.items():
+        if entry_section == section:
+            rows.extend(entry_rows)
+
+    if not rows:
+        return None
+
+    return min(rows), max(rows) + 1
+
+
+def names_of(docstring: Docstring, section: str) -> List[str]:
+    """Return the names of the entries of a section, in order."""
+    return [name for key, name in docstring.rows if key == section]
+
+
+def plan_patch(
+    kind: str,
+    old: Docstring,
+    contents: List[str],
+    new: Docstring,
+    rendered: List[Line],
+) -> List[Line]:
+    """Rewrite the sections of a docstring that differ from a rendered one.
+
+    Arguments:
+        kind {str} -- Either `class` or `function`
+        old {Docstring} -- The existing docstring
+        contents {list} -- Lines of the existing docstring, between its quotes
+        new {Docstring} -- Docstring rendered for the definition
+        rendered {list} -- `(snippet, text)` of each line of that docstring,
+            indented as the existing one
+
+    Returns:
+        list -- `(snippet, text)` of each line of the updated contents
+    """
+    old_sections = [section for section, _ in old.sections]
+    new_sections = [section for section, _ in new.sections]
+    # `(begin, end, order, lines)` replacing the lines `begin` to `end`
+    edits: List[Tuple[int, int, int, List[Line]]] = []
+
+    def kept(rows: List[int]) -> List[Line]:
+        return [(escape(contents[row]), contents[row]) for row in rows]
+
+    def fresh(begin: int, end: int) -> List[Line]:
+        """Lines of the rendered docstring, with the kept entries as written."""
+        owners = {
+            row: key
+            for key, rows in new.rows.items()
+            if key in old.rows
+            for row in rows
+        }
+        lines: List[Line] = []
+        for row in range(begin, end):
+            key = owners.get(row)
+            if key is None:
+                lines.append(rendered[row])
+            elif row == new.rows[key][0]:
+                lines.extend(kept(old.rows[key]))
+        return lines
+
+    def anchor(section: str) -> Tuple[int, bool]:
+        """Find where a new section goes, and whether it goes above another."""
+        position = SECTION_ORDER.index(section)
+        before = [
+            region[1]
+            for other in SECTION_ORDER[:position]
+            for region in [region_of(old, other)]
+            if region is not None
+        ]
+        if before:
+            return max(before), False
+
+        after = [
+            region[0]
+            for other in SECTION_ORDER[position + 1 :]
+            for region in [region_of(old, other)]
+            if region is not None
+        ]
+        if after:
+            begin = min(after)
+            # above the blank line separating the following section
+            if begin > 1 and not contents[begin - 1].strip():
+                return begin - 1, False
+            return begin, True
+
+        last = max(row for row, line in enumerate(contents) if line.strip() or not row)
+        return last + 1, False
+
+    for order, section in enumerate(new_sections):
+        begin, end = region_of(new, section) or (0, 0)
+        old_region = region_of(old, section)
+
+        if section in RESULTS and any(other in old_sections for other in RESULTS):
+            continue
+
+        if old_region is None:
+            # with the blank line the formatter writes above the section
+            spaced = begin > 1 and not rendered[begin - 1][1].strip()
+            lines = fresh(begin - 1 if spaced else begin, end)
+            position, above = anchor(section)
+            if spaced and above:
+                lines.append(("", ""))
+            edits.append((position, position, order, lines))
+
+        elif section in ADDED:
+            documented = names_of(old, section)
+            lines = [
+                rendered[row]
+                for name in names_of(new, section)
+                if name not in documented
+                for row in new.rows[(section, name)]
+            ]
+            if lines:
+                edits.append((old_region[1], old_region[1], order, lines))
+
+        elif names_of(new, section) != names_of(old, section):
+            edits.append((old_region[0], old_region[1], order, fresh(begin, end)))
+
+    for section in old_sections:
+        if section in new_sections or section not in FOLLOWED.get(kind, ()):
+            continue
+
+        begin, end = region_of(old, section) or (0, 0)
+        if begin > 1 and not contents[begin - 1].strip():
+            begin -= 1
+        edits.append((begin, end, len(new_sections), []))
+
+    lines: List[Line] = []
+    position = 0
+    for begin, end, _, replacement in sorted(edits):
+        lines.extend(kept(list(range(position, max(position, begin)))))
+        lines.extend(replacement)
+        position = max(position, end)
+    lines.extend(kept(list(range(position, len(contents)))))
+
+    return lines
+
+
+class DocumentedDefinition(NamedTuple):
+    """A definition and its docstring, read back.
+
+    Attributes:
+        indent {str} -- Indentation of the docstring
+        prefix {str} -- Text of the opening line, up to the end of the quotes
+        contents {list} -- Lines of the docstring, between its quotes
+        suffix {str} -- Text of the closing line, from the closing quotes on
+        docstring {Docstring} -- The docstring, read in the style it is written
+        sections {list} -- Sections of the definition the style writes down
+    """
+
+    indent: str
+    prefix: str
+    contents: List[str]
+    suffix: str
+    docstring: Docstring
+    sections: List[Tuple[str, Any]]
+
+
+def read_documented(
+    parser_class: Type[PythonParser],
+    style: str,
+    kind: str,
+    block: str,
+    begin: int,
+    end: int,
+    tab_size: int = 4,
+    sectioned: bool = False,
+    cache: Optional[ParseCache] = None,
+) -> Optional[DocumentedDefinition]:
+    """Read a definition, and its docstring in a given style.
+
+    Arguments:
+        parser_class {type} -- Parser engine
+        style {str} -- Name of the formatter the docstring is written with
+        kind {str} -- Either `class` or `function`
+        block {str} -- Text of the definition, from its definition line to
+            the end of its body
+        begin {int} -- Offset of the docstring in the block
+        end {int} -- Offset of the end of the closing line of the docstring
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        sectioned {bool} -- Skip docstrings without any section, before the
+            definition is parsed (default: {False})
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Returns:
+        DocumentedDefinition -- The definition and its docstring, or None if
+            the docstring does not stand on its own lines
+    """
+    start = block.rfind("\n", 0, begin) + 1
+    indent = block[start:begin]
+    split = split_literal(block[start:end])
+    if indent.strip() or split is None:
+        return None
+    prefix, contents, suffix = split
+
+    docstring = get_docstring_parser(style)().parse("\n".join(contents), kind)
+    if sectioned and not docstring.sections:
+        return None
+
+    # Read the definition as if its docstring was just opened
+    parser = parser_class()
+    parser.cache = cache
+    buffer = StringBuffer(block[:start] + indent + '"""' + block[end:], tab_size)
+    line, definition = parser.read_definition(buffer, start + len(indent) + 3)
+    parsed = parser.parse(line, definition)
+
+    return DocumentedDefinition(
+        indent, prefix, contents, suffix, docstring, written_sections(style, parsed)
+    )
+
+
+@lru_cache(maxsize=1024)
+def plan_update(
+    parser_class: Type[PythonParser],
+    style: str,
+    kind: str,
+    block: str,
+    begin: int,
+    end: int,
+    tab_size: int = 4,
+    sectioned: bool = False,
+    cache: Optional[ParseCache] = None,
+) -> Optional[DocstringPatch]:
+    """Plan the update of the docstring of a definition.
+
+    Plans are cached by the text of the definition, so running this on every
+    definition of a file only parses the definitions edited since. The cache
+    is cleared whenever the settings change.
+
+    Arguments:
+        parser_class {type} -- Parser engine
+        style {str} -- Name of the formatter the docstring is written with
+        kind {str} -- Either `class` or `function`
+        block {str} -- Text of the definition, from its definition line to
+            the end of its body
+        begin {int} -- Offset of the docstring in the block
+        end {int} -- Offset of the end of the closing line of the docstring
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        sectioned {bool} -- Leave docstrings without any section alone
+            (default: {False})
+        cache {ParseCache} -- Cache of parse results (default: {None})
+
+    Returns:
+        DocstringPatch -- Lines to replace, counted from the opening quotes,
+            or None if the docstring is up to date
+    """
+    documented = read_documented(
+        parser_class, style, kind, block, begin, end, tab_size, sectioned, cache
+    )
+    if documented is None:
+        return None
+    indent, prefix, contents, suffix, old, wanted = documented
+
+    snippet = build_snippet(get_formatter(style)(), wanted, "", "", RenderContext())
+    unit = "\t" if "\t" in indent else " " * tab_size
+    rendered = [
+        (indent + line, snippet_to_text(indent + line)) if line else ("", "")
+        for line in snippet.replace("\t", unit).split("\n")
+    ]
+
+    new = get_docstring_parser(style)().parse(
+        "\n".join(text for _, text in rendered), kind
+    )
+    if new.sections != wanted:
+        log.debug("the %s docstring does not read back: %s", style, wanted)
+        return None
+
+    lines = plan_patch(kind, old, contents, new, rendered)
+
+    # Put the quotes back, on a line of their own if the contents grew past them
+    if len(lines) > len(contents) and lines[-1][1] != contents[-1]:
+        lines.append((escape(indent), indent))
+    lines[0] = (escape(prefix) + lines[0][0], prefix + lines[0][1])
+    lines[-1] = (lines[-1][0] + escape(suffix), lines[-1][1] + suffix)
+
+    original = (prefix + "\n".join(contents) + suffix).split("\n")
+    if [text for _, text in lines] == original:
+        return None
+
+    # Only the lines between the common head and tail are replaced
+    head = 0
+    while head < min(len(lines), len(original)) and lines[head][1] == original[head]:
+        head += 1
+    tail = 0
+    while (
+        tail < min(len(lines), len(original)) - head
+        and lines[-1 - tail][1] == original[-1 - tail]
+    ):
+        tail += 1
+
+    replacement = tuple(lines[head : len(lines) - tail])
+    return DocstringPatch(
+        head,
+        len(original) - tail,
+        replacement,
+        any(snippet != escape(text) for snippet, text in replacement),
+    )
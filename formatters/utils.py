@@ -1,21 +1,53 @@
 """Common Utilities for the default formatters."""
-import sublime
-from typing import Dict, Type
+import re
+from importlib import import_module
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+
+try:
+    import sublime
+except ImportError:  # running outside of Sublime Text, e.g. batch tooling
+    sublime = None
 
 from ..utils.consts import PACKAGE_NAME
 from ..utils.log import child_logger
-from . import base, PEP0257, docblock, google, sphinx, numpy
+from . import base
+
+if TYPE_CHECKING:
+    from ..parsers.scanner import Definition
 
 log = child_logger(__name__)
 
-FORMATTER_DICT: Dict[str, Type[base.Base]] = {
-    "PEP0257": PEP0257.Pep0257Formatter,
-    "docblock": docblock.DocblockFormatter,
-    "google": google.GoogleFormatter,
-    "sphinx": sphinx.SphinxFormatter,
-    "numpy": numpy.NumpyFormatter,
+# Module and class of each formatter. A module is only imported once its
+# formatter is first selected.
+FORMATTER_DICT: Dict[str, Tuple[str, str]] = {
+    "PEP0257": ("PEP0257", "Pep0257Formatter"),
+    "docblock": ("docblock", "DocblockFormatter"),
+    "google": ("google", "GoogleFormatter"),
+    "sphinx": ("sphinx", "SphinxFormatter"),
+    "numpy": ("numpy", "NumpyFormatter"),
 }
 
+# Formatter classes imported so far, by name
+formatter_classes: Dict[str, Type[base.Base]] = {}
+
+
+def load_formatter(name: str) -> Type[base.Base]:
+    """Import the class of a registered formatter.
+
+    Arguments:
+        name {str} -- Friendly name of the formatter, in `FORMATTER_DICT`
+
+    Returns:
+        type -- Class of the formatter
+    """
+    formatter = formatter_classes.get(name)
+    if formatter is None:
+        module_name, class_name = FORMATTER_DICT[name]
+        module = import_module("." + module_name, __package__)
+        formatter = formatter_classes[name] = getattr(module, class_name)
+
+    return formatter
+
 
 def get_formatter(name: str):
     """Return the requested formatter by name from the registry.
@@ -29,28 +61,92 @@ def get_formatter(name: str):
     Returns:
         formatters.base.Base -- Instance of the Base formatter
     """
-    formatter = FORMATTER_DICT.get(name, None)
-
-    if not formatter:
+    if name not in FORMATTER_DICT:
         log.warning(
             "formatter `{}` doesn't exist, defaulting to `Google` formatter.".format(
                 name
             )
         )
 
-        formatter = google.GoogleFormatter
+        name = "google"
+
+    formatter = load_formatter(name)
 
     log.debug("use formatter -> %s", formatter.name)
 
     return formatter
 
 
+# Settings files, loaded and watched once
+settings_files: List["sublime.Settings"] = []
+# Merged values of the settings files, by key. `MISSING` if no file sets a key
+setting_values: Dict[str, Any] = {}
+# Settings resolved for each window, by window id
+window_settings: Dict[int, "ResolvedSettings"] = {}
+
+MISSING = object()
+
+
+def clear_settings_cache():
+    """Forget every cached setting, after a settings file changed.
+
+    The update plans are cached without the settings they were rendered with,
+    so they are forgotten too.
+    """
+    from .update import plan_update  # the update module imports this one
+
+    setting_values.clear()
+    window_settings.clear()
+    plan_update.cache_clear()
+    log.debug("settings changed, cache cleared")
+
+
+def clear_window_settings(window: Optional["sublime.Window"]):
+    """Forget the settings resolved for a window, after its project changed.
+
+    Arguments:
+        window {sublime.Window} -- Window of the project
+    """
+    if window is not None:
+        window_settings.pop(window.id(), None)
+
+
+def load_settings_files() -> List["sublime.Settings"]:
+    """Load the user and OS specific settings files, and watch them for changes.
+
+    Returns:
+        list -- Settings files, in increasing order of precedence
+    """
+    if settings_files:
+        return settings_files
+
+    os_name = {"osx": "OSX", "windows": "Windows"}.get(sublime.platform(), "Linux")
+    for name in (PACKAGE_NAME, "{} ({})".format(PACKAGE_NAME, os_name)):
+        settings = sublime.load_settings(f"{name}.sublime-settings")
+        settings.add_on_change(PACKAGE_NAME, clear_settings_cache)
+        settings_files.append(settings)
+
+    return settings_files
+
+
+def unwatch_settings_files():
+    """Stop watching the settings files, when the plugin is unloaded."""
+    for settings in settings_files:
+        settings.clear_on_change(PACKAGE_NAME)
+
+    settings_files.clear()
+    clear_settings_cache()
+
+
 def get_setting(key, default=None):
     """Get the passed setting from the aggregated settings files.
 
     Merges up settings as specified in Sublime's docs.
     https://www.sublimetext.com/docs/3/settings.html
 
+    The merged value is kept until one of the settings files changes, so
+    only the first lookup of a key reads the settings files.
+
     Arguments:
         key {str} -- String of the key to get
 
@@ -60,21 +156,179 @@ def get_setting(key, default=None):
     Returns:
         {str} or {None} -- value of the setting
     """
-    settings = sublime.load_settings(f"{PACKAGE_NAME}.sublime-settings")
-    os_specific_settings = {}
+    if sublime is None:
+        return default
 
-    os_name = sublime.platform()
-    if os_name == "osx":
-        os_specific_settings = sublime.load_settings(
-            f"{PACKAGE_NAME} (OSX).sublime-settings"
-        )
-    elif os_name == "windows":
-        os_specific_settings = sublime.load_settings(
-            f"{PACKAGE_NAME} (Windows).sublime-settings"
-        )
+    if key not in setting_values:
+        setting_values[key] = MISSING
+        for settings in reversed(load_settings_files()):
+            if settings.has(key):
+                setting_values[key] = settings.get(key)
+                break
+
+    value = setting_values[key]
+    return default if value is MISSING else value
+
+
+class ResolvedSettings:
+    """Settings of a window, with the project settings over the settings files.
+
+    Arguments:
+        project {dict} -- Settings of the package in the window's project
+
+    Attributes:
+        project {dict} -- Settings of the package in the window's project
+        parser {str} -- Name of the parser engine
+        formatter {formatters.base.Base} -- Instance of the formatter to render
+            snippets with
+    """
+
+    def __init__(self, project: Dict[str, Any]):
+        """---."""
+        self.project = project
+        self.parser: Optional[str] = project.get("parser") or get_setting("parser")
+        self.formatter = get_formatter(
+            project.get("formatter") or get_setting("formatter")
+        )()
+
+
+def resolve_settings(window: Optional["sublime.Window"]) -> ResolvedSettings:
+    """Return the settings of a window.
+
+    Settings are resolved once per window, and kept until a settings file or
+    the window's project changes.
+
+    Arguments:
+        window {sublime.Window} -- Window of the view being edited, if any
+
+    Returns:
+        ResolvedSettings -- Settings of the window
+    """
+    if window is None:
+        return ResolvedSettings({})
+
+    settings = window_settings.get(window.id())
+    if settings is None:
+        project = (window.project_data() or {}).get("settings", {})
+        settings = ResolvedSettings(project.get(PACKAGE_NAME, {}))
+        window_settings[window.id()] = settings
+        log.debug("resolved settings of window %s", window.id())
+
+    return settings
+
+
+def build_snippet(
+    formatter,
+    parsed_attributes,
+    summary: Optional[str] = None,
+    closing_string='"""',
+    context: Optional[base.RenderContext] = None,
+):
+    """Format a Sublime Text snippet syntax string.
+
+    Iterates through the list of field groups, and then through each item
+    in the group to create the snippets using the given formatter.
+
+    Arguments:
+        formatter {formatters.base.Base} -- Formatter instance to render with
+        parsed_attributes {list} -- `(attribute type, attributes)` pairs
+
+    Keyword Arguments:
+        summary {str} -- Summary line, or None for a summary snippet field
+            (default: {None})
+        closing_string {str} -- Quotes closing the docstring (default: {'\"\"\"'})
+        context {RenderContext} -- Context to render into, a new one if None
+            (default: {None})
+
+    Returns:
+        str -- sublime text formatted snippet string
+    """
+    context = context or base.RenderContext()
+
+    if summary is None:
+        formatter.summary(context)
     else:
-        os_specific_settings = sublime.load_settings(
-            f"{PACKAGE_NAME} (Linux).sublime-settings"
-        )
+        context.write(summary)
+    context.write("\n")
+
+    sani = False
+
+    for attribute_type, attributes in parsed_attributes:
+        if len(attributes) == 0:
+            continue
+
+        if sani:
+            context.write("\n")
+
+        written = len(context.parts)
+        segment = getattr(formatter, attribute_type)
+        segment(attributes, context)
+        if written == len(context.parts) and attribute_type == "arguments":
+            sani = True
+
+    context.write(closing_string)
+
+    return context.render()
+
+
+def escape(string):
+    r"""Escape the special characters.
+
+    Escapes characters that are also in snippet tab fields so that inserting into the view
+    doesn't accidentally create another tabbable field
+    Arguments:
+        string {String} -- String to be excaped
+
+    Examples:
+        >>> escape('function $test() {}')
+        'function \$test() \{\}'
+
+    Returns:
+        {String} String with escaped characters
+
+    """
+    return string.replace("$", r"\$").replace("{", r"\{").replace("}", r"\}")
+
+
+SNIPPET_FIELD = re.compile(r"\$\{\d+:((?:\\.|[^\\}])*)\}|\$\d+")
+SNIPPET_ESCAPE = re.compile(r"\\([${}])")
+
+
+def snippet_to_text(snippet: str) -> str:
+    """Turn a snippet into plain text by replacing fields with their placeholders.
+
+    Arguments:
+        snippet {str} -- Sublime Text snippet string
+
+    Examples:
+        >>> snippet_to_text(r"${1:_summary_} costs \\$5")
+        '_summary_ costs $5'
+
+    Returns:
+        str -- Text the snippet would insert if no field was edited
+    """
+    text = SNIPPET_FIELD.sub(lambda match: match.group(1) or "", snippet)
+    return SNIPPET_ESCAPE.sub(r"\1", text)
+
+
+def render_docstring(
+    formatter, parsed_attributes, definition: "Definition", tab_size=4
+):
+    """Render a plain text docstring for a definition.
+
+    Arguments:
+        formatter {formatters.base.Base} -- Formatter instance to render with
+        parsed_attributes {list} -- Output of `PythonParser.parse`
+        definition {Definition} -- Definition the docstring belongs to
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        str -- Indented docstring, including its quotes
+    """
+    snippet = build_snippet(formatter, parsed_attributes)
+    unit = "\t" if "\t" in definition.indent else " " * tab_size
+    lines = ('"""' + snippet_to_text(snippet)).replace("\t", unit).split("\n")
 
-    return os_specific_settings.get(key, settings.get(key, default))
+    return "\n".join(definition.indent + line if line else line for line in lines)
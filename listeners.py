@@ -0,0 +1,439 @@
+"""Keep a definition index and string table of every open python buffer.
+
+Both are built when a buffer is loaded, and kept up to date from the changes
+reported to `on_text_changed`, so that the command can find the enclosing
+definition of a docstring, and whether it is closed, without walking the
+buffer.
+
+The symbol index of each window's project is built here too, on the async
+thread, and kept up to date as python files are saved. The parse cache shared
+by every view is opened here as well, and the worker process running
+whole-file operations is started here on first use.
+
+The settings resolved for each window are also dropped here when its project
+changes.
+"""
+import hashlib
+import os
+from typing import Dict, Iterator, Optional, Set, Tuple
+
+import sublime
+import sublime_plugin
+
+from .cli.fill import iter_python_files
+from .cli.worker import WorkerClient
+from .formatters.utils import (
+    clear_window_settings,
+    get_setting,
+    unwatch_settings_files,
+)
+from .parsers.cache import DATABASE_NAME, ParseCache
+from .parsers.index import DefinitionIndex
+from .parsers.strings import StringTable
+from .parsers.symbols import ProjectSymbols, SymbolIndex, module_name, sqlite3
+from .utils.log import child_logger, get_logger, stop_logging
+
+log = child_logger(__name__)
+
+# Definition index and string table of each buffer, by buffer id
+indexes: Dict[int, DefinitionIndex] = {}
+string_tables: Dict[int, StringTable] = {}
+
+# Symbol index of each window's project, with the folders it covers, by window id
+symbol_indexes: Dict[int, Tuple[Tuple[str, ...], SymbolIndex]] = {}
+# Windows whose project is being indexed
+indexing: Set[int] = set()
+
+# Cache of parse results, once opened
+parse_cache: Optional[ParseCache] = None
+# Whether a flush of the parse cache is waiting on the async thread
+flush_scheduled = False
+# Delay of that flush, in milliseconds: by then, the command asking for the
+# cache has put its results
+FLUSH_DELAY = 500
+
+# Client of the worker process, while `worker_python` is set
+worker: Optional[WorkerClient] = None
+
+
+def plugin_loaded():
+    """---."""
+    get_logger()
+
+
+def plugin_unloaded():
+    """---."""
+    unwatch_settings_files()
+    stop_logging()
+
+    for _, index in symbol_indexes.values():
+        index.close()
+    symbol_indexes.clear()
+
+    global parse_cache, worker
+    if parse_cache is not None:
+        parse_cache.close()
+        parse_cache = None
+
+    if worker is not None:
+        worker.close()
+        worker = None
+
+
+def is_python(settings: sublime.Settings) -> bool:
+    """Check whether a view's syntax is python.
+
+    Arguments:
+        settings {sublime.Settings} -- Settings of the view
+
+    Returns:
+        bool -- True for python views
+    """
+    return "Python" in (settings.get("syntax") or "")
+
+
+def build_index(view: sublime.View):
+    """Index the definitions and strings of a view's buffer from scratch.
+
+    Arguments:
+        view {sublime.View} -- View of the buffer
+    """
+    text = view.substr(sublime.Region(0, view.size()))
+    version = view.change_count()
+
+    index = DefinitionIndex(text, view.settings().get("tab_size", 4), version)
+    indexes[view.buffer_id()] = index
+    string_tables[view.buffer_id()] = StringTable(text, version)
+    log.debug("indexed %s definition(s)", len(index.entries))
+
+
+def get_index(view: sublime.View) -> Optional[DefinitionIndex]:
+    """Return the index of a view's buffer, if it matches the buffer contents.
+
+    Definitions touched by edits since the last call are rescanned first.
+
+    Arguments:
+        view {sublime.View} -- View of the buffer
+
+    Returns:
+        DefinitionIndex -- The index, or None if there is no up to date index
+    """
+    index = indexes.get(view.buffer_id())
+    if index is None or index.version != view.change_count():
+        return None
+
+    index.refresh(view)
+    return index
+
+
+def project_files(folders: Tuple[str, ...]) -> Iterator[Tuple[str, str]]:
+    """Yield the path and module name of every python file of a project.
+
+    Arguments:
+        folders {tuple} -- Folders of the project
+
+    Yields:
+        str, str -- Path of the file, and the dotted name of its module
+    """
+    for folder in folders:
+        for path in iter_python_files([folder]):
+            yield path, module_name(path, folder)
+
+
+def index_project(window: sublime.Window):
+    """Index the symbols of a window's project, on the async thread.
+
+    The index is stored in the cache directory of Sublime Text, one database
+    for each set of folders, so reopening a project only parses the files
+    changed since.
+
+    Arguments:
+        window {sublime.Window} -- Window of the project
+    """
+    window_id = window.id()
+    folders = tuple(window.folders())
+    if window_id in indexing:
+        return
+    indexing.add(window_id)
+
+    def job():
+        try:
+            indexed = symbol_indexes.get(window_id)
+            if indexed is None or indexed[0] != folders:
+                digest = hashlib.sha1("\n".join(folders).encode()).hexdigest()
+                directory = os.path.join(sublime.cache_path(), "DocblockrPython")
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, "symbols-{}.sqlite3".format(digest))
+                indexed = symbol_indexes[window_id] = (folders, SymbolIndex(path))
+
+            indexed[1].update(project_files(folders))
+        except (OSError, sqlite3.Error) as error:
+            log.warning("could not index the symbols of the project: %s", error)
+        finally:
+            indexing.discard(window_id)
+
+    sublime.set_timeout_async(job)
+
+
+def get_symbols(view: sublime.View) -> Optional[ProjectSymbols]:
+    """Return the symbols of a view's project, while `symbol_index` is on.
+
+    Indexing starts on first use, and whenever the folders of the project
+    change. Lookups see the symbols indexed so far.
+
+    Arguments:
+        view {sublime.View} -- View of a file of the project
+
+    Returns:
+        ProjectSymbols -- Symbols seen from the view's file, or None if there
+            is no index of its project yet
+    """
+    window = view.window()
+    if window is None or sqlite3 is None:
+        return None
+    if get_setting("symbol_index", False) is not True or not window.folders():
+        return None
+
+    indexed = symbol_indexes.get(window.id())
+    if indexed is None or indexed[0] != tuple(window.folders()):
+        index_project(window)
+    if indexed is None:
+        return None
+
+    return ProjectSymbols(indexed[1], view.file_name())
+
+
+def get_parse_cache() -> Optional[ParseCache]:
+    """Return the cache of parse results, unless `parse_cache_size` is 0.
+
+    The cache is stored in the cache directory of Sublime Text, and bounded by
+    `parse_cache_size`, in megabytes. It is batched: the results put and read
+    are only written by a flush on the async thread, off the keystroke path.
+
+    Returns:
+        ParseCache -- The cache, or None if it is off or cannot be opened
+    """
+    global parse_cache, flush_scheduled
+    size = get_setting("parse_cache_size", 32)
+    if sqlite3 is None or not isinstance(size, (int, float)) or size <= 0:
+        return None
+
+    if parse_cache is None:
+        directory = os.path.join(sublime.cache_path(), "DocblockrPython")
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, DATABASE_NAME)
+            parse_cache = ParseCache(path, batched=True)
+        except (OSError, sqlite3.Error) as error:
+            log.warning("could not open the parse cache: %s", error)
+            return None
+
+    parse_cache.max_size = int(size * 1024 * 1024)
+    if not flush_scheduled:
+        flush_scheduled = True
+        sublime.set_timeout_async(flush_parse_cache, FLUSH_DELAY)
+    return parse_cache
+
+
+def flush_parse_cache():
+    """Write the results put and read since the last flush of the parse cache."""
+    global flush_scheduled
+    flush_scheduled = False
+    if parse_cache is not None:
+        parse_cache.flush()
+
+
+def get_worker() -> Optional[WorkerClient]:
+    """Return the client of the worker process, while `worker_python` is set.
+
+    The process is started by the first request, from the packages directory,
+    and shares the parse cache and symbol indexes of the plugin. It is
+    stopped whenever the settings it was started with change.
+
+    Returns:
+        WorkerClient -- The client, or None to run everything in the plugin host
+    """
+    global worker
+    python = get_setting("worker_python", "")
+    command = None
+    if python and isinstance(python, str):
+        directory = os.path.join(sublime.cache_path(), "DocblockrPython")
+        command = [python, "-m", __package__ + ".cli", "worker"]
+        size = get_setting("parse_cache_size", 32)
+        if isinstance(size, (int, float)) and size > 0:
+            command += ["--cache-dir", directory, "--cache-size", str(size)]
+        else:
+            command.append("--no-cache")
+
+    if worker is not None and worker.command != command:
+        worker.close()
+        worker = None
+    if worker is None and command is not None:
+        worker = WorkerClient(command, sublime.packages_path())
+
+    return worker
+
+
+def get_string_table(view: sublime.View) -> Optional[StringTable]:
+    """Return the string table of a view's buffer, if it matches the contents.
+
+    Strings touched by edits since the last call are tokenized first.
+
+    Arguments:
+        view {sublime.View} -- View of the buffer
+
+    Returns:
+        StringTable -- The table, or None if there is no up to date table
+    """
+    table = string_tables.get(view.buffer_id())
+    if table is None or table.version != view.change_count():
+        return None
+
+    table.refresh(view)
+    return table
+
+
+class DocblockrPythonIndexListener(sublime_plugin.ViewEventListener):
+    """Build the definition index of python buffers.
+
+    Extends:
+        sublime_plugin.ViewEventListener
+    """
+
+    @classmethod
+    def is_applicable(cls, settings):
+        """---."""
+        return is_python(settings)
+
+    def on_load(self):
+        """---."""
+        build_index(self.view)
+
+    def on_activated(self):
+        """---."""
+        if self.view.buffer_id() not in indexes:
+            build_index(self.view)
+
+    def on_reload(self):
+        """---."""
+        build_index(self.view)
+
+    def on_revert(self):
+        """---."""
+        build_index(self.view)
+
+    def on_pre_close(self):
+        """---."""
+        if len(self.view.buffer().views()) <= 1:
+            indexes.pop(self.view.buffer_id(), None)
+            string_tables.pop(self.view.buffer_id(), None)
+
+
+class DocblockrPythonSaveListener(sublime_plugin.ViewEventListener):
+    """Update the docstrings of python buffers before they are saved.
+
+    Only runs while the `update_on_save` setting is on, and always in the
+    plugin host, since the edits must be made before the file is written.
+
+    Extends:
+        sublime_plugin.ViewEventListener
+    """
+
+    @classmethod
+    def is_applicable(cls, settings):
+        """---."""
+        return is_python(settings)
+
+    def on_pre_save(self):
+        """---."""
+        if get_setting("update_on_save", False) is True:
+            self.view.run_command(
+                "docblockr_python_update_docstring", {"all": True, "background": False}
+            )
+
+
+class DocblockrPythonIndexUpdater(sublime_plugin.TextChangeListener):
+    """Apply the edits of python buffers to their index and string table.
+
+    Extends:
+        sublime_plugin.TextChangeListener
+    """
+
+    @classmethod
+    def is_applicable(cls, buffer):
+        """---."""
+        view = buffer.primary_view()
+        return view is not None and is_python(view.settings())
+
+    def on_text_changed(self, changes):
+        """Shift the index and string table past each change.
+
+        Rescanning what the changes touched is left to the next `get_index`
+        and `get_string_table`.
+
+        Arguments:
+            changes {list} -- `sublime.TextChange` for each edit, in order
+        """
+        view = self.buffer.primary_view()
+        if view is None:
+            return
+
+        buffer_id = self.buffer.id()
+        for table in (indexes.get(buffer_id), string_tables.get(buffer_id)):
+            # missing, or built after these changes were made
+            if table is None or table.version == view.change_count():
+                continue
+
+            for change in changes:
+                table.apply_change(change.a.pt, change.b.pt, len(change.str))
+
+            table.version = view.change_count()
+
+
+class DocblockrPythonProjectListener(sublime_plugin.EventListener):
+    """Drop the resolved settings of a window when its project changes.
+
+    Extends:
+        sublime_plugin.EventListener
+    """
+
+    def on_load_project(self, window):
+        """---."""
+        clear_window_settings(window)
+
+    def on_post_save_project(self, window):
+        """---."""
+        clear_window_settings(window)
+
+    def on_pre_close_project(self, window):
+        """---."""
+        clear_window_settings(window)
+
+    def on_pre_close_window(self, window):
+        """---."""
+        clear_window_settings(window)
+        indexed = symbol_indexes.pop(window.id(), None)
+        if indexed is not None:
+            # an indexing job still running fails on the closed connection
+            indexed[1].close()
+
+    def on_post_save(self, view):
+        """Drop the settings of the window after its project file is edited.
+
+        Python files saved in an indexed project are indexed again.
+        """
+        path = view.file_name() or ""
+        if path.endswith(".sublime-project"):
+            clear_window_settings(view.window())
+
+        window = view.window()
+        indexed = symbol_indexes.get(window.id()) if window else None
+        if indexed is None or not path.endswith(".py"):
+            return
+
+        folders, index = indexed
+        for folder in folders:
+            if path.startswith(os.path.join(folder, "")):
+                module = module_name(path, folder)
+                sublime.set_timeout_async(lambda: index.update_file(path, module))
+                break
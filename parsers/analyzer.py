@@ -0,0 +1,161 @@
+"""Single pass analysis of a definition body.
+
+`PythonParser` needs the decorators, the first return/yield, the raised
+exceptions and, for classes and modules, the assignments of a body. Rather
+than running one regular expression per section over the whole body, a single
+combined pattern tokenizes the interesting line heads in one left-to-right
+scan. Line heads inside multi-line strings are skipped, using the offsets of
+their triple quotes, found beforehand with plain substring searches.
+"""
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+TRIPLE_QUOTES = re.compile(r"\"\"\"|'''")
+
+# Line heads are matched right after their newline (the contents are scanned
+# with one prepended), so every alternative starts with a character from a
+# small set, which lets the regex engine skip uninteresting text quickly.
+LINE_HEADS = r"""
+    @(?P<decorator>[\w.]*)(?:\(.*\))?[ \t]*(?=\n|\Z)
+    |(?P<definition>(?:async[ \t]+)?(?:def|class))\b
+    |(?P<exit>return|yield)[ \t]+(?P<value>\S+)
+    |raise[ \t]+(?P<exception>\w+)
+"""
+ASSIGNMENT = r"""
+    |(?P<assignment>
+        [A-Za-z_]\w*[ \t]*(?::[^=\n]*)?=(?!=).*
+        |[A-Za-z_]\w*[ \t]*:[^=\n]+
+    )(?=\n|\Z)
+"""
+
+
+@lru_cache(maxsize=None)
+def body_tokens(assignments: bool):
+    """Compile the scanner for the requested kinds of tokens.
+
+    Arguments:
+        assignments {bool} -- Match assignment statements
+
+    Returns:
+        re.Pattern -- Compiled scanner
+    """
+    heads = LINE_HEADS + (ASSIGNMENT if assignments else "")
+    return re.compile(r"\n[ \t]*(?:" + heads + ")", re.VERBOSE)
+
+
+class BodySummary(NamedTuple):
+    """Everything the parser needs to know about a body.
+
+    Attributes:
+        decorators {list} -- Decorator names above the first definition line
+        exits {list} -- `(keyword, value)` for each `return`/`yield` site
+        raises {list} -- Exception name for each `raise` site
+        assignments {list} -- Source of each assignment statement
+    """
+
+    decorators: List[str]
+    exits: List[Tuple[str, str]]
+    raises: List[str]
+    assignments: List[str]
+
+
+def track_triple_quotes(text: str, state: Optional[str]) -> Optional[str]:
+    """Follow triple quoted strings opening and closing in `text`.
+
+    Arguments:
+        text {str} -- Text to inspect
+        state {str} -- Open triple quote delimiter before the text, or None
+
+    Returns:
+        str -- Open triple quote delimiter after the text, or None
+    """
+    for match in TRIPLE_QUOTES.finditer(text):
+        quote = match.group(0)
+        if state is None:
+            state = quote
+        elif state == quote:
+            state = None
+
+    return state
+
+
+def string_bounds(text: str) -> List[int]:
+    """Find where the triple quoted strings of a text open and close.
+
+    Arguments:
+        text {str} -- Text to inspect
+
+    Returns:
+        list -- Offsets of the opening and closing quotes, alternately. An
+            offset falls inside a string when an odd number of them precede it
+    """
+    quotes = []
+    for quote in ('"""', "'''"):
+        index = text.find(quote)
+        while index != -1:
+            quotes.append((index, quote))
+            index = text.find(quote, index + 3)
+    quotes.sort()
+
+    bounds = []
+    state: Optional[str] = None
+    for index, quote in quotes:
+        if state is None:
+            state = quote
+        elif state != quote:
+            continue
+        else:
+            state = None
+        bounds.append(index)
+
+    return bounds
+
+
+def analyze_body(
+    contents: str, strings: bool = True, assignments: bool = True
+) -> BodySummary:
+    """Collect decorators, return/yield sites, raise sites and assignments.
+
+    Arguments:
+        contents {str} -- Definition contents, as read by the parser
+
+    Keyword Arguments:
+        strings {bool} -- Skip over the contents of triple quoted strings. Only
+            meaningful when `contents` holds every line of the body, which is
+            not the case for classes and modules (default: {True})
+        assignments {bool} -- Collect assignment statements (default: {True})
+
+    Returns:
+        BodySummary -- Sites found in the contents, in source order
+    """
+    decorators: List[str] = []
+    exits: List[Tuple[str, str]] = []
+    raises: List[str] = []
+    statements: List[str] = []
+
+    in_definition = False
+    text = "\n" + contents
+    bounds = string_bounds(text) if strings else []
+
+    for match in body_tokens(assignments).finditer(text):
+        if bounds and bisect_right(bounds, match.start()) % 2:
+            # a line of a multi-line string
+            continue
+
+        # the name of the last group of the alternative that matched
+        kind = match.lastgroup
+        if kind == "decorator":
+            if not in_definition:
+                decorators.append(match.group("decorator"))
+        elif kind == "definition":
+            in_definition = True
+        elif kind == "value":
+            exits.append((match.group("exit"), match.group("value")))
+        elif kind == "exception":
+            raises.append(match.group("exception"))
+        elif kind == "assignment":
+            statements.append(match.group("assignment"))
+
+    return BodySummary(decorators, exits, raises, statements)
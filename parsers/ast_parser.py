@@ -0,0 +1,323 @@
+"""Parsing Class for python files, backed by the `ast` module.
+
+The regular expressions of `PythonParser` cannot cope with nested annotations,
+defaults containing `=` or `:`, `**kwargs` or positional-only markers. This
+parser reads the function with `ast` instead, and falls back to the regular
+expressions whenever the text does not parse, which is common while typing.
+"""
+import ast
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from ..utils.log import child_logger
+from .parser import PythonParser, build_arguments
+from .results import ParsedFunction, Returns, interned
+from .signature import Parameter
+
+log = child_logger(__name__)
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+SCOPE_NODES = (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+# Fields holding the statements of compound statements, in source order
+BODY_FIELDS = ("body", "handlers", "cases", "orelse", "finalbody")
+
+
+class ParsedSource:
+    """A parsed function along with the source it was parsed from.
+
+    Attributes:
+        node {ast.FunctionDef} -- The function node
+        lines {list} -- Lines of the source, to slice node text from
+        exits {list} -- `return`/`yield` nodes with a value, in source order
+        raises {list} -- `raise` nodes with an exception, in source order
+    """
+
+    __slots__ = ("node", "lines", "exits", "raises")
+
+    def __init__(self, node: ast.AST, source: str):
+        """---."""
+        self.node = node
+        self.lines = source.split("\n")
+        self.exits: Optional[List[ast.AST]] = None
+        self.raises: List[ast.AST] = []
+
+    def segment(self, node: ast.AST) -> str:
+        """Return the source text of a node.
+
+        Same as `ast.get_source_segment`, without splitting the whole source
+        again for every call.
+
+        Arguments:
+            node {ast.AST} -- Node parsed from this source
+
+        Returns:
+            str -- Source text of the node
+        """
+        first, last = node.lineno - 1, node.end_lineno - 1
+        begin, end = node.col_offset, node.end_col_offset
+
+        # column offsets are utf-8 byte offsets
+        if first == last:
+            return self.lines[first].encode()[begin:end].decode()
+
+        parts = [self.lines[first].encode()[begin:].decode()]
+        parts.extend(self.lines[first + 1 : last])
+        parts.append(self.lines[last].encode()[:end].decode())
+
+        return "\n".join(parts)
+
+    def collect_sites(self):
+        """Collect the return, yield and raise sites of the function body.
+
+        Walks the statements once, and only looks inside the expressions of
+        simple statements whose text mentions `yield`, and of the headers of
+        compound statements, e.g. the test of an `if` or the subject of a
+        `match`. The result is kept on the instance, which is itself cached
+        along with the parsed source.
+        """
+        if self.exits is not None:
+            return
+
+        self.exits = []
+        for statement in iter_statements(self.node.body):
+            if isinstance(statement, ast.Return):
+                if statement.value is not None:
+                    self.exits.append(statement)
+            elif isinstance(statement, ast.Raise):
+                if statement.exc is not None:
+                    self.raises.append(statement)
+            elif any(hasattr(statement, field) for field in BODY_FIELDS):
+                for field, value in ast.iter_fields(statement):
+                    if field not in BODY_FIELDS:
+                        self.exits.extend(yields(value))
+            elif isinstance(statement, ast.stmt):
+                text = self.lines[statement.lineno - 1 : statement.end_lineno]
+                if any("yield" in line for line in text):
+                    self.exits.extend(yields(statement))
+
+
+@lru_cache(maxsize=64)
+def parse_function(source: str) -> Optional[ParsedSource]:
+    """Parse the first function definition of a source.
+
+    Results are cached by source text, so triggering the command again on an
+    unchanged definition does not parse it again.
+
+    Arguments:
+        source {str} -- Python source starting with a function definition
+
+    Returns:
+        ParsedSource -- The function node, or None if the source does not parse
+    """
+    try:
+        module = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+
+    for node in module.body:
+        if isinstance(node, FUNCTION_NODES):
+            return ParsedSource(node, source)
+
+    return None
+
+
+def iter_statements(body: List[ast.AST]) -> Iterator[ast.AST]:
+    """Yield the statements of a function body in source order.
+
+    Nested functions and classes are not descended into, since their returns
+    and raises do not belong to the function being documented.
+
+    Arguments:
+        body {list} -- Statements of the function
+
+    Yields:
+        ast.AST -- The next statement, exception handler or `match` case of
+            the body
+    """
+    stack = list(reversed(body))
+    while stack:
+        current = stack.pop()
+        yield current
+
+        if isinstance(current, SCOPE_NODES):
+            continue
+
+        for field in reversed(BODY_FIELDS):
+            stack.extend(reversed(getattr(current, field, ())))
+
+
+def yields(value) -> Iterator[ast.AST]:
+    """Yield the `yield` expressions with a value of a node, or list of nodes."""
+    for root in value if isinstance(value, list) else [value]:
+        if not isinstance(root, ast.AST):
+            continue
+        for node in ast.walk(root):
+            if isinstance(node, (ast.Yield, ast.YieldFrom)) and node.value is not None:
+                yield node
+
+
+def callee(node: ast.AST) -> ast.AST:
+    """Return the called object of a call, or the node itself."""
+    return node.func if isinstance(node, ast.Call) else node
+
+
+class AstPythonParser(PythonParser):
+    """Parser class Specific to Python, using the `ast` module.
+
+    Extends:
+        PythonParser
+    """
+
+    def process_function(self, line: str, contents: str):
+        """Parse a function for its arguments.
+
+        Reads the function line to parse out the args and kwargs.
+        Arguments:
+            line     {String} -- Line containing the function definition
+            contents {String} -- Function body
+
+        Returns:
+            {ParsedFunction} Sections of the function
+        """
+        if not re.match(r"^\s*(def )", line):
+            log.debug("not function type")
+            return None
+
+        header = parse_function(line.strip() + "\n    pass\n")
+        if header is None:
+            log.debug("definition does not parse, falling back to regex")
+            return super().process_function(line, contents)
+
+        body = parse_function(contents)
+
+        sections: Dict[str, object] = {}
+
+        if body is not None:
+            decorators = self.ast_decorators(body)
+        else:
+            decorators = self.parse_decorators(line, contents)
+        if len(decorators) > 0:
+            sections["decorators"] = decorators
+
+        sections["arguments"] = self.ast_arguments(header)
+
+        if body is not None:
+            returns = self.ast_returns(body, header)
+            raises = self.ast_raises(body)
+        else:
+            log.debug("body does not parse, falling back to regex")
+            returns = self.parse_returns(contents, line)
+            raises = self.parse_raises(contents)
+
+        if returns is not None:
+            sections[returns[0]] = returns[1]
+
+        sections["raises"] = raises
+
+        parsed_function = ParsedFunction(**sections)
+
+        log.debug("function -- %s", parsed_function)
+
+        return parsed_function
+
+    def ast_decorators(self, parsed: ParsedSource) -> List[str]:
+        """List the decorators of a function that aren't in the excluded list.
+
+        Arguments:
+            parsed {ParsedSource} -- Parsed function
+
+        Returns:
+            {list} -- list of decorators
+        """
+        excluded_decorators = ["classmethod", "staticmethod", "property"]
+        decorators = []
+
+        for decorator in parsed.node.decorator_list:
+            name = parsed.segment(callee(decorator))
+            if name and name not in excluded_decorators:
+                decorators.append(name)
+
+        return decorators
+
+    def ast_arguments(self, parsed: ParsedSource):
+        """Find and parses each argument and keyword argument.
+
+        Arguments:
+            parsed {ParsedSource} -- Parsed function
+
+        Returns:
+            {Arguments} -- Contains a list of arguments and a list of
+                           keyword arguments.
+        """
+        args = parsed.node.args
+        positional = args.posonlyargs + args.args
+        defaults = [None] * (len(positional) - len(args.defaults)) + args.defaults
+
+        params: List[Tuple[ast.arg, Optional[ast.AST], str]] = [
+            (arg, default, "") for arg, default in zip(positional, defaults)
+        ]
+        if args.vararg:
+            params.append((args.vararg, None, "*"))
+        params.extend(
+            (arg, default, "")
+            for arg, default in zip(args.kwonlyargs, args.kw_defaults)
+        )
+        if args.kwarg:
+            params.append((args.kwarg, None, "**"))
+
+        return build_arguments(
+            [
+                Parameter(
+                    arg.arg,
+                    "" if arg.annotation is None else parsed.segment(arg.annotation),
+                    None if default is None else parsed.segment(default),
+                    star,
+                )
+                for arg, default, star in params
+            ],
+            self.guess_type,
+        )
+
+    def ast_returns(self, parsed: ParsedSource, header: ParsedSource):
+        """Find the first instance of returning in the function.
+
+        Arguments:
+            parsed {ParsedSource} -- Parsed function
+            header {ParsedSource} -- Parsed definition line
+
+        Returns:
+            {tuple} -- type of return, and the `Returns` of the value
+        """
+        parsed.collect_sites()
+        if not parsed.exits:
+            return None
+
+        first = parsed.exits[0]
+        return_type = "returns" if isinstance(first, ast.Return) else "yields"
+
+        hint = None
+        if header.node.returns is not None:
+            hint = header.segment(header.node.returns)
+
+        value = parsed.segment(first.value)
+        return (return_type, Returns(interned(hint or self.guess_type(value))))
+
+    def ast_raises(self, parsed: ParsedSource):
+        """Find instances of raised exceptions in the function.
+
+        Arguments:
+            parsed {ParsedSource} -- Parsed function
+
+        Returns:
+            {list} -- list of exception types
+        """
+        parsed.collect_sites()
+        raises: List[str] = []
+
+        for current in parsed.raises:
+            exception = parsed.segment(callee(current.exc))
+            if exception and exception not in raises:
+                raises.append(exception)
+
+        return raises or None
@@ -0,0 +1,228 @@
+"""Text buffers the parser can read from.
+
+The parser only needs a handful of read-only operations from a `sublime.View`.
+`TextBuffer` describes that subset so that an in-memory `StringBuffer` can be
+used interchangeably with a live view, e.g. for batch tooling or benchmarks
+running outside of Sublime Text.
+"""
+from bisect import bisect_right
+from typing import Dict, List, Optional, Protocol, Union
+
+
+class Region:
+    """Minimal stand-in for `sublime.Region`.
+
+    Attributes:
+        a {int} -- First end of the region
+        b {int} -- Second end of the region
+    """
+
+    __slots__ = ("a", "b")
+
+    def __init__(self, a: int, b: Optional[int] = None):
+        """---."""
+        self.a = a
+        self.b = a if b is None else b
+
+    def begin(self) -> int:
+        """Return the smaller of the two region ends."""
+        return min(self.a, self.b)
+
+    def end(self) -> int:
+        """Return the larger of the two region ends."""
+        return max(self.a, self.b)
+
+    def size(self) -> int:
+        """Return the number of characters spanned by the region."""
+        return abs(self.b - self.a)
+
+    def empty(self) -> bool:
+        """Return whether the region spans no characters."""
+        return self.a == self.b
+
+    def __eq__(self, other):
+        """---."""
+        return isinstance(other, Region) and self.a == other.a and self.b == other.b
+
+    def __repr__(self):
+        """---."""
+        return "Region({}, {})".format(self.a, self.b)
+
+
+class TextBuffer(Protocol):
+    """Read-only subset of the `sublime.View` API used by the parser."""
+
+    def size(self) -> int:
+        """Return the number of characters in the buffer."""
+        ...
+
+    def line(self, x) -> Region:
+        """Return the region of the line containing the given point or region."""
+        ...
+
+    def substr(self, x) -> str:
+        """Return the contents of a region, or the character at a point."""
+        ...
+
+    def indentation_level(self, point: int) -> int:
+        """Return the indentation level of the line containing `point`."""
+        ...
+
+    def settings(self):
+        """Return the settings of the buffer, such as `tab_size`."""
+        ...
+
+
+class StringBuffer:
+    """In-memory `TextBuffer` backed by a plain string.
+
+    Line start offsets are computed once, so `line()` is a binary search and
+    indentation is measured locally from the line's leading whitespace.
+
+    Arguments:
+        text {str} -- Buffer contents, using `\\n` line endings
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+    """
+
+    def __init__(self, text: str, tab_size: int = 4):
+        """---."""
+        self.text = text
+        self.tab_size = tab_size
+        self.line_starts: List[int] = [0]
+
+        find = text.find
+        index = find("\n")
+        while index != -1:
+            self.line_starts.append(index + 1)
+            index = find("\n", index + 1)
+
+    def size(self) -> int:
+        """Return the number of characters in the buffer."""
+        return len(self.text)
+
+    def row_of(self, point: int) -> int:
+        """Return the zero based row containing `point`."""
+        point = max(0, min(point, len(self.text)))
+        return bisect_right(self.line_starts, point) - 1
+
+    def line_region(self, row: int) -> Region:
+        """Return the region of the zero based `row`, without its newline."""
+        begin = self.line_starts[row]
+        if row + 1 < len(self.line_starts):
+            return Region(begin, self.line_starts[row + 1] - 1)
+
+        return Region(begin, len(self.text))
+
+    def line(self, x: Union[int, Region]) -> Region:
+        """Return the region of the line containing the given point or region."""
+        if isinstance(x, int):
+            return self.line_region(self.row_of(x))
+
+        return Region(
+            self.line_region(self.row_of(x.begin())).begin(),
+            self.line_region(self.row_of(x.end())).end(),
+        )
+
+    def substr(self, x: Union[int, Region]) -> str:
+        """Return the contents of a region, or the character at a point."""
+        if isinstance(x, int):
+            return self.text[x : x + 1]
+
+        return self.text[x.begin() : x.end()]
+
+    def indentation_level(self, point: int) -> int:
+        """Return the indentation level of the line containing `point`."""
+        region = self.line_region(self.row_of(point))
+        return measure_indentation(self.text, region.begin(), self.tab_size)
+
+    def settings(self) -> Dict[str, int]:
+        """Return the settings of the buffer, such as `tab_size`."""
+        return {"tab_size": self.tab_size}
+
+
+class EditableBuffer(StringBuffer):
+    """`StringBuffer` whose text can be edited in place.
+
+    An edit only rewrites the line starts past the edited region, instead of
+    finding every line of the text again.
+
+    Arguments:
+        text {str} -- Buffer contents, using `\\n` line endings
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+    """
+
+    def replace(self, begin: int, end: int, text: str):
+        """Replace the characters from `begin` to `end` with `text`.
+
+        Arguments:
+            begin {int} -- Offset where the replaced text starts
+            end {int} -- Offset where the replaced text ends
+            text {str} -- Text to insert
+        """
+        delta = len(text) - (end - begin)
+        self.text = self.text[:begin] + text + self.text[end:]
+
+        inserted = []
+        index = text.find("\n")
+        while index != -1:
+            inserted.append(begin + index + 1)
+            index = text.find("\n", index + 1)
+
+        # Lines starting inside of the replaced text are gone
+        first = bisect_right(self.line_starts, begin)
+        last = bisect_right(self.line_starts, end)
+        self.line_starts[first:] = inserted + [
+            start + delta for start in self.line_starts[last:]
+        ]
+
+
+def indentation_columns(text: str, begin: int, tab_size: int = 4) -> int:
+    """Measure the leading whitespace of the line starting at `begin`, in columns.
+
+    Tabs advance to the next tab stop, the same way Sublime Text measures
+    indentation.
+
+    Arguments:
+        text {str} -- Text containing the line
+        begin {int} -- Offset of the first character of the line
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        int -- Number of columns
+    """
+    columns = 0
+    index = begin
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char == " ":
+            columns += 1
+        elif char == "\t":
+            columns += tab_size - columns % tab_size
+        else:
+            break
+        index += 1
+
+    return columns
+
+
+def measure_indentation(text: str, begin: int, tab_size: int = 4) -> int:
+    """Measure the indentation level of the line starting at `begin`.
+
+    Arguments:
+        text {str} -- Text containing the line
+        begin {int} -- Offset of the first character of the line
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        int -- Number of whole indentation levels
+    """
+    return indentation_columns(text, begin, tab_size) // tab_size
@@ -0,0 +1,259 @@
+"""On-disk cache of the parse results of definitions.
+
+Batch runs over a tree, and reopening a large file, parse the same unchanged
+definitions over and over. Results are stored here by a hash of the parser,
+its version and the text of the definition, as compressed json, in a SQLite
+database shared by the editor and the command line.
+
+The database is bounded in size: once it grows past its limit, the least
+recently used results are evicted. The size is tracked by each connection, so
+concurrent writers may overshoot the limit until their next write.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+from ..utils.log import child_logger
+from .results import Parsed, dump, load
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None  # type: ignore
+
+log = child_logger(__name__)
+
+# Bumped whenever the table changes
+SCHEMA_VERSION = 1
+
+SCHEMA = (
+    "CREATE TABLE entries (key TEXT PRIMARY KEY, value BLOB, size INTEGER, used REAL)",
+    "CREATE INDEX entries_used ON entries (used)",
+)
+
+# Default limit of the size of the cache, in bytes
+DEFAULT_SIZE = 32 * 1024 * 1024
+# Share of the limit the cache is evicted down to
+EVICTION_TARGET = 0.8
+# Name of the database in a cache directory
+DATABASE_NAME = "parses.sqlite3"
+
+# Caches opened by `shared_cache`, by path and process
+shared: Dict[Tuple[str, int], Optional["ParseCache"]] = {}
+
+
+def cache_key(parser: str, version: str, line: Optional[str], contents: str) -> str:
+    """Hash the text of a definition, along with the parser reading it.
+
+    Arguments:
+        parser {str} -- Name of the parser class
+        version {str} -- Version of the parser's output
+        line {str} -- Definition line, None for modules
+        contents {str} -- Contents of the definition
+
+    Returns:
+        str -- Hex digest
+    """
+    # Length prefixed, so that no two definitions give the same text
+    text = "".join(
+        "-" if part is None else "{}:{}".format(len(part), part)
+        for part in (parser, version, line, contents)
+    )
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ParseCache:
+    """Parse results of definitions, kept in a SQLite database.
+
+    Writes are sent to the database right away, or with `batched`, on `flush`
+    only, which batch runs call once per file and the editor on its async
+    thread. The last use of the results read is written along with the next
+    write, or `flush`.
+
+    Writes go through a connection of their own, and `lock` is only held to
+    read, or to take the pending writes, so that reading never waits on a
+    write transaction, or on another process holding the database.
+
+    Arguments:
+        path {str} -- Path of the database, `:memory:` for a transient cache
+
+    Keyword Arguments:
+        max_size {int} -- Limit of the size of the results, in bytes
+            (default: {DEFAULT_SIZE})
+        batched {bool} -- Keep writes until `flush` (default: {False})
+    """
+
+    def __init__(self, path: str, max_size: int = DEFAULT_SIZE, batched=False):
+        """---."""
+        self.path = path
+        self.max_size = max_size
+        self.batched = batched
+        # Guards `connection`, `pending` and `used`
+        self.lock = threading.Lock()
+        # `(key, value, size, used)` of the results to write
+        self.pending: List[Tuple[str, bytes, int, float]] = []
+        # last use of the results read, by key
+        self.used: Dict[str, float] = {}
+
+        self.connection = self.connect()
+        if path == ":memory:":
+            # a second connection would open another database
+            self.writer, self.write_lock = self.connection, self.lock
+        else:
+            self.writer, self.write_lock = self.connect(), threading.Lock()
+
+        with self.write_lock, self.writer:
+            # Worker processes opening a new cache at once create it only once
+            self.writer.execute("BEGIN IMMEDIATE")
+            version = self.writer.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.writer.execute("DROP TABLE IF EXISTS entries")
+                for statement in SCHEMA:
+                    self.writer.execute(statement)
+                self.writer.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+
+            self.size = self.writer.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()[0]
+
+    def connect(self) -> "sqlite3.Connection":
+        """Open a connection to the database."""
+        connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        # The cache can always be filled again, so writes are not synced to disk
+        connection.execute("PRAGMA synchronous = OFF")
+        # Batch runs read and write from several processes at once
+        connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    def get(self, key: str) -> Optional[Parsed]:
+        """Return the cached parse result of a definition.
+
+        Arguments:
+            key {str} -- Key of the definition, see `cache_key`
+
+        Hits are only recorded in memory, and written by the next `flush`, so
+        that reading never opens a write transaction.
+
+        Returns:
+            Parsed -- The parsed definition, or None on a miss
+        """
+        try:
+            with self.lock:
+                row = self.connection.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self.used[key] = time.time()
+        except sqlite3.Error as error:
+            log.warning("could not read the parse cache: %s", error)
+            return None
+
+        if row is None:
+            return None
+
+        return load(json.loads(zlib.decompress(row[0])))
+
+    def put(self, key: str, parsed: Parsed):
+        """Cache the parse result of a definition.
+
+        Arguments:
+            key {str} -- Key of the definition, see `cache_key`
+            parsed {Parsed} -- The parsed definition
+        """
+        text = json.dumps(dump(parsed), separators=(",", ":"))
+        value = zlib.compress(text.encode("utf-8"))
+        with self.lock:
+            self.pending.append((key, value, len(value), time.time()))
+        if not self.batched:
+            self.flush()
+
+    def flush(self):
+        """Write the pending results and hits, then evict the oldest results."""
+        with self.lock:
+            pending, self.pending = self.pending, []
+            used, self.used = self.used, {}
+        if not pending and not used:
+            return
+
+        with self.write_lock:
+            try:
+                with self.writer:
+                    self.writer.executemany(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", pending
+                    )
+                    self.writer.executemany(
+                        "UPDATE entries SET used = ? WHERE key = ?",
+                        [(when, key) for key, when in used.items()],
+                    )
+                    self.size += sum(entry[2] for entry in pending)
+                    if self.size > self.max_size:
+                        self.evict()
+            except sqlite3.Error as error:
+                log.warning("could not write the parse cache: %s", error)
+
+    def evict(self):
+        """Drop the least recently used results, down to `EVICTION_TARGET`.
+
+        Must be called with `write_lock` held, inside of a transaction of
+        `writer`.
+        """
+        self.size = self.writer.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+        evicted = 0
+        rows = self.writer.execute("SELECT key, size FROM entries ORDER BY used")
+        stale = []
+        for key, size in rows:
+            if self.size - evicted <= self.max_size * EVICTION_TARGET:
+                break
+            stale.append((key,))
+            evicted += size
+
+        self.writer.executemany("DELETE FROM entries WHERE key = ?", stale)
+        self.size -= evicted
+        log.debug("evicted %s parse result(s)", len(stale))
+
+    def close(self):
+        """Write the pending results, and close the database."""
+        self.flush()
+        with self.write_lock:
+            if self.writer is not self.connection:
+                self.writer.close()
+        with self.lock:
+            self.connection.close()
+
+
+def shared_cache(cache_dir: str, max_size: int = DEFAULT_SIZE) -> Optional[ParseCache]:
+    """Open the batched cache of a cache directory, once per process.
+
+    Worker processes of a batch run each open their own connection, since a
+    connection must not be shared with a forked process.
+
+    Arguments:
+        cache_dir {str} -- Cache directory
+
+    Keyword Arguments:
+        max_size {int} -- Limit of the size of the results, in bytes
+            (default: {DEFAULT_SIZE})
+
+    Returns:
+        ParseCache -- The cache, or None if it cannot be opened
+    """
+    key = (cache_dir, os.getpid())
+    if key not in shared:
+        cache = None
+        if sqlite3 is not None:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                path = os.path.join(cache_dir, DATABASE_NAME)
+                cache = ParseCache(path, max_size, batched=True)
+            except (OSError, sqlite3.Error) as error:
+                log.warning("could not open the parse cache: %s", error)
+        shared[key] = cache
+
+    return shared[key]
@@ -0,0 +1,724 @@
+"""Read docstrings back into the sections the formatters write.
+
+The formatters only write docstrings. Each parser here reads one style back,
+turning the text of a docstring into its summary, its description, and the
+`(section, attributes)` pairs that `PythonParser.parse` produces and
+`formatters.utils.build_snippet` consumes. A docstring can then be compared
+with the definition it documents, or rendered again.
+
+Every parser reads the lines of a docstring once, top to bottom, keeping only
+the current section and entry as state. Regular expressions are only run on
+the first line of each entry.
+"""
+import re
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Pattern, Tuple, Type
+
+from ..utils.log import child_logger
+from .results import Arguments, Returns, interned, param
+
+log = child_logger(__name__)
+
+# Text of the snippet fields left unedited, read back as missing values
+PLACEHOLDERS = frozenset(
+    [
+        "_type_",
+        "_default_",
+        "_description_",
+        "_default_description_",
+        "[description]",
+    ]
+)
+
+# A type, possibly holding `, ` as in `Dict[str, int]`
+TYPE = r"\S+(?:, \S+)*"
+
+# Sections of the arguments of a definition
+ARGUMENTS = ("arguments", "keyword_arguments")
+# Section of the parsed output holding each section of arguments
+ARGUMENT_OF = {"keyword_arguments": "arguments"}
+
+
+class Docstring(NamedTuple):
+    """A parsed docstring.
+
+    Attributes:
+        summary {str} -- First paragraph
+        description {str} -- Paragraphs outside of any section
+        sections {list} -- `(section, attributes)` pairs, in the shape
+            `PythonParser.parse` returns them
+        descriptions {dict} -- Description of each entry, by `(section, name)`.
+            Arguments are under `arguments`, returned and yielded values under
+            an empty name. None when left as a placeholder
+        rows {dict} -- Lines of each entry, by `(section, name)`, as indexes
+            in the text of the docstring
+        header_rows {dict} -- Lines of the headers of each section
+    """
+
+    summary: str
+    description: str
+    sections: List[Tuple[str, Any]]
+    descriptions: Dict[Tuple[str, str], Optional[str]]
+    rows: Dict[Tuple[str, str], List[int]]
+    header_rows: Dict[str, List[int]]
+
+
+class Entry:
+    """An argument, returned value, exception, attribute, etc. being read.
+
+    Arguments:
+        section {str} -- Section of the entry
+        name {str} -- Name of the entry, empty for returned and yielded values
+
+    Keyword Arguments:
+        type {str} -- Type of the entry (default: {None})
+        description {str} -- First line of its description (default: {None})
+    """
+
+    __slots__ = ("section", "name", "type", "default", "keyword", "lines", "rows")
+
+    def __init__(
+        self,
+        section: str,
+        name: str,
+        type: Optional[str] = None,
+        description: Optional[str] = None,
+    ):
+        """---."""
+        self.section = section
+        self.name = name
+        self.type = value_of(type)
+        self.default: Optional[str] = None
+        self.keyword = section == "keyword_arguments"
+        self.lines: List[str] = [description] if description else []
+        # indexes of the lines read into the entry
+        self.rows: List[int] = []
+
+
+def value_of(text: Optional[str]) -> Optional[str]:
+    """Return a field's text, or None when it is empty or a placeholder."""
+    if not text or text in PLACEHOLDERS:
+        return None
+
+    return text
+
+
+def strip_optional(entry: Entry):
+    """Move the `, optional` suffix of a type to the entry's `keyword` flag."""
+    if entry.type and entry.type.endswith(", optional"):
+        entry.type = value_of(entry.type[: -len(", optional")])
+        entry.keyword = True
+    elif entry.type == "optional":
+        entry.type = None
+        entry.keyword = True
+
+
+class DocstringParser(ABC):
+    """Base of the docstring parsers.
+
+    A style maps its section headers to sections in `headers`, and reads the
+    first line of each entry in `read_entry`. Lines indented past the first
+    line of an entry continue its description. Everything outside of a
+    section goes to the description of the docstring, unless `read_line`
+    finds an entry there.
+
+    Attributes:
+        name {str} -- Name of the style, as the formatter is named
+        headers {dict} -- Section of each header, by lower case header line
+        flush_entries {bool} -- Whether entries start on the indentation of
+            their header, instead of below it
+        default {Pattern} -- Suffix holding the default value of an argument
+            in its description
+    """
+
+    name = ""
+    headers: Dict[str, str] = {}
+    flush_entries = False
+    default: Optional[Pattern] = None
+
+    def header(self, stripped: str, lines: List[str], index: int) -> Optional[str]:
+        """Find the section a line starts.
+
+        Arguments:
+            stripped {str} -- Line, without surrounding whitespace
+            lines {list} -- Lines of the docstring
+            index {int} -- Index of the following line
+
+        Returns:
+            str -- The section, an empty string for sections that are not
+                read, or None if the line is not a header
+        """
+        return self.headers.get(stripped.lower())
+
+    @abstractmethod
+    def read_entry(
+        self, section: str, stripped: str, entries: List[Entry], kind: str
+    ) -> Optional[Entry]:
+        """Read the first line of an entry of a section.
+
+        Arguments:
+            section {str} -- Section holding the line
+            stripped {str} -- Line, without surrounding whitespace
+            entries {list} -- Entries read so far, which may be appended to
+            kind {str} -- Kind of the documented definition
+
+        Returns:
+            Entry -- The entry the line starts or updates, or None if the line
+                holds no entry
+        """
+
+    def read_line(
+        self, stripped: str, entries: List[Entry], kind: str
+    ) -> Optional[Entry]:
+        """Read a line outside of any section.
+
+        Arguments:
+            stripped {str} -- Line, without surrounding whitespace
+            entries {list} -- Entries read so far, which may be appended to
+            kind {str} -- Kind of the documented definition
+
+        Returns:
+            Entry -- The entry the line starts or updates, or None if the line
+                is part of the description
+        """
+        return None
+
+    def parse(self, text: str, kind: str = "function") -> Docstring:
+        """Parse the text of a docstring.
+
+        Arguments:
+            text {str} -- Contents of the docstring, without its quotes
+
+        Keyword Arguments:
+            kind {str} -- Kind of the documented definition: `module`, `class`
+                or `function` (default: {"function"})
+
+        Returns:
+            Docstring -- The parsed docstring
+        """
+        if "\t" in text:
+            text = text.expandtabs(4)
+
+        lines = text.split("\n")
+        summary: List[str] = []
+        description: List[str] = []
+        entries: List[Entry] = []
+        header_rows: Dict[str, List[int]] = {}
+
+        section: Optional[str] = None
+        section_indent = 0
+        entry: Optional[Entry] = None
+        entry_indent = 0
+        # until the first blank line following the summary
+        in_summary = True
+
+        index = 0
+        while index < len(lines):
+            line = lines[index]
+            index += 1
+            stripped = line.strip()
+
+            if not stripped:
+                if summary:
+                    in_summary = False
+                if description and description[-1]:
+                    description.append("")
+                continue
+
+            indent = len(line) - len(line.lstrip())
+
+            # Continued description of the current entry
+            if entry is not None and indent > entry_indent:
+                entry.lines.append(stripped)
+                entry.rows.append(index - 1)
+                continue
+
+            header = self.header(stripped, lines, index)
+            if header is not None:
+                in_summary = False
+                section, section_indent, entry = header, indent, None
+                if header:
+                    rows = header_rows.setdefault(ARGUMENT_OF.get(header, header), [])
+                    rows.append(index - 1)
+                # the underline of a numpy header
+                if self.flush_entries:
+                    if header:
+                        rows.append(index)
+                    index += 1
+                continue
+
+            if in_summary:
+                entry = self.read_line(stripped, entries, kind)
+                if entry is None:
+                    summary.append(stripped)
+                    continue
+                in_summary = False
+                entry.rows.append(index - 1)
+                entry_indent = indent
+                continue
+
+            if section and (
+                indent > section_indent
+                or (self.flush_entries and indent == section_indent)
+            ):
+                entry = self.read_entry(section, stripped, entries, kind)
+                if entry is not None:
+                    entry.rows.append(index - 1)
+                    entry_indent = indent
+                    continue
+            elif indent <= section_indent:
+                section = None
+
+            entry = self.read_line(stripped, entries, kind)
+            if entry is not None:
+                entry.rows.append(index - 1)
+                entry_indent = indent
+                continue
+
+            description.append(stripped)
+
+        sections, descriptions, rows = self.assemble(entries)
+
+        return Docstring(
+            " ".join(summary),
+            "\n".join(description).strip("\n"),
+            sections,
+            descriptions,
+            rows,
+            header_rows,
+        )
+
+    def assemble(self, entries: List[Entry]):
+        """Group the entries into sections, in the order they were first seen.
+
+        Arguments:
+            entries {list} -- Entries of the docstring, in order
+
+        Returns:
+            list, dict, dict -- `(section, attributes)` pairs, and the
+                description and lines of each entry by `(section, name)`
+        """
+        sections: List[Tuple[str, Any]] = []
+        descriptions: Dict[Tuple[str, str], Optional[str]] = {}
+        rows: Dict[Tuple[str, str], List[int]] = {}
+        grouped: Dict[str, Any] = {}
+
+        for entry in entries:
+            text = "\n".join(entry.lines)
+            section = entry.section
+
+            if section in ARGUMENTS:
+                match = self.default.search(text) if self.default else None
+                if match is not None:
+                    entry.keyword = True
+                    entry.default = value_of(match.group(match.lastindex))
+                    text = text[: match.start()]
+
+                if "arguments" not in grouped:
+                    grouped["arguments"] = Arguments([], [])
+                    sections.append(("arguments", grouped["arguments"]))
+
+                if entry.keyword:
+                    grouped["arguments"].keyword_arguments.append(
+                        param(entry.name, entry.type, entry.default)
+                    )
+                else:
+                    grouped["arguments"].arguments.append(param(entry.name, entry.type))
+                section = "arguments"
+
+            elif section in ("returns", "yields"):
+                if section in grouped:
+                    rows[(section, "")].extend(entry.rows)
+                    continue
+                grouped[section] = Returns(interned(entry.type))
+                sections.append((section, grouped[section]))
+
+            else:
+                if section not in grouped:
+                    grouped[section] = []
+                    sections.append((section, grouped[section]))
+
+                if section == "attributes":
+                    grouped[section].append(param(entry.name, entry.type))
+                else:
+                    grouped[section].append(entry.name)
+
+            descriptions[(section, entry.name)] = value_of(text.strip())
+            rows.setdefault((section, entry.name), []).extend(entry.rows)
+
+        return sections, descriptions, rows
+
+
+def written_sections(style: str, sections: List[Tuple[str, Any]]):
+    """Keep the parts of parsed sections that a style writes down.
+
+    These are the sections its docstrings are read back into: PEP 257 has no
+    types nor returned values, Google style no types of attributes, only the
+    DocBlock style lists decorators and extended classes, and Sphinx style
+    documents yielded values as returned ones.
+
+    Arguments:
+        style {str} -- Name of the formatter
+        sections {list} -- Output of `PythonParser.parse`
+
+    Returns:
+        list -- The sections, without empty ones
+    """
+    kept = []
+    for section, attributes in sections:
+        if section in ("decorators", "extends") and style != "docblock":
+            continue
+        if section in ("returns", "yields") and style == "PEP0257":
+            continue
+        if section == "yields" and style == "sphinx":
+            section = "returns"
+
+        if section == "arguments":
+            if style == "PEP0257":
+                attributes = Arguments(
+                    *(
+                        [item._replace(type=None) for item in params]
+                        for params in attributes
+                    )
+                )
+            if not any(attributes):
+                continue
+        elif section == "attributes":
+            untyped = style in ("PEP0257", "google")
+            attributes = [
+                param(item.name, None if untyped else item.type) for item in attributes
+            ]
+
+        if attributes:
+            kept.append((section, attributes))
+
+    return kept
+
+
+def find_entry(entries: List[Entry], sections: Tuple[str, ...], name: str):
+    """Return the last entry of a name in the given sections, if any."""
+    for entry in reversed(entries):
+        if entry.name == name and entry.section in sections:
+            return entry
+
+    return None
+
+
+class GoogleDocstringParser(DocstringParser):
+    """Read Google style docstrings."""
+
+    name = "google"
+    headers = {
+        "args:": "arguments",
+        "arguments:": "arguments",
+        "parameters:": "arguments",
+        "keyword args:": "keyword_arguments",
+        "keyword arguments:": "keyword_arguments",
+        "returns:": "returns",
+        "return:": "returns",
+        "yields:": "yields",
+        "yield:": "yields",
+        "raises:": "raises",
+        "attributes:": "attributes",
+    }
+    default = re.compile(r"\s*\(default: `(.*)`\)$")
+
+    argument = re.compile(r"^(\*{0,2}\w+)(?:\s*\((.*?)\))?\s*:(?:\s+(.*))?$")
+    typed = re.compile(r"^(" + TYPE + r"):(?:\s+(.*))?$")
+    exception = re.compile(r"^([\w.]+)\s*:(?:\s+(.*))?$")
+
+    def read_entry(self, section, stripped, entries, kind):
+        """---."""
+        if section in ARGUMENTS or section == "attributes":
+            match = self.argument.match(stripped)
+            if match is None:
+                return None
+            entry = Entry(section, match.group(1), match.group(2), match.group(3))
+            strip_optional(entry)
+
+        elif section == "returns":
+            match = self.typed.match(stripped)
+            if match is None:
+                entry = Entry(section, "", None, stripped)
+            else:
+                entry = Entry(section, "", match.group(1), match.group(2))
+
+        elif section == "yields":
+            # The formatter writes the description first, then the type
+            previous = entries[-1] if entries else None
+            if previous is not None and previous.section == "yields":
+                if previous.type is None and previous.lines:
+                    previous.type = value_of(stripped)
+                    return previous
+                return None
+
+            match = self.typed.match(stripped)
+            if match is None:
+                entry = Entry(section, "", None, stripped)
+            else:
+                entry = Entry(section, "", match.group(1), match.group(2))
+
+        elif section == "raises":
+            match = self.exception.match(stripped)
+            if match is None:
+                entry = Entry(section, stripped)
+            else:
+                entry = Entry(section, match.group(1), None, match.group(2))
+
+        else:
+            return None
+
+        entries.append(entry)
+        return entry
+
+
+class DocblockDocstringParser(DocstringParser):
+    """Read DocBlock style docstrings.
+
+    Types may be written in parentheses, as the formatter does, or in braces.
+    """
+
+    name = "docblock"
+    headers = {
+        "arguments:": "arguments",
+        "keyword arguments:": "keyword_arguments",
+        "returns:": "returns",
+        "yields:": "yields",
+        "raises:": "raises",
+        "attributes:": "attributes",
+        "decorators:": "decorators",
+        "extends:": "extends",
+    }
+    # `(default X)` as the formatter writes it, or `(default: {X})`
+    default = re.compile(r"\s*\(default(?::\s*\{(.*)\}|\s+(.*))\)$")
+
+    argument = re.compile(r"^(\*{0,2}\w+)\s*(?:[({](.*?)[)}])?\s*--(?:\s+(.*))?$")
+    braced = re.compile(r"^\{(.*?)\}\s*(.*)$")
+
+    def read_entry(self, section, stripped, entries, kind):
+        """---."""
+        if section in ARGUMENTS or section == "attributes":
+            match = self.argument.match(stripped)
+            if match is None:
+                return None
+            entry = Entry(section, match.group(1), match.group(2), match.group(3))
+
+        elif section in ("returns", "yields"):
+            match = self.braced.match(stripped)
+            if match is not None:
+                entry = Entry(section, "", match.group(1), match.group(2))
+            elif " -- " in stripped or stripped.endswith(" --"):
+                type, _, description = stripped.partition(" --")
+                entry = Entry(section, "", type, description.strip())
+            elif " " not in stripped:
+                entry = Entry(section, "", stripped)
+            else:
+                entry = Entry(section, "", None, stripped)
+
+        elif section == "raises":
+            name, _, description = stripped.partition(" --")
+            entry = Entry(section, name.strip(), None, description.strip())
+
+        elif section in ("decorators", "extends"):
+            entry = Entry(section, stripped)
+
+        else:
+            return None
+
+        entries.append(entry)
+        return entry
+
+
+class Pep0257DocstringParser(DocstringParser):
+    """Read PEP 257 style docstrings.
+
+    Arguments have no types, and each raised exception is a sentence of its
+    own outside of any section.
+    """
+
+    name = "PEP0257"
+    headers = {
+        "arguments:": "arguments",
+        "keyword arguments:": "keyword_arguments",
+        "attributes:": "attributes",
+    }
+    default = re.compile(r"\s*\(default:?\s*(.*)\)$")
+
+    argument = re.compile(r"^(\*{0,2}\w+)\s*--(?:\s+(.*))?$")
+    exception = re.compile(r"^Raises an?\s+\{?([\w.]+)\}?(?:\s+(.*))?$")
+
+    def read_entry(self, section, stripped, entries, kind):
+        """---."""
+        match = self.argument.match(stripped)
+        if match is None:
+            return None
+
+        entry = Entry(section, match.group(1), None, match.group(2))
+        entries.append(entry)
+        return entry
+
+    def read_line(self, stripped, entries, kind):
+        """---."""
+        match = self.exception.match(stripped)
+        if match is None:
+            return None
+
+        entry = Entry("raises", match.group(1), None, match.group(2))
+        entries.append(entry)
+        return entry
+
+
+class NumpyDocstringParser(DocstringParser):
+    """Read Numpy style docstrings, whose headers are underlined."""
+
+    name = "numpy"
+    headers = {
+        "parameters": "arguments",
+        "other parameters": "arguments",
+        "returns": "returns",
+        "yields": "yields",
+        "raises": "raises",
+        "attributes": "attributes",
+    }
+    flush_entries = True
+    default = re.compile(r"\s*\(the default is (.*?), which .*\)$")
+
+    argument = re.compile(r"^(\*{0,2}\w+)\s*(?::\s*(.*))?$")
+
+    def header(self, stripped, lines, index):
+        """---."""
+        if index >= len(lines):
+            return None
+
+        underline = lines[index].strip()
+        if not underline or underline.strip("-"):
+            return None
+
+        return self.headers.get(stripped.lower(), "")
+
+    def read_entry(self, section, stripped, entries, kind):
+        """---."""
+        if section in ARGUMENTS or section == "attributes":
+            match = self.argument.match(stripped)
+            if match is None:
+                return None
+            entry = Entry(section, match.group(1), match.group(2))
+            strip_optional(entry)
+
+        elif section in ("returns", "yields"):
+            # either `type`, or `name : type`
+            _, colon, type = stripped.rpartition(" : ")
+            entry = Entry(section, "", type if colon else stripped)
+
+        elif section == "raises":
+            entry = Entry(section, stripped)
+
+        else:
+            return None
+
+        entries.append(entry)
+        return entry
+
+
+class SphinxDocstringParser(DocstringParser):
+    """Read Sphinx style docstrings, made of `:field:` lines.
+
+    The formatter writes the attributes of classes and modules as parameters,
+    and yielded values as returned ones, so they are read back that way.
+    """
+
+    name = "sphinx"
+    default = re.compile(r",\s*defaults to (.*)$")
+
+    field = re.compile(r"^:(\w+)(?:\s+([^:]*?))?:(?:\s+(.*))?$")
+    parameters = frozenset(["param", "parameter", "arg", "argument", "key", "keyword"])
+    variables = frozenset(["ivar", "var", "cvar"])
+    returns = frozenset(["returns", "return"])
+    raises = frozenset(["raises", "raise", "except", "exception"])
+
+    def read_entry(self, section, stripped, entries, kind):
+        """Read a field: the style has no section headers."""
+        return self.read_line(stripped, entries, kind)
+
+    def read_line(self, stripped, entries, kind):
+        """---."""
+        if not stripped.startswith(":"):
+            return None
+
+        match = self.field.match(stripped)
+        if match is None:
+            return None
+
+        field, argument, text = match.groups()
+        argument = argument or ""
+        parameter_section = "arguments" if kind == "function" else "attributes"
+
+        if field in self.parameters or field in self.variables:
+            section = parameter_section if field in self.parameters else "attributes"
+            # `:param int name:` holds the type too
+            type, _, name = argument.rpartition(" ")
+            entry = Entry(section, name, type or None, text)
+
+        elif field == "type" or field == "vartype":
+            sections: Tuple[str, ...] = ("attributes",)
+            if field == "type":
+                sections = (*ARGUMENTS, "attributes")
+            entry = find_entry(entries, sections, argument)
+            if entry is None:
+                section = "attributes" if field == "vartype" else parameter_section
+                entry = Entry(section, argument)
+                entries.append(entry)
+            entry.type = value_of(text)
+            strip_optional(entry)
+            return entry
+
+        elif field in self.returns:
+            entry = Entry("returns", "", None, text)
+
+        elif field == "rtype":
+            entry = find_entry(entries, ("returns",), "")
+            if entry is None:
+                entry = Entry("returns", "")
+                entries.append(entry)
+            entry.type = value_of(text)
+            return entry
+
+        elif field in self.raises:
+            entry = Entry("raises", argument, None, text)
+
+        else:
+            return None
+
+        entries.append(entry)
+        return entry
+
+
+DOCSTRING_PARSER_DICT: Dict[str, Type[DocstringParser]] = {
+    "PEP0257": Pep0257DocstringParser,
+    "docblock": DocblockDocstringParser,
+    "google": GoogleDocstringParser,
+    "numpy": NumpyDocstringParser,
+    "sphinx": SphinxDocstringParser,
+}
+
+
+def get_docstring_parser(name: Optional[str]) -> Type[DocstringParser]:
+    """Return the docstring parser of a style by name.
+
+    If it doesn't exist, the Google parser is used instead, as for formatters.
+
+    Arguments:
+        name {str} -- Name of the style
+
+    Returns:
+        type -- Class of the docstring parser
+    """
+    parser = DOCSTRING_PARSER_DICT.get(name or "google")
+
+    if parser is None:
+        log.warning(
+            "docstring style `{}` doesn't exist, defaulting to `google`.".format(name)
+        )
+        parser = GoogleDocstringParser
+
+    return parser
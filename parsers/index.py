@@ -0,0 +1,344 @@
+"""Incrementally maintained index of the definitions of a buffer.
+
+Without an index, every trigger walks the buffer line by line, backwards to
+the enclosing `def`/`class` line and forwards to the end of its body. The
+`DefinitionIndex` records every definition line once, along with the extent of
+its body, so that both reads become a binary search followed by a single
+`substr` of a known region.
+
+Edits only rescan the top level definitions around them. A top level line
+closes every block opened before it, so the definitions outside of that window
+keep their structure and only need their offsets shifted. The rescan is
+deferred until the index is next read, so typing only costs the shift.
+"""
+from bisect import bisect_left, bisect_right
+from typing import List, Optional, Tuple
+
+from ..utils.log import child_logger
+from .analyzer import track_triple_quotes
+from .buffer import TextBuffer, indentation_columns
+from .parser import is_start_keyword
+from .scanner import DOCSTRING_START, find_header_end
+
+try:
+    from sublime import Region
+except ImportError:
+    from .buffer import Region
+
+log = child_logger(__name__)
+
+Span = Tuple[int, int]
+
+
+class IndexEntry:
+    """A `def` or `class` line of the buffer.
+
+    Attributes:
+        kind {str} -- Either `class` or `function`
+        start {int} -- Offset of the beginning of the definition line
+        header_end {int} -- Offset of the end of the line holding the header colon
+        end {int} -- Offset of the end of the last line of the body
+        indent {int} -- Indentation of the definition line, in columns
+        body_indent {int} -- Indentation of the body in columns, if it has one
+        decorators {tuple} -- Span of the decorator lines, if any
+        docstring {tuple} -- Span of the docstring, if any. The end is None
+            while the docstring is not closed
+    """
+
+    __slots__ = (
+        "kind",
+        "start",
+        "header_end",
+        "end",
+        "indent",
+        "body_indent",
+        "decorators",
+        "docstring",
+    )
+
+    def __init__(self, kind: str, start: int, header_end: int, indent: int):
+        """---."""
+        self.kind = kind
+        self.start = start
+        self.header_end = header_end
+        self.end = header_end
+        self.indent = indent
+        self.body_indent: Optional[int] = None
+        self.decorators: Optional[Span] = None
+        self.docstring: Optional[Tuple[int, Optional[int]]] = None
+
+    def shift(self, delta: int):
+        """Move every offset of the entry by `delta` characters."""
+        self.start += delta
+        self.header_end += delta
+        self.end += delta
+        if self.decorators is not None:
+            self.decorators = (self.decorators[0] + delta, self.decorators[1] + delta)
+        if self.docstring is not None:
+            begin, end = self.docstring
+            self.docstring = (begin + delta, None if end is None else end + delta)
+
+    def __repr__(self):
+        """---."""
+        return "IndexEntry({}, {}-{})".format(self.kind, self.start, self.end)
+
+
+def docstring_span(
+    lines: List[str], row: int, begin: int, indent: int, tab_size: int = 4
+) -> Tuple[int, Optional[int]]:
+    """Find the extent of the string literal starting on `row`.
+
+    The search stops at the end of the body holding the docstring.
+
+    Arguments:
+        lines {list} -- Lines of the scanned text
+        row {int} -- Row of the first line of the docstring
+        begin {int} -- Offset of the beginning of that row
+        indent {int} -- Indentation of the definition line, in columns
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        int, int -- Offsets of the opening quote and of the end of the closing
+            line, or None if the docstring is not closed
+    """
+    line = lines[row]
+    start = begin + len(line) - len(line.lstrip())
+    end = begin + len(line)
+
+    state = track_triple_quotes(line, None)
+    while state is not None:
+        row += 1
+        if row >= len(lines):
+            return start, None
+
+        line = lines[row]
+        if line.strip() and indentation_columns(line, 0, tab_size) <= indent:
+            return start, None
+
+        end += 1 + len(line)
+        state = track_triple_quotes(line, state)
+
+    return start, end
+
+
+def is_top_level_head(line: str) -> bool:
+    """Check whether a line starts a top level definition or its decorators."""
+    return line.startswith("@") or is_start_keyword(line)
+
+
+def scan_definitions(
+    text: str, base: int = 0, tab_size: int = 4
+) -> Tuple[List[IndexEntry], List[int]]:
+    """Index the definitions of a run of whole top level definitions.
+
+    Blocks are delimited by indentation only, the same way the parser reads
+    them, so a body ends before the first line indented at or below its
+    definition line. Blank lines and comments never end a block.
+
+    Nothing found in the text depends on what follows the next top level
+    definition, which is what allows rescanning only part of a buffer.
+
+    Arguments:
+        text {str} -- Text to scan, starting at the beginning of a line
+
+    Keyword Arguments:
+        base {int} -- Offset of the text in the buffer (default: {0})
+        tab_size {int} -- Width of an indentation level (default: {4})
+
+    Returns:
+        list, list -- Definitions in source order, and the offsets of the top
+            level definitions
+    """
+    entries: List[IndexEntry] = []
+    anchors: List[int] = []
+    stack: List[IndexEntry] = []
+
+    lines = text.split("\n")
+    decorator_start: Optional[int] = None
+    last_end = base
+    begin = 0
+    row = 0
+    while row < len(lines):
+        line = lines[row]
+        end = begin + len(line)
+        stripped = line.lstrip()
+
+        if not stripped or stripped.startswith("#"):
+            begin = end + 1
+            row += 1
+            continue
+
+        columns = indentation_columns(line, 0, tab_size)
+        while stack and stack[-1].indent >= columns:
+            stack.pop().end = last_end
+
+        if stack and stack[-1].body_indent is None:
+            stack[-1].body_indent = columns
+            if DOCSTRING_START.match(stripped):
+                first, last = docstring_span(
+                    lines, row, begin, stack[-1].indent, tab_size
+                )
+                stack[-1].docstring = (
+                    base + first,
+                    None if last is None else base + last,
+                )
+
+        # a decorated definition starts with its first decorator
+        if columns == 0 and decorator_start is None and is_top_level_head(line):
+            anchors.append(base + begin)
+
+        if is_start_keyword(stripped):
+            last_row, inline_body = find_header_end(lines, row)
+            # An unterminated header stops before the next definition line
+            for index in range(row + 1, last_row + 1):
+                if is_top_level_head(lines[index]) or is_start_keyword(
+                    lines[index].lstrip()
+                ):
+                    last_row, inline_body = index - 1, ""
+                    break
+            while last_row > row and not lines[last_row].strip():
+                last_row -= 1
+
+            header_end = end
+            for index in range(row + 1, last_row + 1):
+                header_end += 1 + len(lines[index])
+
+            entry = IndexEntry(
+                "class" if stripped.startswith("class") else "function",
+                base + begin,
+                base + header_end,
+                columns,
+            )
+            if decorator_start is not None:
+                entry.decorators = (base + decorator_start, last_end)
+            entries.append(entry)
+            if not inline_body:
+                stack.append(entry)
+
+            decorator_start = None
+            last_end = entry.header_end
+            begin = header_end + 1
+            row = last_row + 1
+            continue
+
+        if stripped.startswith("@"):
+            if decorator_start is None:
+                decorator_start = begin
+        else:
+            decorator_start = None
+
+        last_end = base + end
+        begin = end + 1
+        row += 1
+
+    for entry in stack:
+        entry.end = last_end
+
+    return entries, anchors
+
+
+class DefinitionIndex:
+    """Definitions of a buffer, sorted by offset.
+
+    Arguments:
+        text {str} -- Contents of the buffer
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        version {int} -- Change count of the buffer the text was read at
+            (default: {None})
+    """
+
+    def __init__(self, text: str, tab_size: int = 4, version: Optional[int] = None):
+        """---."""
+        self.tab_size = tab_size
+        self.version = version
+        self.size = len(text)
+        self.entries, self.anchors = scan_definitions(text, 0, tab_size)
+        self.starts = [entry.start for entry in self.entries]
+        # region removed from the index, waiting for `refresh`
+        self.dirty: Optional[Span] = None
+
+    def entry_before(self, position: int) -> Optional[IndexEntry]:
+        """Find the closest definition line above `position`.
+
+        Arguments:
+            position {int} -- Offset in the buffer
+
+        Returns:
+            IndexEntry -- The definition starting closest before the offset,
+                or None if there is none
+        """
+        assert self.dirty is None, "the index must be refreshed first"
+
+        index = bisect_left(self.starts, position) - 1
+        if index < 0:
+            return None
+
+        return self.entries[index]
+
+    def apply_change(self, begin: int, end: int, length: int):
+        """Account for an edit replacing `begin`-`end` with `length` characters.
+
+        The top level definitions around the edit are dropped from the index
+        and the following ones are shifted. `refresh` must then be called to
+        rescan the dropped definitions once the buffer holds the new text.
+
+        Arguments:
+            begin {int} -- Offset where the replaced text started
+            end {int} -- Offset where the replaced text ended
+            length {int} -- Length of the inserted text
+        """
+        delta = length - (end - begin)
+
+        # The edit may turn the definition lines around it into plain code, or
+        # extend the decorators of the following one, so one more top level
+        # definition is dropped on each side.
+        before = bisect_left(self.anchors, begin) - 2
+        after = bisect_right(self.anchors, end) + 1
+        start = self.anchors[before] if before >= 0 else 0
+        stop = self.anchors[after] if after < len(self.anchors) else self.size
+
+        if self.dirty is not None:
+            start = min(start, self.dirty[0])
+            stop = max(stop, self.dirty[1])
+
+        first = bisect_left(self.starts, start)
+        last = bisect_left(self.starts, stop)
+        for entry in self.entries[last:]:
+            entry.shift(delta)
+        del self.entries[first:last]
+
+        first = bisect_left(self.anchors, start)
+        last = bisect_left(self.anchors, stop)
+        self.anchors[first:] = [anchor + delta for anchor in self.anchors[last:]]
+
+        self.starts = [entry.start for entry in self.entries]
+        self.size += delta
+        self.dirty = (start, stop + delta)
+
+    def refresh(self, view: TextBuffer):
+        """Rescan the definitions dropped by `apply_change`.
+
+        Arguments:
+            view {TextBuffer} -- Buffer holding the text after the edits
+        """
+        if self.dirty is None:
+            return
+
+        start, stop = self.dirty
+        self.dirty = None
+
+        entries, anchors = scan_definitions(
+            view.substr(Region(start, stop)), start, self.tab_size
+        )
+        log.debug("rescanned %s-%s, %s definition(s)", start, stop, len(entries))
+
+        index = bisect_left(self.starts, start)
+        self.entries[index:index] = entries
+        self.starts = [entry.start for entry in self.entries]
+
+        index = bisect_left(self.anchors, start)
+        self.anchors[index:index] = anchors
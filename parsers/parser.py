@@ -1,18 +1,56 @@
 """Parsing Class for python files."""
+import logging
 import re
-import sublime
-from typing import Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
 from ..utils.log import child_logger
+from ..utils.timing import timed
+from .analyzer import BodySummary, analyze_body
+from .buffer import TextBuffer
+from .cache import cache_key
+from .reader import LineReader
+from .results import (
+    Arguments,
+    Param,
+    Parsed,
+    ParsedClass,
+    ParsedFunction,
+    ParsedModule,
+    Returns,
+    interned,
+    param,
+)
+from .signature import Parameter, parse_signature, split_segments, strip_comments
+
+if TYPE_CHECKING:
+    import sublime
+
+    from .cache import ParseCache
+    from .index import DefinitionIndex
+    from .strings import StringTable
+    from .symbols import ProjectSymbols
 
 log = child_logger(__name__)
 
+# Bumped whenever `PythonParser.parse` returns something else for the same
+# definition, so that cached parse results are not read back
+PARSER_VERSION = "3"
+
 
 def split_by_commas(string):
     """Split a string by unenclosed commas.
 
     Splits a string by commas that are not inside of:
     - quotes
-    - brackets
+    - brackets, at any depth
     Arguments:
         string {String} -- String to be split. Usuall a function parameter
             string
@@ -24,51 +62,10 @@ def split_by_commas(string):
     Returns:
         {list} List of elements in the string that were delimited by commas
     """
-    out = []
-
     if not string:
-        return out
-
-    # the current token
-    current = ""
-
-    # characters which open a section inside which commas are not separators between different
-    # arguments
-    open_quotes = "\"'<({["
-    # characters which close the section. The position of the character here should match the
-    # opening indicator in `open_quotes`
-    close_quotes = "\"'>)}]"
-
-    matching_quote = ""
-    inside_quotes = False
-    is_next_literal = False
-
-    for char in string:
-        if is_next_literal:  # previous char was a \
-            current += char
-            is_next_literal = False
-        elif inside_quotes:
-            if char == "\\":
-                is_next_literal = True
-            else:
-                current += char
-                if char == matching_quote:
-                    inside_quotes = False
-        else:
-            if char == ",":
-                if len(current.strip()):
-                    out.append(current.strip())
-                current = ""
-            else:
-                current += char
-                quote_index = open_quotes.find(char)
-                if quote_index > -1:
-                    matching_quote = close_quotes[quote_index]
-                    inside_quotes = True
+        return []
 
-    if len(current.strip()):
-        out.append(current.strip())
-    return out
+    return split_segments(string)
 
 
 START_KEYWORD_RULES = (
@@ -79,62 +76,14 @@ START_KEYWORD_RULES = (
 
 
 def is_start_keyword(line: str) -> bool:
+    # Called for most lines of a buffer, so nothing is logged here
     for rule in START_KEYWORD_RULES:
         if rule.match(line):
-            log.debug("the line contains a keyword: %s", rule)
             return True
 
     return False
 
 
-def read_next_line(view: sublime.View, position: int, reverse=False):
-    """Get the next line of the view.
-
-    From the given position, will expand the region to the current line in the file,
-    grab the ending (beginning if reverse) position, and add (subtract if reverse) 1
-    to get the next line in the file. Will return False if the next line is either the
-    beginning or the end of the file. This function is iteratable to continuously
-    provide file lines
-    Arguments:
-        view     {sublime.View} -- View to be read
-        position {Integer}      -- Position in the view
-
-    Keyword Arguments:
-        reverse {Bool} -- If false, will read to the end of the file (default False)
-
-    Yields:
-        {sublime.Region} Region of the next line.
-
-    Returns:
-        {Bool} False when at the beginning or end of the file
-    """
-    current_line = view.line(position)
-    modifier = 1
-    if reverse:
-        modifier = -1
-
-    go_on = True
-    while go_on:
-        next_line = current_line.begin() if reverse else current_line.end()
-        next_line += modifier
-
-        log.debug("next line -> %s", next_line)
-
-        if reverse:
-            line = view.line(next_line)
-            line_str = view.substr(line).strip()
-            if is_start_keyword(line_str):
-                go_on = False
-
-        # Ensure within bounds of the view
-        if not (next_line < view.size() and next_line > 0):
-            break
-
-        current_line = view.line(next_line)
-
-        yield current_line
-
-
 def is_numeric(val):
     """Check if string is numeric.
 
@@ -206,6 +155,73 @@ def guess_type_from_value(value: Optional[str]) -> Optional[str]:
     return None
 
 
+def build_arguments(
+    parameters: Sequence[Parameter],
+    guess: Callable[[Optional[str]], Optional[str]] = guess_type_from_value,
+) -> Optional[Arguments]:
+    """Sort parameters into arguments and keyword arguments, and type them.
+
+    A leading `self` or `cls` is skipped. Types come from the type hint,
+    without the `Optional` of parameters with a default, or are guessed from
+    the default value or the name of the parameter.
+
+    Arguments:
+        parameters {Sequence[Parameter]} -- Parameters of a definition, in order
+
+    Keyword Arguments:
+        guess {callable} -- Guesses the type of a default value
+            (default: {guess_type_from_value})
+
+    Returns:
+        {Arguments} -- Contains a list of arguments and a list of
+                       keyword arguments, or None if there are no parameters.
+    """
+    if not parameters:
+        return None
+
+    excluded_parameters = ["self", "cls"]
+    parsed_arguments = Arguments([], [])
+
+    for index, (name, hint, value, star) in enumerate(parameters):
+        if index == 0 and not star and name in excluded_parameters:
+            continue
+
+        if value is not None and hint and re.match(r"^Optional\[.+\]$", hint):
+            hint = hint[len("Optional[") : -1]
+
+        if star == "*" and hint:
+            hint = "Tuple[{}]".format(hint)
+        elif star == "**" and hint:
+            hint = "Dict[str, {}]".format(hint)
+
+        hint = hint or guess(value) or guess_type_from_name(name)
+        parsed = param(name, hint, value)
+        if value is not None:
+            parsed_arguments.keyword_arguments.append(parsed)
+        else:
+            parsed_arguments.arguments.append(parsed)
+
+    return parsed_arguments
+
+
+DOCSTRING_QUOTES = re.compile(r"\"\"\"|'''")
+
+
+def closing_quote(line: str) -> str:
+    """Find the quotes closing a docstring opened on a line.
+
+    Arguments:
+        line {str} -- Line holding the opening quotes
+
+    Returns:
+        str -- The opening quotes, or `\"\"\"` if there are none
+    """
+    match = DOCSTRING_QUOTES.search(line)
+    return match.group(0) if match else '"""'
+
+
+RETURN_HINT = re.compile(r"\)\s*->\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*:\s*$")
+
 MULTILINE_PATTERNS = (
     # A function defined on multiple lines
     re.compile(r"^\s*(async\s+)?def\s+\w+\($"),
@@ -241,24 +257,121 @@ class PythonParser:
     source files.
     """
 
-    def __init__(self, view_settings: Optional[sublime.Settings] = None):
+    def __init__(self, view_settings: Optional["sublime.Settings"] = None):
         """---."""
         self.view_settings = view_settings
-        self.closing_string = '"""'
+        # Definition index and string table of the buffer being read, if they
+        # are up to date
+        self.index: Optional["DefinitionIndex"] = None
+        self.strings: Optional["StringTable"] = None
+        # Symbols of the project, to resolve the names values refer to
+        self.symbols: Optional["ProjectSymbols"] = None
+        # On-disk cache of parse results, by the text of each definition
+        self.cache: Optional["ParseCache"] = None
+        self.reader: Optional[LineReader] = None
+
+    def get_reader(self, view: TextBuffer) -> LineReader:
+        """Return a bulk line reader for the view.
+
+        Arguments:
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
+
+        Returns:
+            LineReader -- Reader of the view, using its tab size
+        """
+        if self.reader is None or self.reader.view is not view:
+            if self.index is not None:
+                tab_size = self.index.tab_size
+            else:
+                settings = self.view_settings or view.settings()
+                tab_size = settings.get("tab_size", 4)
+            self.reader = LineReader(view, tab_size)
+
+        return self.reader
+
+    def lines_above(self, view: TextBuffer, position: int) -> Iterator[Tuple[str, int]]:
+        """Read the lines above a position, up to the closest definition line.
+
+        With an index, the lines are read with a single `substr` of the region
+        between the definition line and the position. Otherwise they are read
+        in chunks until a definition line is found.
+
+        Arguments:
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
+            position {Integer} -- Position in the view
+
+        Yields:
+            {String}, {Integer} -- Line contents and its indentation level, from
+                the bottom up
+        """
+        reader = self.get_reader(view)
+        entry = self.index.entry_before(position) if self.index else None
+
+        if entry is None:
+            lines = reader.backward(position)
+            line = next(lines, None)
+            while line is not None:
+                following = next(lines, None)
+                # an empty first line of the buffer is never read
+                if following is None and not line:
+                    return
+
+                yield line, reader.level(line)
+                if is_start_keyword(line.strip()):
+                    return
+                line = following
+            return
+
+        # the last line is the beginning of the line holding the position
+        lines = reader.lines(entry.start, position)[:-1]
+        for line in reversed(lines):
+            yield line, reader.level(line)
+
+    def lines_below(
+        self, view: TextBuffer, position: int, level: int
+    ) -> Iterator[Tuple[str, int]]:
+        """Read the lines below a position, at least to the end of its block.
+
+        With an index, reading stops at the end of the enclosing definition
+        instead of relying on the caller to stop, and the lines are read with a
+        single `substr`. Otherwise they are read in chunks.
+
+        Arguments:
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
+            position {Integer} -- Position in the view
+            level {Integer} -- Indentation level of the position
+
+        Yields:
+            {String}, {Integer} -- Line contents and its indentation level
+        """
+        reader = self.get_reader(view)
+        entry = self.index.entry_before(position) if self.index else None
+
+        # The body of the definition holds the position, and its end
+        # de-indents below the level of the position
+        if (
+            entry is not None
+            and entry.end >= position
+            and entry.indent // reader.tab_size < level
+        ):
+            # the first line is the rest of the line holding the position
+            lines = reader.lines(position, entry.end)[1:]
+        else:
+            lines = reader.forward(position)
+
+        for line in lines:
+            yield line, reader.level(line)
 
-    @classmethod
-    def get_definition(cls, view: sublime.View, position: int):
+    @timed("get_definition")
+    def get_definition(self, view: TextBuffer, position: int):
         """Get the definition line.
 
         String representation fo the line above the docstring
 
         Arguments:
-            view {sublime.View} -- The sublime view in which this is executing
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
             position {Integer} -- Position of the docstring
 
-        Decorators:
-            classmethod
-
         Returns:
             {String} Representation of the definition line
         """
@@ -271,40 +384,39 @@ class PythonParser:
         if position == 0:
             return None, None
 
-        # indentation_level = view.indentation_level(position)
-        line: str = ""
-
-        multiline = 0
-        for current_line in read_next_line(view, position, True):
-            current_line_string = view.substr(current_line).strip()
-            line = current_line_string + " " + line
-            multiline += 1
+        # comments end with their line, so they are dropped before joining
+        lines = [
+            strip_comments(line).strip() for line, _ in self.lines_above(view, position)
+        ]
+        line = "".join(current + " " for current in reversed(lines))
+        multiline = len(lines)
 
         log.debug("number of lines defined -> %s", multiline)
-        log.debug("definition -- {}".format(line))
+        log.debug("definition -- %s", line)
 
         return line, multiline
 
-    @classmethod
+    @timed("read_above")
     def read_above(
-        cls, view: sublime.View, position: int, multiline: Optional[int] = None
+        self, view: TextBuffer, position: int, multiline: Optional[int] = None
     ):
         """Read the contents above the current definition line.
         Gathers additional context about the lines above a definition line,
         e.g. Decorators.
         Arguments:
-            view {sublime.View} -- The sublime view in which this is executing
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
             position {Integer} -- Position of the docstring
         Returns:
             string, string -- type of definition, stringified definition contents
         """
         indentation_level = view.indentation_level(position)
         docstring_type = None
-        definition = ""
+        # lines are read bottom up
+        definition: List[str] = []
 
-        for current_line in read_next_line(view, position, True):
+        for current_line, current_indentation in self.lines_above(view, position):
             # Not an empty line
-            current_line_string = view.substr(current_line).strip()
+            current_line_string = current_line.strip()
             if len(current_line_string) == 0:
                 continue
 
@@ -314,7 +426,6 @@ class PythonParser:
 
             if multiline and multiline == 1:
                 # When we move up in scope, stop reading
-                current_indentation = view.indentation_level(current_line.end())
                 if not current_indentation == indentation_level - 1:
                     break
 
@@ -333,19 +444,21 @@ class PythonParser:
                 else:
                     docstring_type = "module"
 
-            definition = current_line_string + "\n" + definition
+            definition.append(current_line_string + "\n")
+
+        definition_string = "".join(reversed(definition))
 
         log.debug(
             "result of `read_above` -> type: '%s', definition: '%s'",
             docstring_type,
-            definition,
+            definition_string,
         )
 
-        return docstring_type, definition
+        return docstring_type, definition_string
 
-    @classmethod
+    @timed("get_definition_contents")
     def get_definition_contents(
-        cls, view: sublime.View, position: int, multiline: Optional[int]
+        self, view: TextBuffer, position: int, multiline: Optional[int]
     ):
         """Get the relevant contents of the module/class/function.
 
@@ -356,25 +469,25 @@ class PythonParser:
         certain won which indentation that will be made, if at all.
 
         Arguments:
-            view {sublime.View} -- The sublime view in which this is executing
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
             position {Integer} -- Position the docstring was created on
 
-        Decorators:
-            classmethod
-
         Returns:
             {String} Contents that matter
         """
         indentation_level = view.indentation_level(position)
-        definition: str = ""
 
-        docstring_type, definition = cls.read_above(view, position, multiline)
+        docstring_type, above = self.read_above(view, position, multiline)
         # Read above the docstring for function/class definition and decorators
+        definition = [above]
+        debug = log.isEnabledFor(logging.DEBUG)
 
         # Read the class/function contents
-        for current_line in read_next_line(view, position):
+        for current_line, current_indentation in self.lines_below(
+            view, position, indentation_level
+        ):
             # Not an empty line
-            current_line_string = view.substr(current_line).rstrip()
+            current_line_string = current_line.rstrip()
             if len(current_line_string) == 0:
                 continue
 
@@ -382,8 +495,6 @@ class PythonParser:
             if re.match(r"^\s*(\#)", current_line_string):
                 continue
 
-            current_indentation = view.indentation_level(current_line.end())
-
             # Exit if this has de-indented below the current level
             if current_indentation < indentation_level:
                 break
@@ -396,31 +507,80 @@ class PythonParser:
             ):
                 continue
 
-            log.debug("contents each line: '%s'", current_line_string)
+            if debug:
+                log.debug("contents each line: '%s'", current_line_string)
 
             # If it is a function defined on multiple lines,
             # the definitions should be combined into one line
             if use_multiple_lines(current_line_string):
-                definition += current_line_string
+                definition.append(current_line_string)
             else:
-                definition += current_line_string + "\n"
+                definition.append(current_line_string + "\n")
 
-        return definition
+        return "".join(definition)
 
-    def parse(self, line: str, contents: str):
+    def read_definition(self, view: TextBuffer, position: int):
+        """Read the definition line and contents for a docstring.
+
+        Arguments:
+            view {TextBuffer} -- The sublime view (or text buffer) to read from
+            position {Integer} -- Position of the docstring
+
+        Returns:
+            {String}, {String} -- Definition line and the relevant contents
+        """
+        line, multiline = self.get_definition(view, position)
+        contents = self.get_definition_contents(
+            view, view.line(position).end(), multiline
+        )
+
+        if line and re.match(r"^\s*async\s+def", line):
+            log.debug("the function is asynchronous")
+            line = re.sub(r"async\s+", "", line)
+            contents = re.sub(r"async\s+", "", contents)
+
+        return line, contents
+
+    @timed("parse")
+    def parse(self, line: str, contents: str) -> Parsed:
         """Central command to parse the areas above and below the docstring.
 
         Tries to determine which type of docstring should be created based upon
         whether the parser returns any output
 
+        With a cache, results are read from it by the text of the definition.
+        Not while project symbols are used, since the result then depends on
+        the other files of the project too.
+
         Arguments:
             line {String} -- Definition Line
             contents {String} -- Contents of the module/class/function
 
         Returns:
-            {Dictionary} Store of attributes and their values
+            {Parsed} Sections of the definition, without any if it is not one
         """
+        if self.cache is None or self.symbols is not None:
+            return self.parse_definition(line, contents)
 
+        key = cache_key(type(self).__name__, PARSER_VERSION, line, contents)
+        output = self.cache.get(key)
+        if output is None:
+            output = self.parse_definition(line, contents)
+            if output:
+                self.cache.put(key, output)
+
+        return output
+
+    def parse_definition(self, line: str, contents: str) -> Parsed:
+        """Parse the areas above and below the docstring, without the cache.
+
+        Arguments:
+            line {String} -- Definition Line
+            contents {String} -- Contents of the module/class/function
+
+        Returns:
+            {Parsed} Sections of the definition, without any if it is not one
+        """
         log.debug("line -> %s, contents: %s", line, contents)
 
         # At beginning of the module
@@ -436,9 +596,26 @@ class PythonParser:
         if output is not None:
             return output
 
-        return {}
+        return Parsed()
+
+    def guess_type(self, value: Optional[str]) -> Optional[str]:
+        """Guess the type of a value from its text, or the project symbol it names.
+
+        Arguments:
+            value {str} -- string representation of a value
+
+        Returns:
+            {str} -- the guessed type, or None if one cannot be found
+        """
+        guessed = guess_type_from_value(value)
+        if guessed is None and self.symbols is not None:
+            guessed = self.symbols.type_of(value)
+
+        return guessed
 
-    def process_variable(self, variable: str, hints: Optional[Dict[str, str]] = None):
+    def process_variable(
+        self, variable: str, hints: Optional[Dict[str, str]] = None
+    ) -> Param:
         """Process an individual variable.
 
         Determines programmatically what the assumed type of the variable is,
@@ -451,37 +628,35 @@ class PythonParser:
             hints {dict} -- dictionary to store typehints about the vars (default: None)
 
         Returns:
-            {Dictionary} -- Dictionary of attributes to create snippets from
+            {Param} -- Name, type and default value of the variable
         """
         if not hints:
             hints = {}
 
-        # params = {'name': None, 'type': None, 'default': None}
-        params: Dict[str, Optional[str]] = {}
+        default = None
 
         if "=" in variable:
             pieces = variable.split("=")
             variable = pieces[0].strip()
-            params["default"] = pieces[1].strip()
+            default = pieces[1].strip()
 
         if 0 < variable.find(":") < len(variable) - 1:
             pieces = variable.split(":", 2)
             variable = pieces[0].strip()
             hints[variable] = pieces[1].strip()
 
-        if params.get("default") and hints.get(variable):
+        if default and hints.get(variable):
             if re.match(r"^Optional\[.+?\]$", hints[variable]):
                 hints[variable] = re.sub(r"^Optional\[(.+?)\]$", r"\1", hints[variable])
 
-        params["name"] = variable
-        params["type"] = (
+        return param(
+            variable,
             hints.get(variable, "")
-            or guess_type_from_value(params.get("default"))
-            or guess_type_from_name(variable)
+            or self.guess_type(default)
+            or guess_type_from_name(variable),
+            default,
         )
 
-        return params
-
     def parse_variables(self, contents: str):
         """Parse module level variables.
 
@@ -489,13 +664,12 @@ class PythonParser:
             contents {String} -- Module Body
 
         Returns:
-            {Dictionary} -- Dictionary of attributes to create snippets from
+            {list} -- `Param` of each variable, or None if there are none
         """
         variables = []
-        regex = re.compile(
-            r"^\s*((?:(?!from |import |async |def |class |@).)+$)", re.MULTILINE
-        )
-        matches = re.findall(regex, contents)
+        # Module and class contents only hold the lines at the docstring's
+        # indentation, so string boundaries cannot be followed reliably
+        matches = analyze_body(contents, strings=False).assignments
 
         if len(matches) == 0:
             return None
@@ -519,16 +693,12 @@ class PythonParser:
             classmethod
 
         Returns:
-            {Dictionary} Dictionary of attributes to create snippets from
+            {ParsedModule} Sections of the module
         """
         if line is not None:
             return None
 
-        parsed_module = []
-        variables = self.parse_variables(contents)
-
-        if variables is not None:
-            parsed_module.append(("attributes", variables))
+        parsed_module = ParsedModule(attributes=self.parse_variables(contents))
 
         log.debug("module -> %s", parsed_module)
 
@@ -554,6 +724,8 @@ class PythonParser:
             if extend == "object":
                 continue
 
+            if self.symbols is not None:
+                extend = self.symbols.qualify(extend)
             parsed_extends.append(extend)
 
         return parsed_extends
@@ -570,26 +742,21 @@ class PythonParser:
             classmethod
 
         Returns:
-            {Dictionary} Dictionary of attributes to create snippets from
+            {ParsedClass} Sections of the class
         """
         if not re.match(r"^\s*(class )", line):
             return None
 
-        parsed_class = []
-
-        extends = self.parse_extends(line)
-        if extends is not None:
-            parsed_class.append(("extends", extends))
-
-        variables = self.parse_variables(contents)
-        if variables is not None:
-            parsed_class.append(("attributes", variables))
+        parsed_class = ParsedClass(
+            extends=self.parse_extends(line),
+            attributes=self.parse_variables(contents),
+        )
 
         log.debug("class -- %s", parsed_class)
 
         return parsed_class
 
-    def parse_decorators(self, definition, content):
+    def parse_decorators(self, definition, content, body: Optional[BodySummary] = None):
         """Parse the lines above the definition for decorators.
 
         Finds and returns all the decorators over a function that aren't
@@ -599,29 +766,20 @@ class PythonParser:
             definition {str} -- definition line.
             content {str} -- Content definition
 
+        Keyword Arguments:
+            body {BodySummary} -- Already analyzed content (default: {None})
+
         Returns:
             {list} -- list of decorators
         """
-        lines = content.split("\n")
+        body = body or analyze_body(content)
         excluded_decorators = ["classmethod", "staticmethod", "property"]
-        decorators = []
-
-        for line in lines:
-            if line == definition:
-                break
-
-            match = re.findall(r"^\s*@([a-zA-Z0-9_\.]*)(\(.*\)|$)", line)
 
-            if len(match) == 0:
-                continue
-
-            decorator = match[0][0]
-            if decorator in excluded_decorators:
-                continue
-
-            decorators.append(decorator)
-
-        return decorators
+        return [
+            decorator
+            for decorator in body.decorators
+            if decorator not in excluded_decorators
+        ]
 
     def parse_arguments(self, line: str):
         """Find and parses each argument and keyword argument.
@@ -630,49 +788,24 @@ class PythonParser:
             line {str} -- definition line to be parsed
 
         Returns:
-            {dict} -- Contains a list of arguments and a list of
-                      keyword arguments in their respective keys.
+            {Arguments} -- Contains a list of arguments and a list of
+                           keyword arguments.
         """
-        parsed_arguments = {"arguments": [], "keyword_arguments": []}
-
-        arguments = re.search(r"^\s*def\s+\w+\((.*)\)", line)
+        parameters = parse_signature(line.strip())
 
-        log.debug("found arguments by re -- %r", arguments)
+        log.debug("parameters: %s", parameters)
 
-        # Parse type hints
-        hints = dict(
-            re.findall(r"(\w+)\s*:\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*", arguments.group(1))  # type: ignore
-        )
-
-        log.debug("hints: %s", hints)
-
-        # Remove type hints
-        arguments = re.sub(r":\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*", "", arguments.group(1))  # type: ignore
-
-        if not arguments:
+        if parameters is None:
             return None
 
-        excluded_parameters = ["self", "cls"]
-        arguments = split_by_commas(arguments)
-
-        log.debug("arguments: %s", arguments)
-
-        for index, argument in enumerate(arguments):
-            if index == 0 and argument in excluded_parameters:
-                continue
-
-            argument_type = "keyword_arguments" if "=" in argument else "arguments"
-
-            if argument[0] == "*":
-                argument = argument[1:]
-                hints[argument] = f"Tuple[{hints[argument]}]"
-
-            params = self.process_variable(argument, hints)
-            parsed_arguments[argument_type].append(params)
-
-        return parsed_arguments
+        return build_arguments(parameters, self.guess_type)
 
-    def parse_returns(self, contents: str):
+    def parse_returns(
+        self,
+        contents: str,
+        line: Optional[str] = None,
+        body: Optional[BodySummary] = None,
+    ):
         """Find the first instances of returning in the definition.
 
         Parses through the whole definition for occurrances of the keyword `return`,
@@ -681,20 +814,27 @@ class PythonParser:
         Arguments:
             contents {str} -- contents of the definition
 
+        Keyword Arguments:
+            line {str} -- definition line, to read the return annotation from
+                instead of the contents (default: {None})
+            body {BodySummary} -- Already analyzed contents (default: {None})
+
         Returns:
-            {tuple} -- type of return and a dict for the return value type
+            {tuple} -- type of return, and the `Returns` of the value
         """
-        regex = re.compile(r"^\s*(return|yield) (\S+)", re.MULTILINE)
-        match = re.findall(regex, contents)
+        match = (body or analyze_body(contents)).exits
 
         if len(match) == 0:
             return None
 
-        hint = re.search(
-            r"^\s*def\s+\w+\(.*\)\s*->\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*:",
-            contents,
-            flags=re.DOTALL,
-        )
+        if line is not None:
+            hint = RETURN_HINT.search(line)
+        else:
+            hint = re.search(
+                r"^\s*def\s+\w+\(.*\)\s*->\s*([\w\.]+\[[^:]*\]|[\w\.]+)\s*:",
+                contents,
+                flags=re.DOTALL,
+            )
         if hint:
             hint = hint.group(1)
             log.debug(
@@ -704,11 +844,11 @@ class PythonParser:
 
         match = match[0]
         return_type = match[0] + "s"
-        return_value_type = hint or guess_type_from_value(match[1])
+        return_value_type = hint or self.guess_type(match[1])
 
-        return (return_type, {"type": return_value_type})
+        return (return_type, Returns(interned(return_value_type)))
 
-    def parse_raises(self, contents):
+    def parse_raises(self, contents, body: Optional[BodySummary] = None):
         """Find instances of raised exceptions in the definition.
 
         Parses through the whole definition for occurrances of the keyword `raise`,
@@ -717,19 +857,21 @@ class PythonParser:
         Arguments:
             contents {str} -- contents of the definition
 
+        Keyword Arguments:
+            body {BodySummary} -- Already analyzed contents (default: {None})
+
         Returns:
             {list} -- list of exception types
         """
-        regex = re.compile(r"^\s*(raise) (\w+)", re.MULTILINE)
-        match = re.findall(regex, contents)
+        match = (body or analyze_body(contents)).raises
 
         if len(match) == 0:
             return None
 
         raises = []
         for exception in match:
-            if exception[1] not in raises:
-                raises.append(exception[1])
+            if exception not in raises:
+                raises.append(exception)
 
         return raises
 
@@ -745,77 +887,126 @@ class PythonParser:
             classmethod
 
         Returns:
-            {Dictionary} Parsed valued group by type
+            {ParsedFunction} Sections of the function
         """
         if not re.match(r"^\s*(def )", line):
             log.debug("not function type")
             return None
 
-        parsed_function = []
+        # One pass over the body serves every section below
+        body = analyze_body(contents, assignments=False)
 
-        decorators = self.parse_decorators(line, contents)
+        sections: Dict[str, object] = {}
+
+        decorators = self.parse_decorators(line, contents, body)
         if len(decorators) > 0:
-            parsed_function.append(("decorators", decorators))
+            sections["decorators"] = decorators
 
-        arguments = self.parse_arguments(line)
-        if arguments is not None:
-            parsed_function.append(("arguments", arguments))
+        sections["arguments"] = self.parse_arguments(line)
 
-        returns = self.parse_returns(contents)
+        returns = self.parse_returns(contents, line, body)
         if returns is not None:
-            parsed_function.append(returns)
+            sections[returns[0]] = returns[1]
+
+        sections["raises"] = self.parse_raises(contents, body)
 
-        raises = self.parse_raises(contents)
-        if raises is not None:
-            parsed_function.append(("raises", raises))
+        parsed_function = ParsedFunction(**sections)
 
         log.debug("function -- %s", parsed_function)
 
         return parsed_function
 
-    def is_docstring_closed(self, view, position):
+    def lookup_docstring_closed(
+        self, view: TextBuffer, begin: int, line: str
+    ) -> Optional[bool]:
+        """Check if a docstring is closed, using the string table.
+
+        The docstring is closed when the string it opens is closed by a line
+        starting with quotes, on the same indentation level and before the end
+        of the enclosing definition.
+
+        Arguments:
+            view  {TextBuffer} -- Current Sublime Text View (or text buffer)
+            begin {Integer}    -- Position of the beginning of the docstring line
+            line  {String}     -- Contents of the docstring line
+
+        Returns:
+            {Bool} True if the docstring is closed, or None if the string table
+                (or definition index) is not able to tell
+        """
+        match = DOCSTRING_QUOTES.search(line)
+        if self.strings is None or match is None:
+            return None
+
+        span = self.strings.span_at(begin + match.start())
+        if span is None:
+            return None
+
+        if span.end is None:
+            return False
+
+        reader = self.get_reader(view)
+        indentation_level = reader.level(line)
+
+        # Past the top level, the string must close before its scope ends
+        if indentation_level > 0:
+            entry = self.index.entry_before(begin) if self.index else None
+            if (
+                entry is None
+                or entry.end < begin
+                or entry.body_indent is None
+                or entry.body_indent // reader.tab_size != indentation_level
+            ):
+                return None
+
+            if span.end > entry.end:
+                return False
+
+        closing_line = view.substr(view.line(span.end))
+        return reader.level(
+            closing_line
+        ) == indentation_level and closing_line.lstrip().startswith(span.quote)
+
+    @timed("is_docstring_closed")
+    def is_docstring_closed(self, view: TextBuffer, position: int):
         """Check if the current docstring is supposed to be closed.
 
         Keep reading lines until we reach the end of the file, class, or function
         We will assume that if the indentation level is ever lower than present, and no
         closing docstring has been found yet, the component has ended and needs to be closed
 
+        With a string table, this is a lookup instead.
+
         Arguments:
-            view     {sublime.View} -- Current Sublime Text View
+            view     {TextBuffer} -- Current Sublime Text View (or text buffer)
             position {Integer}      -- Position in the view where the docstring is
 
         Returns:
             {Bool} True if the docstring is confirmed closed
         """
-
-        def set_closing_string(match):
-            if match is not None:
-                s = match.group(0).strip()[0:3]
-                if s in ['"""', "'''"]:
-                    self.closing_string = s
-                else:
-                    raise Exception(
-                        "could not find closing string.  Match was: {}".format(match)
-                    )
-
-        indentation_level = view.indentation_level(position)
+        reader = self.get_reader(view)
 
         # Check the current line first, and ignore if docstring is closed on this line
-        line = view.substr(view.line(position))
+        line_region = view.line(position)
+        line = view.substr(line_region)
+        indentation_level = reader.level(line)
         match = re.search(r'^\s*(""".*"""|\'\'\'.*\'\'\')\s*$', line)
 
         if match is not None:
-            set_closing_string(match)
             return False
 
-        for current_line in read_next_line(view, position):
+        closed = self.lookup_docstring_closed(view, line_region.begin(), line)
+        if closed is not None:
+            return closed
+
+        for current_line in reader.forward(position):
             # Not an empty line
-            current_line_string = view.substr(current_line).rstrip()
+            current_line_string = current_line.rstrip()
             if not len(current_line_string):
                 continue
 
             # Not on a more indented line
-            current_indentation = view.indentation_level(current_line.end())
+            current_indentation = reader.level(current_line_string)
             if current_indentation > indentation_level:
                 continue
 
@@ -826,28 +1017,6 @@ class PythonParser:
             # Line only contains whitespace and """
             match = re.search(r'^\s*("""|\'\'\')', current_line_string)
             if match is not None:
-                set_closing_string(match)
                 return True
 
-        set_closing_string(re.search(r'^\s*("""|\'\'\')', line))
         return False
-
-
-def get_parser(view: sublime.View) -> Optional[PythonParser]:
-    """Return the class of the parser to use.
-
-    Arguments:
-        view {sublime.View} -- The sublime text view in which this is executing in
-
-    Returns:
-        {PythonParser} or None if the current file type isn't a python file
-    """
-    scope = view.scope_name(view.sel()[0].end())
-    res = re.search(r"\bsource\.([a-z+\-]+)", scope)
-    source_lang = res.group(1) if res else "js"
-    view_settings = view.settings()
-
-    if source_lang == "python":
-        return PythonParser(view_settings)
-
-    return None
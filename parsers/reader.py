@@ -0,0 +1,130 @@
+"""Read whole lines of a buffer in bulk.
+
+In the plugin host every `view.line()`, `view.substr()` and
+`view.indentation_level()` call is a round trip to the editor. `LineReader`
+fetches large chunks of text with a single `substr` each, and splits lines and
+measures their indentation in Python instead.
+"""
+from typing import Iterator, List
+
+from .buffer import TextBuffer, indentation_columns
+
+try:
+    from sublime import Region
+except ImportError:
+    from .buffer import Region
+
+# Characters fetched by the first read in either direction, grown 4x per read
+CHUNK_SIZE = 16384
+
+
+class LineReader:
+    """Bulk line reader over a text buffer.
+
+    Indentation is measured the way `view.indentation_level()` does, with tabs
+    advancing to the next tab stop. `translate_tabs_to_spaces` only affects
+    what the editor inserts, so lines are measured the same either way.
+
+    Arguments:
+        view {TextBuffer} -- The sublime view (or text buffer) to read from
+
+    Keyword Arguments:
+        tab_size {int} -- Width of an indentation level (default: {4})
+        chunk_size {int} -- Characters fetched by the first read
+            (default: {CHUNK_SIZE})
+    """
+
+    def __init__(self, view: TextBuffer, tab_size: int = 4, chunk_size=CHUNK_SIZE):
+        """---."""
+        self.view = view
+        self.tab_size = tab_size
+        self.chunk_size = chunk_size
+
+    def level(self, line: str) -> int:
+        """Return the indentation level of a line."""
+        content = line.lstrip(" ")
+        if content[:1] != "\t":
+            return (len(line) - len(content)) // self.tab_size
+
+        return indentation_columns(line, 0, self.tab_size) // self.tab_size
+
+    def lines(self, begin: int, end: int) -> List[str]:
+        """Return the lines of a region, with a single read.
+
+        Arguments:
+            begin {int} -- Offset of the beginning of the first line
+            end {int} -- Offset of the end of the last line
+
+        Returns:
+            list -- Lines of the region, without line endings
+        """
+        if end <= begin:
+            return []
+
+        return self.view.substr(Region(begin, end)).split("\n")
+
+    def forward(self, position: int) -> Iterator[str]:
+        """Yield the lines following the line holding `position`.
+
+        Arguments:
+            position {int} -- Offset in the buffer
+
+        Yields:
+            str -- The next line, without its line ending
+        """
+        size = self.chunk_size
+        begin = position
+        partial = None
+        while True:
+            chunk = self.view.substr(Region(begin, begin + size))
+            last = len(chunk) < size
+            begin += len(chunk)
+            size *= 4
+
+            lines = chunk.split("\n")
+            if partial is None:
+                # the rest of the line holding the position
+                if len(lines) == 1 and not last:
+                    continue
+                lines = lines[1:]
+            else:
+                lines[0] = partial + lines[0]
+
+            if last:
+                yield from lines
+                return
+
+            partial = lines.pop()
+            yield from lines
+
+    def backward(self, position: int) -> Iterator[str]:
+        """Yield the lines preceding the line holding `position`, bottom up.
+
+        Arguments:
+            position {int} -- Offset in the buffer
+
+        Yields:
+            str -- The previous line, without its line ending
+        """
+        size = self.chunk_size
+        end = position
+        partial = None
+        while end > 0:
+            begin = max(0, end - size)
+            chunk = self.view.substr(Region(begin, end))
+            end = begin
+            size *= 4
+
+            lines = chunk.split("\n")
+            if partial is None:
+                # the beginning of the line holding the position
+                if len(lines) == 1 and begin > 0:
+                    continue
+                lines.pop()
+            else:
+                lines[-1] += partial
+
+            if begin > 0:
+                partial = lines.pop(0)
+
+            yield from reversed(lines)
@@ -0,0 +1,210 @@
+"""Types of the output of `PythonParser.parse`.
+
+A parsed definition iterates over its `(section, attributes)` pairs, in the
+order the formatters write them, skipping the sections it does not have, so
+that it can be rendered like the sections of a docstring read back.
+
+Parse results are held by the thousand in batch runs, so they are slotted
+objects and named tuples rather than dicts, and the names and types they hold
+are interned: the same few names and types repeat across a repository.
+"""
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Type
+
+# Sections holding a list of names
+NAME_SECTIONS = ("decorators", "extends", "raises")
+
+
+def interned(text: Optional[str]) -> Optional[str]:
+    """Intern a string, if there is one."""
+    return None if text is None else sys.intern(text)
+
+
+class Param(NamedTuple):
+    """An argument or attribute.
+
+    Attributes:
+        name {str} -- Name, without the stars of variadic arguments. Only the
+            names read back from a docstring keep the stars written there
+        type {str} -- Type hint, or guessed type
+        default {str} -- Text of the default value, None without one
+    """
+
+    name: str
+    type: Optional[str] = None
+    default: Optional[str] = None
+
+
+def param(
+    name: str, type: Optional[str] = None, default: Optional[str] = None
+) -> Param:
+    """Make a parameter, interning its name and type.
+
+    Arguments:
+        name {str} -- Name, without the stars of variadic arguments
+
+    Keyword Arguments:
+        type {str} -- Type hint, or guessed type (default: {None})
+        default {str} -- Text of the default value (default: {None})
+
+    Returns:
+        Param -- The parameter
+    """
+    return Param(sys.intern(name), interned(type), default)
+
+
+class Arguments(NamedTuple):
+    """Arguments of a function, in order.
+
+    Attributes:
+        arguments {list} -- Parameters without a default
+        keyword_arguments {list} -- Parameters with a default
+    """
+
+    arguments: List[Param]
+    keyword_arguments: List[Param]
+
+
+class Returns(NamedTuple):
+    """A returned or yielded value.
+
+    Attributes:
+        type {str} -- Type hint, or guessed type
+    """
+
+    type: Optional[str]
+
+
+class Parsed:
+    """Base of the parsed definitions, with one slot for each section.
+
+    A slot is None when the definition has no such section. Lists of names are
+    interned as the result is built.
+
+    Keyword Arguments:
+        **sections -- Attributes of each section the definition has
+    """
+
+    __slots__: Tuple[str, ...] = ()
+    kind = ""
+
+    def __init__(self, **sections: Any):
+        """---."""
+        for section in self.__slots__:
+            value = sections.get(section)
+            if value is not None and section in NAME_SECTIONS:
+                value = [sys.intern(name) for name in value]
+            setattr(self, section, value)
+
+    def __iter__(self) -> Iterator[Tuple[str, Any]]:
+        """Yield the `(section, attributes)` pairs the definition has."""
+        for section in self.__slots__:
+            value = getattr(self, section)
+            if value is not None:
+                yield section, value
+
+    def __len__(self) -> int:
+        """---."""
+        return sum(1 for _ in self)
+
+    def __eq__(self, other: object) -> bool:
+        """---."""
+        if type(other) is not type(self):
+            return NotImplemented
+
+        return all(
+            getattr(self, section) == getattr(other, section)
+            for section in self.__slots__
+        )
+
+    __hash__ = None  # type: ignore
+
+    def __repr__(self) -> str:
+        """---."""
+        return "{}({})".format(
+            type(self).__name__,
+            ", ".join("{}={!r}".format(section, value) for section, value in self),
+        )
+
+
+class ParsedModule(Parsed):
+    """A parsed module.
+
+    Attributes:
+        attributes {list} -- Module level variables, as `Param`
+    """
+
+    __slots__ = ("attributes",)
+    kind = "module"
+
+
+class ParsedClass(Parsed):
+    """A parsed class.
+
+    Attributes:
+        extends {list} -- Names of the base classes
+        attributes {list} -- Class variables, as `Param`
+    """
+
+    __slots__ = ("extends", "attributes")
+    kind = "class"
+
+
+class ParsedFunction(Parsed):
+    """A parsed function.
+
+    At most one of `returns` and `yields` is set, after the first exit of the
+    function.
+
+    Attributes:
+        decorators {list} -- Names of the decorators
+        arguments {Arguments} -- Arguments of the function
+        returns {Returns} -- Returned value
+        yields {Returns} -- Yielded values
+        raises {list} -- Names of the raised exceptions
+    """
+
+    __slots__ = ("decorators", "arguments", "returns", "yields", "raises")
+    kind = "function"
+
+
+KINDS: Dict[str, Type[Parsed]] = {
+    parsed.kind: parsed for parsed in (ParsedModule, ParsedClass, ParsedFunction)
+}
+
+
+def dump(parsed: Parsed) -> list:
+    """Turn a parsed definition into plain lists, for json.
+
+    Arguments:
+        parsed {Parsed} -- Parsed definition
+
+    Returns:
+        list -- Kind of the definition, then the value of each of its slots
+    """
+    return [parsed.kind] + [getattr(parsed, section) for section in parsed.__slots__]
+
+
+def load(data: list) -> Parsed:
+    """Build a parsed definition back from the lists of `dump`.
+
+    Arguments:
+        data {list} -- Output of `dump`, read back from json
+
+    Returns:
+        Parsed -- The parsed definition
+    """
+    parsed_class = KINDS[data[0]]
+    sections: Dict[str, Any] = {}
+    for section, value in zip(parsed_class.__slots__, data[1:]):
+        if value is None:
+            continue
+        if section == "arguments":
+            value = Arguments(*([param(*item) for item in group] for group in value))
+        elif section in ("returns", "yields"):
+            value = Returns(interned(value[0]))
+        elif section == "attributes":
+            value = [param(*item) for item in value]
+        sections[section] = value
+
+    return parsed_class(**sections)
@@ -0,0 +1,251 @@
+"""Find undocumented definitions in a whole python source.
+
+The editor command works on one docstring at a time, driven by the cursor.
+Batch tooling instead needs every module, class and function in a file along
+with whether it already has a docstring, which is what this module provides.
+Parsing of each definition is still delegated to `PythonParser`, so the output
+is the same as triggering the command by hand in the editor.
+"""
+import re
+from typing import Container, Iterator, List, NamedTuple, Optional, Tuple
+
+from .buffer import StringBuffer
+from .parser import PythonParser, is_start_keyword
+from .results import Parsed
+from .strings import track_strings
+
+
+DOCSTRING_START = re.compile(r"""^[rRuUbBfF]{0,2}("|')""")
+DEFINITION_NAME = re.compile(r"^(?:async\s+)?(def|class)\s+(\w+)")
+# Characters that matter while looking for the colon ending a header
+HEADER_TOKEN = re.compile(r"[\\\"'#()\[\]{}:]")
+
+
+class Definition(NamedTuple):
+    """A module, class or function found in a source.
+
+    Attributes:
+        kind {str} -- One of `module`, `class` or `function`
+        row {int} -- Zero based row of the definition line (0 for modules)
+        body_row {int} -- Row where a docstring is (or would be) placed
+        indent {str} -- Indentation of the definition body
+        documented {bool} -- Whether the body starts with a string literal
+        name {str} -- Name of the class or function, empty for modules
+    """
+
+    kind: str
+    row: int
+    body_row: int
+    indent: str
+    documented: bool
+    name: str = ""
+
+
+def _leading_whitespace(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def _is_significant(line: str) -> bool:
+    stripped = line.strip()
+    return bool(stripped) and not stripped.startswith("#")
+
+
+def find_header_end(lines: List[str], row: int) -> Tuple[int, str]:
+    """Find the last row of a definition header.
+
+    Arguments:
+        lines {list} -- Lines of the source
+        row {int} -- Row of the `def`/`class` keyword
+
+    Returns:
+        int, str -- Last row of the header, and any code following its colon
+    """
+    depth = 0
+    quote = ""
+    for index in range(row, len(lines)):
+        line = lines[index]
+        escaped = -1
+        for match in HEADER_TOKEN.finditer(line):
+            position = match.start()
+            if position == escaped:
+                continue
+
+            char = match.group()
+            if quote:
+                if char == "\\":
+                    escaped = position + 1
+                elif char == quote:
+                    quote = ""
+            elif char in "\"'":
+                quote = char
+            elif char == "#":
+                break
+            elif char in "([{":
+                depth += 1
+            elif char in ")]}":
+                depth -= 1
+            elif char == ":" and depth == 0:
+                return index, line[position + 1 :].split("#", 1)[0].strip()
+
+    return len(lines) - 1, ""
+
+
+def _next_significant(lines: List[str], row: int) -> Optional[int]:
+    for index in range(row, len(lines)):
+        if _is_significant(lines[index]):
+            return index
+
+    return None
+
+
+def iter_definitions(lines: List[str]) -> Iterator[Definition]:
+    """Yield the module and every class or function definition in `lines`.
+
+    Definitions with their body on the same line as the header
+    (`def f(): pass`) cannot hold a docstring and are skipped.
+
+    Arguments:
+        lines {list} -- Lines of the source, without line endings
+
+    Yields:
+        Definition -- The next definition, in source order
+    """
+    first = _next_significant(lines, 0)
+    if first is not None:
+        yield Definition(
+            "module",
+            0,
+            first,
+            "",
+            bool(DOCSTRING_START.match(lines[first].lstrip())),
+        )
+
+    state = None
+    row = 0
+    while row < len(lines):
+        line = lines[row]
+        if state is not None:
+            state = track_strings(line, state)
+            row += 1
+            continue
+
+        stripped = line.lstrip()
+        if not is_start_keyword(stripped):
+            state = track_strings(line, state)
+            row += 1
+            continue
+
+        end, inline_body = find_header_end(lines, row)
+        body = _next_significant(lines, end + 1)
+        indent = _leading_whitespace(line)
+        if not inline_body and body is not None:
+            body_indent = _leading_whitespace(lines[body])
+            if len(body_indent) > len(indent):
+                match = DEFINITION_NAME.match(stripped)
+                yield Definition(
+                    "function" if match.group(1) == "def" else "class",
+                    row,
+                    body,
+                    body_indent,
+                    bool(DOCSTRING_START.match(lines[body].lstrip())),
+                    match.group(2),
+                )
+
+        row = end + 1
+
+
+def parse_undocumented(
+    text: str,
+    parser: Optional[PythonParser] = None,
+    tab_size: int = 4,
+    rows: Optional[Container[int]] = None,
+) -> List[Tuple[Definition, Parsed]]:
+    """Parse every undocumented definition of a source.
+
+    An empty `\"\"\"\"\"\"` is inserted in memory where each missing
+    docstring belongs, then `PythonParser` reads each of them exactly as the
+    editor command would after the user opened the docstring.
+
+    Arguments:
+        text {str} -- Python source, using `\\n` line endings
+
+    Keyword Arguments:
+        parser {PythonParser} -- Parser to use (default: {None})
+        tab_size {int} -- Width of an indentation level (default: {4})
+        rows {Container[int]} -- Rows of the class and function definition
+            lines to parse, instead of every undocumented definition
+            (default: {None})
+
+    Returns:
+        list -- `(definition, parsed definition)` pairs, in source order
+    """
+    parser = parser or PythonParser()
+    lines = text.split("\n")
+    undocumented = [
+        definition
+        for definition in iter_definitions(lines)
+        if not definition.documented
+        and (rows is None or definition.kind != "module" and definition.row in rows)
+    ]
+
+    if not undocumented:
+        return []
+
+    # Insert a docstring line for every missing docstring, in one pass. They
+    # are closed, so that the placeholders of nested definitions do not open
+    # a string in the body of the definitions holding them
+    rows = []
+    placeholder_lines: List[str] = []
+    start = 0
+    for definition in undocumented:
+        placeholder_lines.extend(lines[start : definition.body_row])
+        rows.append(len(placeholder_lines))
+        placeholder_lines.append(definition.indent + '""""""')
+        start = definition.body_row
+    placeholder_lines.extend(lines[start:])
+
+    buffer = StringBuffer("\n".join(placeholder_lines), tab_size)
+
+    # Every definition is read through one index of the buffer, instead of
+    # walking the buffer up to its definition line and down past its body
+    from .index import DefinitionIndex  # the index module imports this one
+
+    index, parser.index = parser.index, DefinitionIndex(buffer.text, tab_size)
+
+    results = []
+    try:
+        for definition, row in zip(undocumented, rows):
+            # right after the opening quotes, as the editor command reads it
+            position = buffer.line_region(row).end() - 3
+            line, contents = parser.read_definition(buffer, position)
+            if definition.kind == "module":
+                line = None
+
+            results.append((definition, parser.parse(line, contents)))
+    finally:
+        parser.index = index
+
+    return results
+
+
+def insert_docstrings(text: str, docstrings: List[Tuple[Definition, str]]) -> str:
+    """Insert rendered docstrings into a source.
+
+    Arguments:
+        text {str} -- Python source, using `\\n` line endings
+        docstrings {list} -- `(definition, docstring)` pairs, where the docstring
+            is already indented and includes its quotes
+
+    Returns:
+        str -- Source with the docstrings inserted above each definition body
+    """
+    lines = text.split("\n")
+    output: List[str] = []
+    start = 0
+    for definition, docstring in sorted(docstrings, key=lambda pair: pair[0].body_row):
+        output.extend(lines[start : definition.body_row])
+        output.append(docstring)
+        start = definition.body_row
+    output.extend(lines[start:])
+
+    return "\n".join(output)
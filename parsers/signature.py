@@ -0,0 +1,195 @@
+"""Linear time parsing of parameter lists.
+
+A parameter list is split in a single left-to-right scan, which jumps from one
+bracket, string literal, comma, colon or equal sign to the next and slices the
+text in between. Brackets of any depth, string literals (including triple
+quoted ones) and comments are skipped over, so commas, colons and equal signs
+in annotations, defaults and comments are never mistaken for separators.
+"""
+import re
+from functools import lru_cache
+from typing import List, NamedTuple, Optional, Tuple
+
+DEFINITION_START = re.compile(r"^\s*(?:async\s+)?def\s+\w+\s*\(")
+# String literals and comments are matched whole, so that nothing inside of
+# them is a token. The parameters of a `lambda` default are not separators either.
+TOKENS = re.compile(
+    r"""\"\"\"(?:[^"\\]|\\.|"(?!""))*(?:\"\"\"|$)"""
+    r"""|'''(?:[^'\\]|\\.|'(?!''))*(?:'''|$)"""
+    r"""|"(?:[^"\\]|\\.)*"?|'(?:[^'\\]|\\.)*'?"""
+    r"""|#[^\n]*|\blambda\b|[()\[\]{},:=]""",
+    re.DOTALL,
+)
+
+OPENING_BRACKETS = "([{"
+CLOSING_BRACKETS = ")]}"
+
+# `start`, `colon`, `equals` and `end` offsets of a comma separated segment.
+# `colon` and `equals` are -1 when the segment has none at the top level.
+Segment = Tuple[int, int, int, int]
+
+
+class Parameter(NamedTuple):
+    """A parameter of a function definition.
+
+    Attributes:
+        name {str} -- Name of the parameter, without its stars
+        annotation {str} -- Source of the type hint, or an empty string
+        default {str} -- Source of the default value, or None
+        star {str} -- `*` for variadic positional, `**` for variadic keyword
+            parameters, empty otherwise
+    """
+
+    name: str
+    annotation: str
+    default: Optional[str]
+    star: str
+
+
+def is_assignment(text: str, index: int) -> bool:
+    """Check that the `=` at `index` is not part of a comparison operator."""
+    following = text[index + 1 : index + 2]
+    preceding = text[index - 1 : index]
+    return following != "=" and preceding not in ("=", "!", "<", ">")
+
+
+def strip_comments(text: str) -> str:
+    """Remove the comments of a text, e.g. of a signature written on several lines.
+
+    Arguments:
+        text {str} -- Source text
+
+    Returns:
+        str -- The text, less everything from a `#` outside of a string literal
+            to the end of its line
+    """
+    if "#" not in text:
+        return text
+
+    return TOKENS.sub(
+        lambda match: "" if match.group().startswith("#") else match.group(), text
+    )
+
+
+def scan_segments(
+    text: str, start: int = 0, closing: Optional[str] = None
+) -> Tuple[List[Segment], int]:
+    """Split a text at its top level commas.
+
+    Arguments:
+        text {str} -- Text to split
+
+    Keyword Arguments:
+        start {int} -- Offset to start from (default: {0})
+        closing {str} -- Unmatched bracket ending the scan, e.g. the `)` of a
+            parameter list (default: {None})
+
+    Returns:
+        list, int -- Segments of the text, and the offset the scan ended at
+    """
+    segments: List[Segment] = []
+    depth = 0
+    # `lambda` keywords waiting for the colon ending their parameters
+    lambdas = 0
+    segment = start
+    colon = equals = -1
+    end = len(text)
+
+    for match in TOKENS.finditer(text, start):
+        index = match.start()
+        char = text[index]
+
+        if char in OPENING_BRACKETS:
+            depth += 1
+        elif char in CLOSING_BRACKETS:
+            if depth > 0:
+                depth -= 1
+            elif char == closing:
+                end = index
+                break
+        elif depth > 0 or char == '"' or char == "'" or char == "#":
+            continue
+        elif char == "l":
+            lambdas += 1
+        elif lambdas > 0:
+            if char == ":":
+                lambdas -= 1
+        elif char == ",":
+            segments.append((segment, colon, equals, index))
+            segment = index + 1
+            colon = equals = -1
+        elif char == ":":
+            if colon == -1 and equals == -1:
+                colon = index
+        elif equals == -1 and is_assignment(text, index):
+            equals = index
+
+    segments.append((segment, colon, equals, end))
+    return segments, end
+
+
+def split_segments(text: str) -> List[str]:
+    """Split a text at its top level commas, dropping empty pieces.
+
+    Arguments:
+        text {str} -- Text to split
+
+    Returns:
+        list -- Stripped pieces of the text
+    """
+    text = strip_comments(text)
+    segments, _ = scan_segments(text)
+    pieces = (text[start:end].strip() for start, _, _, end in segments)
+    return [piece for piece in pieces if piece]
+
+
+@lru_cache(maxsize=256)
+def parse_signature(line: str) -> Optional[Tuple[Parameter, ...]]:
+    """Parse the parameters of a function definition line.
+
+    Results are cached by definition text, so triggering the command again on
+    the same definition does not parse it again. Callers should strip the line
+    first, so that the same definition always hits the same cache entry.
+
+    Arguments:
+        line {str} -- Definition line, possibly joined from several lines
+
+    Returns:
+        tuple -- Parameters in order, without the bare `*` and `/` markers, or
+            None if the line is not a function definition
+    """
+    line = strip_comments(line)
+    match = DEFINITION_START.match(line)
+    if match is None:
+        return None
+
+    segments, _ = scan_segments(line, match.end(), ")")
+
+    parameters: List[Parameter] = []
+    for start, colon, equals, end in segments:
+        if colon != -1:
+            name_end = colon
+        elif equals != -1:
+            name_end = equals
+        else:
+            name_end = end
+
+        name = line[start:name_end].strip()
+        annotation = ""
+        if colon != -1:
+            annotation = line[colon + 1 : end if equals == -1 else equals].strip()
+        default = None if equals == -1 else line[equals + 1 : end].strip()
+
+        star = ""
+        if name.startswith("**"):
+            star, name = "**", name[2:].strip()
+        elif name.startswith("*"):
+            star, name = "*", name[1:].strip()
+
+        # empty pieces, keyword-only and positional-only markers
+        if not name or name == "/":
+            continue
+
+        parameters.append(Parameter(name, annotation, default, star))
+
+    return tuple(parameters)
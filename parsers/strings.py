@@ -0,0 +1,252 @@
+"""Table of the triple quoted strings of a buffer.
+
+Pressing enter after an opening quote asks whether that docstring is already
+closed, which is the most frequent trigger of the plugin. With a table of
+every triple quoted string, this is a binary search for the string opened on
+the current line instead of a scan of the rest of its scope.
+
+Edits are applied lazily: the strings following an edit are shifted, and the
+text is tokenized again from the edit on, until the tokenizer opens a string
+where the previous table also did. From there on both tables agree.
+"""
+import re
+from bisect import bisect_left
+from typing import List, NamedTuple, Optional, Tuple
+
+from ..utils.log import child_logger
+from .buffer import TextBuffer
+
+try:
+    from sublime import Region
+except ImportError:
+    from .buffer import Region
+
+log = child_logger(__name__)
+
+# Tokens outside of strings. Single quoted strings and comments are matched so
+# that quotes inside of them are skipped; they end with their line.
+OUTSIDE_TOKENS = re.compile(
+    r"""\#[^\n]*|\"\"\"|'''|"(?:[^"\\\n]|\\.)*"?|'(?:[^'\\\n]|\\.)*'?"""
+)
+
+# Characters read past the edited region, grown 4x until the tables agree
+CHUNK_SIZE = 16384
+
+
+class StringSpan(NamedTuple):
+    """A triple quoted string.
+
+    Attributes:
+        start {int} -- Offset of the opening quotes
+        end {int} -- Offset following the closing quotes, or None if the string
+            is not closed
+        quote {str} -- Either `\"\"\"` or `'''`
+    """
+
+    start: int
+    end: Optional[int]
+    quote: str
+
+
+def find_closing(text: str, quote: str, position: int) -> Optional[int]:
+    """Find the end of the closing quotes of a triple quoted string.
+
+    Arguments:
+        text {str} -- Text holding the string
+        quote {str} -- Delimiter of the string
+        position {int} -- Offset following the opening quotes
+
+    Returns:
+        int -- Offset following the closing quotes, or None
+    """
+    index = text.find(quote, position)
+    while index != -1:
+        escapes = 0
+        while index - escapes > position and text[index - escapes - 1] == "\\":
+            escapes += 1
+        if escapes % 2 == 0:
+            return index + len(quote)
+        index = text.find(quote, index + 1)
+
+    return None
+
+
+def scan_strings(text: str, base: int = 0) -> List[StringSpan]:
+    """List the triple quoted strings of a text.
+
+    Arguments:
+        text {str} -- Text to tokenize, starting outside of any string
+
+    Keyword Arguments:
+        base {int} -- Offset of the text in the buffer (default: {0})
+
+    Returns:
+        list -- Strings in source order. Only the last one may be unclosed
+    """
+    spans: List[StringSpan] = []
+    position = 0
+    while True:
+        match = OUTSIDE_TOKENS.search(text, position)
+        if match is None:
+            break
+
+        token = match.group(0)
+        if token != '"""' and token != "'''":
+            position = match.end()
+            continue
+
+        end = find_closing(text, token, match.end())
+        if end is None:
+            spans.append(StringSpan(base + match.start(), None, token))
+            break
+
+        spans.append(StringSpan(base + match.start(), base + end, token))
+        position = end
+
+    return spans
+
+
+def track_strings(line: str, state: Optional[str]) -> Optional[str]:
+    """Follow the triple quoted strings opening and closing on a line.
+
+    Unlike `analyzer.track_triple_quotes`, quotes inside of comments, single
+    quoted strings and escapes are skipped, the way `scan_strings` does.
+
+    Arguments:
+        line {str} -- Line to inspect
+        state {str} -- Open triple quote delimiter before the line, or None
+
+    Returns:
+        str -- Open triple quote delimiter after the line, or None
+    """
+    position = 0
+    while True:
+        if state is not None:
+            end = find_closing(line, state, position)
+            if end is None:
+                return state
+            state, position = None, end
+
+        match = OUTSIDE_TOKENS.search(line, position)
+        if match is None:
+            return None
+
+        token = match.group(0)
+        if token == '"""' or token == "'''":
+            state = token
+        position = match.end()
+
+
+class StringTable:
+    """Triple quoted strings of a buffer, sorted by offset.
+
+    Arguments:
+        text {str} -- Contents of the buffer
+
+    Keyword Arguments:
+        version {int} -- Change count of the buffer the text was read at
+            (default: {None})
+    """
+
+    def __init__(self, text: str, version: Optional[int] = None):
+        """---."""
+        self.version = version
+        self.spans = scan_strings(text)
+        self.starts = [span.start for span in self.spans]
+        # edited region, waiting for `refresh`
+        self.dirty: Optional[Tuple[int, int]] = None
+
+    def span_at(self, position: int) -> Optional[StringSpan]:
+        """Find the string opened at `position`.
+
+        Arguments:
+            position {int} -- Offset of the opening quotes
+
+        Returns:
+            StringSpan -- The string, or None if no string opens there
+        """
+        assert self.dirty is None, "the table must be refreshed first"
+
+        index = bisect_left(self.starts, position)
+        if index < len(self.spans) and self.starts[index] == position:
+            return self.spans[index]
+
+        return None
+
+    def apply_change(self, begin: int, end: int, length: int):
+        """Account for an edit replacing `begin`-`end` with `length` characters.
+
+        Strings starting after the edit are shifted. `refresh` must then be
+        called to tokenize the edited region once the buffer holds the new text.
+
+        Arguments:
+            begin {int} -- Offset where the replaced text started
+            end {int} -- Offset where the replaced text ended
+            length {int} -- Length of the inserted text
+        """
+        delta = length - (end - begin)
+
+        first = bisect_left(self.starts, begin)
+        last = bisect_left(self.starts, end)
+        shifted = [
+            StringSpan(span.start + delta, span.end and span.end + delta, span.quote)
+            for span in self.spans[last:]
+        ]
+        self.spans[first:] = shifted
+        self.starts = [span.start for span in self.spans]
+
+        stop = begin + length
+        if self.dirty is not None:
+            dirty_begin, dirty_end = self.dirty
+            if dirty_end > begin:
+                dirty_end = max(begin, dirty_end + delta)
+            begin = min(begin, dirty_begin)
+            stop = max(stop, dirty_end)
+        self.dirty = (begin, stop)
+
+    def refresh(self, view: TextBuffer):
+        """Tokenize the region edited since the last refresh.
+
+        Arguments:
+            view {TextBuffer} -- Buffer holding the text after the edits
+        """
+        if self.dirty is None:
+            return
+
+        begin, stop = self.dirty
+        self.dirty = None
+
+        # Start from the string holding the edit, if any, or from its line
+        index = bisect_left(self.starts, begin) - 1
+        if index >= 0 and (self.spans[index].end or begin + 1) > begin:
+            start = self.spans[index].start
+        else:
+            start = view.line(begin).begin()
+            if index >= 0:
+                start = max(start, self.spans[index].end)
+            index += 1
+
+        size = stop - start + CHUNK_SIZE
+        while True:
+            text = view.substr(Region(start, start + size))
+            spans = scan_strings(text, start)
+            complete = len(text) < size
+
+            for position, span in enumerate(spans):
+                if span.start < stop:
+                    continue
+                # the previous table opened a string at the same place
+                resync = bisect_left(self.starts, span.start, index)
+                if resync < len(self.starts) and self.starts[resync] == span.start:
+                    self.spans[index:] = spans[:position] + self.spans[resync:]
+                    break
+            else:
+                if not complete:
+                    size *= 4
+                    continue
+                self.spans[index:] = spans
+
+            break
+
+        self.starts = [span.start for span in self.spans]
+        log.debug("tokenized strings from %s to %s", start, start + len(text))
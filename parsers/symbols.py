@@ -0,0 +1,308 @@
+"""On-disk index of the classes, functions and constants of a project.
+
+Types guessed from the text of a value only cover literals. With an index of
+the project, a value naming a constant, calling an annotated function or
+instantiating a class gets the type it refers to, and base classes get the
+module they are defined in.
+
+The index is a SQLite database. Files are parsed with `ast` when they are
+first indexed, and again only when their size or modification time changes,
+so that looking a name up while writing a docstring is a single indexed query
+instead of a parse of other files.
+"""
+import ast
+import os
+import re
+import threading
+from typing import Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from ..utils.log import child_logger
+from .ast_parser import ParsedSource
+from .parser import guess_type_from_value
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None  # type: ignore
+
+log = child_logger(__name__)
+
+# Bumped whenever the tables, or what is extracted from a file, change
+SCHEMA_VERSION = 1
+
+SCHEMA = (
+    "CREATE TABLE files (path TEXT PRIMARY KEY, mtime REAL, size INTEGER)",
+    "CREATE TABLE symbols (name TEXT, kind TEXT, module TEXT, type TEXT, path TEXT)",
+    "CREATE INDEX symbols_name ON symbols (name)",
+    "CREATE INDEX symbols_path ON symbols (path)",
+)
+
+# A name or an attribute, possibly called: `TIMEOUT`, `make_client(url)`
+REFERENCE = re.compile(r"^([A-Za-z_][\w.]*)\s*(\(.*\))?$", re.DOTALL)
+
+FUNCTION_NODES = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+
+class Symbol(NamedTuple):
+    """A top level definition of a module.
+
+    Attributes:
+        name {str} -- Name of the class, function or constant
+        kind {str} -- One of `class`, `function` or `constant`
+        module {str} -- Dotted name of the module defining it
+        type {str} -- Type of the constant, return annotation of the function,
+            or name of the class
+    """
+
+    name: str
+    kind: str
+    module: str
+    type: Optional[str]
+
+
+def module_name(path: str, root: str) -> str:
+    """Return the dotted name of a module, relative to the project folder.
+
+    Arguments:
+        path {str} -- Path of the python file
+        root {str} -- Folder of the project holding it
+
+    Returns:
+        str -- Dotted module name, without `__init__`
+    """
+    parts = os.path.splitext(os.path.relpath(path, root))[0].split(os.sep)
+    if parts[-1] == "__init__" and len(parts) > 1:
+        parts.pop()
+
+    return ".".join(parts)
+
+
+def extract_symbols(source: str, module: str) -> List[Symbol]:
+    """List the classes, annotated functions and typed constants of a source.
+
+    Arguments:
+        source {str} -- Python source
+        module {str} -- Dotted name of its module
+
+    Returns:
+        list -- Top level symbols in source order
+
+    Raises:
+        SyntaxError -- If the source does not parse
+    """
+    parsed = ParsedSource(ast.parse(source), source)
+    symbols = []
+    for node in parsed.node.body:
+        if isinstance(node, ast.ClassDef):
+            symbols.append(Symbol(node.name, "class", module, node.name))
+        elif isinstance(node, FUNCTION_NODES) and node.returns is not None:
+            returns = parsed.segment(node.returns)
+            symbols.append(Symbol(node.name, "function", module, returns))
+        elif isinstance(node, ast.AnnAssign) and isinstance(node.target, ast.Name):
+            annotation = parsed.segment(node.annotation)
+            symbols.append(Symbol(node.target.id, "constant", module, annotation))
+        elif isinstance(node, ast.Assign):
+            value_type = guess_type_from_value(parsed.segment(node.value))
+            if value_type is None:
+                continue
+            symbols.extend(
+                Symbol(target.id, "constant", module, value_type)
+                for target in node.targets
+                if isinstance(target, ast.Name)
+            )
+
+    return symbols
+
+
+class SymbolIndex:
+    """Symbols of the python files of a project, kept in a SQLite database.
+
+    The connection is shared between the thread indexing the project and the
+    threads generating docstrings, one query at a time.
+
+    Arguments:
+        path {str} -- Path of the database, `:memory:` for a transient index
+    """
+
+    def __init__(self, path: str):
+        """---."""
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        # The index can always be built again, so writes are not synced to disk
+        self.connection.execute("PRAGMA synchronous = OFF")
+
+        with self.lock, self.connection:
+            version = self.connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self.connection.execute("DROP TABLE IF EXISTS files")
+                self.connection.execute("DROP TABLE IF EXISTS symbols")
+                for statement in SCHEMA:
+                    self.connection.execute(statement)
+                self.connection.execute("PRAGMA user_version = %d" % SCHEMA_VERSION)
+
+    def close(self):
+        """Close the database."""
+        with self.lock:
+            self.connection.close()
+
+    def update_file(self, path: str, module: str) -> bool:
+        """Index a file again, if it changed since it was last indexed.
+
+        Arguments:
+            path {str} -- Path of the python file
+            module {str} -- Dotted name of its module
+
+        Returns:
+            bool -- Whether the file was parsed
+        """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.remove_files([path])
+            return False
+
+        with self.lock:
+            known = self.connection.execute(
+                "SELECT mtime, size FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if known == (stat.st_mtime, stat.st_size):
+            return False
+
+        # Parsed outside of the lock, which is only held while writing
+        try:
+            with open(path, "rb") as file:
+                symbols = extract_symbols(file.read().decode("utf-8"), module)
+        except (OSError, UnicodeDecodeError, SyntaxError, ValueError) as error:
+            log.debug("could not index %s: %s", path, error)
+            symbols = []
+
+        with self.lock, self.connection:
+            self.connection.execute("DELETE FROM symbols WHERE path = ?", (path,))
+            self.connection.executemany(
+                "INSERT INTO symbols VALUES (?, ?, ?, ?, ?)",
+                [symbol + (path,) for symbol in symbols],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?)",
+                (path, stat.st_mtime, stat.st_size),
+            )
+
+        return True
+
+    def update(self, files: Iterable[Tuple[str, str]]) -> int:
+        """Bring the whole index up to date with the files of the project.
+
+        Files indexed before but missing from `files` are dropped.
+
+        Arguments:
+            files {iterable} -- `(path, module)` of every python file
+
+        Returns:
+            int -- Number of files parsed
+        """
+        seen: Set[str] = set()
+        parsed = 0
+        for path, module in files:
+            seen.add(path)
+            parsed += self.update_file(path, module)
+
+        with self.lock:
+            rows = self.connection.execute("SELECT path FROM files").fetchall()
+        known = [row[0] for row in rows]
+        self.remove_files([path for path in known if path not in seen])
+
+        log.debug("indexed the symbols of %s file(s), %s parsed", len(seen), parsed)
+        return parsed
+
+    def remove_files(self, paths: List[str]):
+        """Drop the symbols of files.
+
+        Arguments:
+            paths {list} -- Paths of the files
+        """
+        with self.lock, self.connection:
+            for path in paths:
+                self.connection.execute("DELETE FROM symbols WHERE path = ?", (path,))
+                self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def lookup(self, name: str, kinds: Tuple[str, ...]) -> List[Tuple[str, str, str]]:
+        """Find the symbols of a name.
+
+        Arguments:
+            name {str} -- Name of the symbol, without its module
+            kinds {tuple} -- Kinds of symbol to look for
+
+        Returns:
+            list -- `(module, type, path)` of each symbol, none if the database
+                cannot be read
+        """
+        query = "SELECT module, type, path FROM symbols WHERE name = ? AND kind IN ({})"
+        try:
+            with self.lock:
+                return self.connection.execute(
+                    query.format(", ".join("?" * len(kinds))), (name,) + kinds
+                ).fetchall()
+        except sqlite3.Error as error:
+            log.warning("could not look %s up: %s", name, error)
+            return []
+
+
+class ProjectSymbols:
+    """Symbols of a project, as seen from one of its files.
+
+    Arguments:
+        index {SymbolIndex} -- Index of the project
+
+    Keyword Arguments:
+        path {str} -- Path of the file being documented (default: {None})
+    """
+
+    def __init__(self, index: SymbolIndex, path: Optional[str] = None):
+        """---."""
+        self.index = index
+        self.path = path
+
+    def type_of(self, value: Optional[str]) -> Optional[str]:
+        """Resolve the type of a value naming, or calling, a project symbol.
+
+        Arguments:
+            value {str} -- Text of the value
+
+        Returns:
+            str -- Type of the constant, return annotation of the function or
+                name of the instantiated class, if the name is defined once in
+                the project, or with a single type
+        """
+        match = REFERENCE.match(value.strip()) if value else None
+        if match is None:
+            return None
+
+        name = match.group(1).rsplit(".", 1)[-1]
+        if match.group(2) is None:
+            kinds: Tuple[str, ...] = ("constant",)
+        else:
+            kinds = ("class", "function")
+
+        types = {value_type for _, value_type, _ in self.index.lookup(name, kinds)}
+        return types.pop() if len(types) == 1 else None
+
+    def qualify(self, name: str) -> str:
+        """Prefix the name of a base class with the module defining it.
+
+        Arguments:
+            name {str} -- Name of the class, as written in the class line
+
+        Returns:
+            str -- Dotted path of the class, or the name as written if the
+                class is already qualified, defined in the documented file,
+                or not defined exactly once in the project
+        """
+        if not re.match(r"^\w+$", name):
+            return name
+
+        classes = self.index.lookup(name, ("class",))
+        if len(classes) != 1 or classes[0][2] == self.path:
+            return name
+
+        return "{}.{}".format(classes[0][0], name)
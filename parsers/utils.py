@@ -0,0 +1,65 @@
+"""Common Utilities for the parsers."""
+import re
+from typing import TYPE_CHECKING, Dict, Optional, Type
+
+from ..utils.log import child_logger
+from .ast_parser import AstPythonParser
+from .parser import PythonParser
+
+if TYPE_CHECKING:
+    import sublime
+
+log = child_logger(__name__)
+
+PARSER_DICT: Dict[str, Type[PythonParser]] = {
+    "regex": PythonParser,
+    "ast": AstPythonParser,
+}
+
+
+def get_parser_class(name: Optional[str]) -> Type[PythonParser]:
+    """Return the requested parser engine by name from the registry.
+
+    If it doesn't exist, the regex based `PythonParser` will be used instead.
+
+    Arguments:
+        name {str} -- Friendly name of the parser engine
+
+    Returns:
+        parsers.parser.PythonParser -- Class of the parser engine
+    """
+    parser = PARSER_DICT.get(name or "regex", None)
+
+    if not parser:
+        log.warning(
+            "parser `{}` doesn't exist, defaulting to `regex` parser.".format(name)
+        )
+
+        parser = PythonParser
+
+    return parser
+
+
+def get_parser(
+    view: "sublime.View", engine: Optional[str] = None
+) -> Optional[PythonParser]:
+    """Return the class of the parser to use.
+
+    Arguments:
+        view {sublime.View} -- The sublime text view in which this is executing in
+
+    Keyword Arguments:
+        engine {str} -- Name of the parser engine, `regex` or `ast` (default: {None})
+
+    Returns:
+        {PythonParser} or None if the current file type isn't a python file
+    """
+    scope = view.scope_name(view.sel()[0].end())
+    res = re.search(r"\bsource\.([a-z+\-]+)", scope)
+    source_lang = res.group(1) if res else "js"
+    view_settings = view.settings()
+
+    if source_lang == "python":
+        return get_parser_class(engine)(view_settings)
+
+    return None
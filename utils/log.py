@@ -7,8 +7,15 @@
 # @Modified:  2022-08-30 08:43:01
 
 import os
+import copy
 import logging
-import sublime
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+try:
+    import sublime
+except ImportError:  # running outside of Sublime Text, e.g. headless tooling
+    sublime = None
 
 from typing import Dict, Optional, Literal, Tuple
 from datetime import datetime
@@ -112,29 +119,36 @@ class Formatter(logging.Formatter):
         if self.usesTime():
             record.asctime = self.formatTime(record, self.datefmt)
 
-        msg = record.msg % record.args if record.args else record.msg
-
-        return (
+        message = (
             self.__level(record.levelname)
             + self.__time(record)
             + self.__name(record)
             + self.__position(record)
             + self.__connector
-            + msg
+            + record.message
         )
 
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            message += "\n" + record.exc_text
+
+        return message
+
 
 def log_level() -> int:
     """Get the log level.
 
-    Returns `DEBUG` in debug mode, `INFO` otherwise.
+    Returns `DEBUG` in debug mode, `INFO` otherwise. Outside of Sublime Text
+    only warnings and errors are reported.
 
     Returns:
         int: log level
     """
+    if sublime is None:
+        return logging.WARNING
+
     current_path = os.path.abspath(os.path.dirname(__file__))
-    print(current_path)
-    print(sublime.installed_packages_path())
     return (
         logging.INFO
         if current_path.startswith(sublime.installed_packages_path())
@@ -170,6 +184,26 @@ def file_handler():
     return handler
 
 
+class RecordQueueHandler(QueueHandler):
+    """Queue records as they are, to be formatted by the listener's handlers.
+
+    `QueueHandler.prepare` formats the message, arguments and traceback of a
+    record on the thread logging it, which is the very work the queue is meant
+    to move off of it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # a copy, as the listener's handlers set `message` and `exc_text` on
+        # the records they format, while other handlers may be reading them
+        return copy.copy(record)
+
+
+# Writes the records of the package to its handlers, on a background thread
+__listener: Optional[QueueListener] = None
+# Whether `get_logger` set up the package logger
+__configured = False
+
+
 def get_logger():
     """Get the root logger of the package.
 
@@ -181,25 +215,60 @@ def get_logger():
     When debugging, you can read the color log through
     `tail -f` (unix-like) or `Get-Content -Wait -Path` (Windows).
 
+    Records are only queued by the thread that logs them. Formatting and
+    writing them happens on the thread of a `QueueListener`, so that logging
+    never blocks the editor on file I/O.
+
+    Nothing is set up when the package is imported: this runs from
+    `plugin_loaded`, and only once. Until then, the package logger only passes
+    warnings and errors to python's last resort handler.
+
     Returns:
         Logger: the instance of `logging.Logger`
     """
+    global __listener, __configured
+
     # 如果不传入 name 则会返回 root logger，以后可通过 loggine.Logger 创建 logger 实例
     logger = logging.getLogger(LOGGER_NAME)
+    if __configured:
+        return logger
+
+    __configured = True
+
+    # the module is imported again when the plugin is reloaded
+    for handler in logger.handlers[:]:
+        logger.removeHandler(handler)
 
     level = log_level()
 
+    handlers = []
     if level == logging.DEBUG:
-        logger.addHandler(stream_handler())
+        handlers.append(stream_handler())
 
-    logger.addHandler(file_handler())
+    if sublime is not None:
+        handlers.append(file_handler())
+
+    if handlers:
+        records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        logger.addHandler(RecordQueueHandler(records))
+        __listener = QueueListener(records, *handlers, respect_handler_level=True)
+        __listener.start()
 
     logger.setLevel(level)
 
     return logger
 
 
-__logger = get_logger()
+def stop_logging():
+    """Write the queued records and stop the background thread, if any."""
+    global __listener, __configured
+
+    __configured = False
+    if __listener is not None:
+        __listener.stop()
+        for handler in __listener.handlers:
+            handler.close()
+        __listener = None
 
 
 def child_logger(name: str) -> logging.Logger:
@@ -211,6 +280,6 @@ def child_logger(name: str) -> logging.Logger:
     Returns:
         Logger: the instance of `logging.Logger`
     """
-    log = __logger.getChild(name.replace(f"{LOGGER_NAME}.", ""))
+    log = logging.getLogger(LOGGER_NAME).getChild(name.replace(f"{LOGGER_NAME}.", ""))
 
     return log
@@ -0,0 +1,129 @@
+"""Optional latency recording of the phases of the command.
+
+Timed functions check `timings.enabled` on every call, and are otherwise
+called straight through. When enabled, the latency of each call is kept in a
+bounded ring buffer per phase, from which `Timings.histogram` reports.
+"""
+import time
+from collections import deque
+from functools import wraps
+from typing import Callable, Deque, Dict, List, TypeVar
+
+F = TypeVar("F", bound=Callable)
+
+# Upper bounds of the histogram buckets, in milliseconds
+BUCKETS = (0.1, 0.3, 1, 3, 10, 30, 100, 300, 1000)
+BAR_WIDTH = 40
+
+
+class Timings:
+    """Latencies of the latest calls of each phase.
+
+    Keyword Arguments:
+        size {int} -- Number of latencies kept per phase (default: {1000})
+
+    Attributes:
+        enabled {bool} -- Whether timed functions record their latency
+        samples {dict} -- Latencies in milliseconds, oldest first, by phase
+    """
+
+    def __init__(self, size: int = 1000):
+        """---."""
+        self.enabled = False
+        self.size = size
+        self.samples: Dict[str, Deque[float]] = {}
+
+    def record(self, phase: str, latency: float):
+        """Record the latency of a call, dropping the oldest one of a full buffer.
+
+        Arguments:
+            phase {str} -- Name of the phase
+            latency {float} -- Latency in milliseconds
+        """
+        samples = self.samples.get(phase)
+        if samples is None:
+            samples = self.samples[phase] = deque(maxlen=self.size)
+        samples.append(latency)
+
+    def clear(self):
+        """Forget every recorded latency."""
+        self.samples.clear()
+
+    def histogram(self) -> str:
+        """Render the recorded latencies, one histogram per phase.
+
+        Returns:
+            str -- Percentiles and a histogram of the latencies of each phase
+        """
+        if not self.samples:
+            return "No timings recorded.\n"
+
+        output: List[str] = []
+        for phase, recorded in self.samples.items():
+            samples = sorted(recorded)
+
+            def percentile(rank: float) -> float:
+                return samples[min(len(samples) - 1, int(len(samples) * rank))]
+
+            output.append(
+                "{}: {} calls, p50 {:.3f} ms, p90 {:.3f} ms, p99 {:.3f} ms, "
+                "max {:.3f} ms".format(
+                    phase,
+                    len(samples),
+                    percentile(0.5),
+                    percentile(0.9),
+                    percentile(0.99),
+                    samples[-1],
+                )
+            )
+
+            counts = [0] * (len(BUCKETS) + 1)
+            for latency in samples:
+                index = 0
+                while index < len(BUCKETS) and latency >= BUCKETS[index]:
+                    index += 1
+                counts[index] += 1
+
+            # Skip the empty buckets below the fastest and above the slowest
+            used = [index for index, count in enumerate(counts) if count]
+            for index in range(used[0], used[-1] + 1):
+                label = (
+                    "< {:g} ms".format(BUCKETS[index])
+                    if index < len(BUCKETS)
+                    else ">= {:g} ms".format(BUCKETS[-1])
+                )
+                bar = "#" * -(-counts[index] * BAR_WIDTH // len(samples))
+                output.append("  {:>11} {:>6} {}".format(label, counts[index], bar))
+            output.append("")
+
+        return "\n".join(output)
+
+
+timings = Timings()
+
+
+def timed(phase: str) -> Callable[[F], F]:
+    """Record the latency of calls of the decorated function while enabled.
+
+    Arguments:
+        phase {str} -- Name of the phase the function is recorded as
+
+    Returns:
+        callable -- Decorator of the function
+    """
+
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not timings.enabled:
+                return func(*args, **kwargs)
+
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                timings.record(phase, (time.perf_counter() - started) * 1000)
+
+        return wrapper  # type: ignore
+
+    return decorator